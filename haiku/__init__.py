@@ -89,6 +89,7 @@ from haiku._src.recurrent import LSTMState
 from haiku._src.recurrent import ResetCore
 from haiku._src.recurrent import RNNCore
 from haiku._src.recurrent import static_unroll
+from haiku._src.recurrent import truncated_unroll
 from haiku._src.recurrent import VanillaRNN
 from haiku._src.reshape import Flatten
 from haiku._src.reshape import Reshape
@@ -215,6 +216,7 @@ __all__ = (
     "transform",
     "transform_with_state",
     "transparent",
+    "truncated_unroll",
     "value_and_grad",
     "vmap",
     "while_loop",
@@ -15,9 +15,11 @@
 """(Multi-Head) Attention module to be used in a Transformer architecture."""
 
 import types
-from typing import Optional
+from typing import Mapping, NamedTuple, Optional, Tuple, Union
 
+from haiku._src import base
 from haiku._src import basic
+from haiku._src import data_structures
 from haiku._src import initializers
 from haiku._src import module
 import jax
@@ -26,11 +28,277 @@ import numpy as np
 
 # If you are forking replace this with `import haiku as hk`.
 hk = types.ModuleType("haiku")
+hk.data_structures = data_structures
+hk.get_state = base.get_state
+hk.set_state = base.set_state
 hk.Module = module.Module
 hk.Linear = basic.Linear
 hk.transparent = module.transparent
 hk.initializers = initializers
-del basic, module, initializers
+del base, basic, data_structures, module, initializers
+
+
+def pad_axis(x: jnp.ndarray, axis: int, size: int, value=0) -> jnp.ndarray:
+  """Pads ``axis`` of ``x`` at the end up to ``size``."""
+  axis %= x.ndim
+  padding = [(0, 0)] * x.ndim
+  padding[axis] = (0, size - x.shape[axis])
+  return jnp.pad(x, padding, constant_values=value)
+
+
+def slice_chunk(
+    x: jnp.ndarray,
+    index: jnp.ndarray,
+    chunk_size: int,
+    axis: int,
+) -> jnp.ndarray:
+  """Returns chunk ``index`` of ``axis`` (unless it is broadcast)."""
+  axis %= x.ndim
+  if x.shape[axis] == 1:
+    return x
+  return jax.lax.dynamic_slice_in_dim(x, index * chunk_size, chunk_size, axis)
+
+
+def attention_logits(
+    query_heads: jnp.ndarray,
+    key_heads: jnp.ndarray,
+) -> jnp.ndarray:
+  """Returns logits ``[..., h, t, T]`` for queries and (grouped) keys.
+
+  Args:
+    query_heads: Array of shape ``[..., t, h, d]``.
+    key_heads: Array of shape ``[..., T, g, d]`` where ``g`` divides ``h``,
+      each key head is shared by ``h // g`` consecutive query heads.
+
+  Returns:
+    Array of shape ``[..., h, t, T]``.
+  """
+  num_heads, num_kv_heads = query_heads.shape[-2], key_heads.shape[-2]
+  if num_heads == num_kv_heads:
+    return jnp.einsum("...thd,...Thd->...htT", query_heads, key_heads)
+  # Split query heads into groups so key heads broadcast rather than repeat.
+  query_heads = jnp.reshape(query_heads, (*query_heads.shape[:-2], num_kv_heads,
+                                          -1, query_heads.shape[-1]))
+  logits = jnp.einsum("...tgrd,...Tgd->...grtT", query_heads, key_heads)
+  return jnp.reshape(logits, (*logits.shape[:-4], num_heads,
+                              *logits.shape[-2:]))
+
+
+def attention_values(
+    weights: jnp.ndarray,
+    value_heads: jnp.ndarray,
+) -> jnp.ndarray:
+  """Returns ``[..., t, h, v]`` weighting (grouped) values by ``weights``.
+
+  Args:
+    weights: Array of shape ``[..., h, t, T]``.
+    value_heads: Array of shape ``[..., T, g, v]`` where ``g`` divides ``h``.
+
+  Returns:
+    Array of shape ``[..., t, h, v]``.
+  """
+  num_heads, num_kv_heads = weights.shape[-3], value_heads.shape[-2]
+  if num_heads == num_kv_heads:
+    return jnp.einsum("...htT,...Thd->...thd", weights, value_heads)
+  weights = jnp.reshape(weights, (*weights.shape[:-3], num_kv_heads, -1,
+                                  *weights.shape[-2:]))
+  out = jnp.einsum("...grtT,...Tgd->...tgrd", weights, value_heads)
+  return jnp.reshape(out, (*out.shape[:-3], num_heads, out.shape[-1]))
+
+
+class StructuredMask(NamedTuple):
+  """A mask computed from query and key positions.
+
+  Attributes:
+    causal: Whether queries may only attend to keys at the same or earlier
+      positions.
+    window_size: If set, queries may only attend to keys less than this many
+      positions away.
+    local_block_size: If set, positions are split into blocks of this size and
+      queries may only attend to keys in the same block.
+    key_lengths: If set, an integer array with the batch shape of the logits,
+      keys at positions greater than or equal to the length are masked.
+    query_offset: Position of the first query (e.g. when decoding).
+  """
+  causal: bool = False
+  window_size: Optional[int] = None
+  local_block_size: Optional[int] = None
+  key_lengths: Optional[jnp.ndarray] = None
+  query_offset: Union[int, jnp.ndarray] = 0
+
+  @property
+  def is_positional(self) -> bool:
+    return (self.causal or self.window_size is not None or
+            self.local_block_size is not None)
+
+  @property
+  def is_active(self) -> bool:
+    return self.is_positional or self.key_lengths is not None
+
+  def positional_mask(
+      self,
+      query_positions: jnp.ndarray,
+      key_positions: jnp.ndarray,
+  ) -> Optional[jnp.ndarray]:
+    """Returns a ``[t, T]`` mask (or None) for the given positions."""
+    q = (query_positions + self.query_offset)[:, None]
+    k = key_positions[None, :]
+    mask = None
+    and_mask = lambda m: m if mask is None else jnp.logical_and(mask, m)
+    if self.causal:
+      mask = and_mask(k <= q)
+    if self.window_size is not None:
+      mask = and_mask(jnp.abs(q - k) < self.window_size)
+    if self.local_block_size is not None:
+      mask = and_mask(q // self.local_block_size == k // self.local_block_size)
+    return mask
+
+  def __call__(
+      self,
+      query_positions: jnp.ndarray,
+      key_positions: jnp.ndarray,
+      ndim: int,
+  ) -> Optional[jnp.ndarray]:
+    """Returns a mask (or None) broadcastable to logits with ``ndim`` dims."""
+    mask = self.positional_mask(query_positions, key_positions)
+    if mask is not None:
+      mask = jnp.reshape(mask, (1,) * (ndim - 2) + mask.shape)
+    if self.key_lengths is not None:
+      lengths = jnp.reshape(self.key_lengths,
+                            (*self.key_lengths.shape, 1, 1, 1))
+      lengths_mask = key_positions < lengths
+      mask = (lengths_mask if mask is None
+              else jnp.logical_and(mask, lengths_mask))
+    return mask
+
+
+def chunked_attention(
+    query_heads: jnp.ndarray,
+    key_heads: jnp.ndarray,
+    value_heads: jnp.ndarray,
+    mask: Optional[jnp.ndarray],
+    chunk_size: int,
+    structured_mask: StructuredMask = StructuredMask(),
+) -> jnp.ndarray:
+  """Computes attention in chunks of queries and keys.
+
+  Equivalent to computing the attention logits for all queries and keys then
+  taking their softmax, but only ever materializes logits for ``chunk_size``
+  queries and keys at a time. The softmax is computed in a single pass over
+  chunks of keys by keeping a running maximum and sum of exponentiated logits
+  (see https://arxiv.org/abs/2112.05682).
+
+  ``structured_mask`` is computed for each pair of chunks from their positions.
+  Pairs of chunks where it masks all positions are skipped entirely. As with
+  the dense softmax, queries which cannot attend to any key (even if all key
+  chunks are skipped) attend uniformly to all keys.
+
+  Args:
+    query_heads: Array of shape ``[..., t, h, d]`` (pre-scaled).
+    key_heads: Array of shape ``[..., T, g, d]`` where ``g`` divides ``h``.
+    value_heads: Array of shape ``[..., T, g, v]``.
+    mask: Optional boolean mask broadcastable to ``[..., h, t, T]``.
+    chunk_size: Number of queries and keys in each chunk.
+    structured_mask: Mask applied in addition to ``mask``.
+
+  Returns:
+    Array of shape ``[..., t, h, v]``.
+  """
+  num_queries = query_heads.shape[-3]
+  num_keys = key_heads.shape[-3]
+  num_query_chunks = -(-num_queries // chunk_size)
+  num_key_chunks = -(-num_keys // chunk_size)
+  padded_queries = num_query_chunks * chunk_size
+  padded_keys = num_key_chunks * chunk_size
+
+  query_heads = pad_axis(query_heads, -3, padded_queries)
+  key_heads = pad_axis(key_heads, -3, padded_keys)
+  value_heads = pad_axis(value_heads, -3, padded_keys)
+  if mask is not None:
+    if mask.shape[-2] != 1:
+      mask = pad_axis(mask, -2, padded_queries, True)
+    if mask.shape[-1] != 1:
+      mask = pad_axis(mask, -1, padded_keys, False)
+  key_is_valid = jnp.arange(padded_keys) < num_keys
+
+  # Accumulate in at least f32 to avoid losing precision across chunks.
+  dtype = jnp.promote_types(value_heads.dtype, jnp.float32)
+
+  # Output for fully masked queries, for which the dense softmax is uniform.
+  num_heads = query_heads.shape[-2]
+  value_mean = jnp.sum(value_heads.astype(dtype), axis=-3) / num_keys
+  value_mean = jnp.repeat(value_mean, num_heads // value_mean.shape[-2],
+                          axis=-2)
+  value_mean = jnp.expand_dims(value_mean, -3)
+
+  def query_chunk(query_index):
+    q = slice_chunk(query_heads, query_index, chunk_size, -3)
+    query_positions = query_index * chunk_size + jnp.arange(chunk_size)
+
+    def attend(carry, key_index):
+      running_max, running_sum, acc = carry
+      k = slice_chunk(key_heads, key_index, chunk_size, -3)
+      v = slice_chunk(value_heads, key_index, chunk_size, -3)
+      logits = attention_logits(q, k)
+      if mask is not None:
+        m = slice_chunk(mask, query_index, chunk_size, -2)
+        m = slice_chunk(m, key_index, chunk_size, -1)
+        logits = jnp.where(m, logits, -1e30)
+      key_positions = key_index * chunk_size + jnp.arange(chunk_size)
+      m = structured_mask(query_positions, key_positions, logits.ndim)
+      if m is not None:
+        logits = jnp.where(m, logits, -1e30)
+      logits = logits.astype(dtype)
+      # Padding keys are excluded entirely (even if all other keys are masked).
+      valid = slice_chunk(key_is_valid, key_index, chunk_size, 0)
+      logits = jnp.where(valid, logits, -jnp.inf)
+
+      new_max = jnp.maximum(running_max, logits.max(axis=-1))
+      new_max = jnp.where(jnp.isneginf(new_max), 0., new_max)
+      correction = jnp.exp(running_max - new_max)
+      weights = jnp.exp(logits - new_max[..., None])
+      running_sum = running_sum * correction + weights.sum(axis=-1)
+      # The accumulator is [..., t, h, v] whereas statistics are [..., h, t].
+      acc = (acc * jnp.swapaxes(correction, -1, -2)[..., None] +
+             attention_values(weights, v.astype(dtype)))
+      return new_max, running_sum, acc
+
+    @jax.checkpoint
+    def key_chunk(carry, key_index):
+      if not structured_mask.is_positional:
+        return attend(carry, key_index), None
+      # Skip chunks of keys that no query in this chunk can attend to.
+      key_positions = key_index * chunk_size + jnp.arange(chunk_size)
+      any_valid = jnp.any(
+          structured_mask.positional_mask(query_positions, key_positions))
+      carry = jax.lax.cond(any_valid,
+                           lambda c: attend(c, key_index),
+                           lambda c: c,
+                           carry)
+      return carry, None
+
+    batch_shape = jnp.broadcast_shapes(q.shape[:-3], key_heads.shape[:-3])
+    value_size = value_heads.shape[-1]
+    stats_shape = (*batch_shape, num_heads, chunk_size)
+    init = (jnp.full(stats_shape, -jnp.inf, dtype),
+            jnp.zeros(stats_shape, dtype),
+            jnp.zeros((*batch_shape, chunk_size, num_heads, value_size), dtype))
+    (running_max, running_sum, acc), _ = jax.lax.scan(
+        key_chunk, init, jnp.arange(num_key_chunks))
+    # Queries are fully masked if all logits were masked or all key chunks
+    # were skipped (in which case the sum is zero).
+    fully_masked = jnp.logical_or(running_max <= -1e30, running_sum == 0)
+    fully_masked = jnp.swapaxes(fully_masked, -1, -2)[..., None]
+    running_sum = jnp.where(running_sum == 0, 1, running_sum)
+    out = acc / jnp.swapaxes(running_sum, -1, -2)[..., None]
+    return jnp.where(fully_masked, value_mean, out)
+
+  # [num_query_chunks, ..., chunk_size, h, v]
+  out = jax.lax.map(query_chunk, jnp.arange(num_query_chunks))
+  out = jnp.moveaxis(out, 0, -4)
+  out = jnp.reshape(out, (*out.shape[:-4], padded_queries, *out.shape[-2:]))
+  out = out[..., :num_queries, :, :]
+  return out.astype(value_heads.dtype)
 
 
 class MultiHeadAttention(hk.Module):
@@ -38,6 +306,28 @@ class MultiHeadAttention(hk.Module):
 
   As described in the vanilla Transformer paper:
     "Attention is all you need" https://arxiv.org/abs/1706.03762
+
+  If ``max_decode_length`` is set the module is used for autoregressive
+  decoding. Projected keys and values are stored in a cache in Haiku state
+  (so the module must be used inside :func:`~haiku.transform_with_state`) and
+  each call appends the keys/values of the new tokens to the cache and attends
+  causally over all cached tokens. For example, after priming the cache with a
+  prompt each sampling step only projects and attends with a single token:
+
+  >>> def f(x):
+  ...   mha = hk.MultiHeadAttention(num_heads=2, key_size=4, w_init_scale=1.,
+  ...                               max_decode_length=16)
+  ...   return mha(x, x, x)
+  >>> f = hk.transform_with_state(f)
+  >>> rng = jax.random.PRNGKey(42)
+  >>> prompt = jnp.ones([1, 3, 8])
+  >>> params, state = f.init(rng, prompt)
+  >>> out, state = f.apply(params, state, rng, prompt)
+  >>> out, state = f.apply(params, state, rng, jnp.ones([1, 1, 8]))
+  >>> out.shape
+  (1, 1, 8)
+  >>> int(state["multi_head_attention"]["cache_index"])
+  4
   """
 
   def __init__(
@@ -48,13 +338,58 @@ class MultiHeadAttention(hk.Module):
       w_init_scale: float,
       value_size: Optional[int] = None,
       model_size: Optional[int] = None,
+      chunk_size: Optional[int] = None,
+      max_decode_length: Optional[int] = None,
+      fuse_qkv: bool = False,
+      num_kv_heads: Optional[int] = None,
       name: Optional[str] = None,
   ):
+    """Constructs the MultiHeadAttention module.
+
+    Args:
+      num_heads: Number of independent attention heads (H).
+      key_size: The size of keys (K) and queries used for attention.
+      w_init_scale: Scale of the initializer for the weights.
+      value_size: Optional size of the value projection (V). If None, defaults
+        to the key size (K).
+      model_size: Optional size of the output embedding (D'). If None, defaults
+        to the key size multiplied by the number of heads (K * H).
+      chunk_size: Optional number of queries and keys to process at a time. If
+        set, attention is computed in chunks such that the full attention
+        matrix is never materialized, this gives the same result (up to
+        floating point error) using memory linear rather than quadratic in the
+        sequence length.
+      max_decode_length: Optional maximum number of tokens to decode. If set,
+        keys and values are cached in Haiku state for incremental decoding
+        (see above). Steps which would write past the end of the cache leave
+        it unchanged and return NaNs.
+      fuse_qkv: If ``True`` queries, keys and values are computed with a
+        single linear layer (named ``qkv``), this requires ``query``, ``key``
+        and ``value`` to be the same array (i.e. self-attention). See
+        :func:`~haiku.experimental.fuse_qkv_params` to convert parameters
+        between the fused and unfused layouts.
+      num_kv_heads: Optional number of key/value heads (G), which must divide
+        ``num_heads``. Each key/value head is shared by ``num_heads //
+        num_kv_heads`` query heads (grouped-query attention, or multi-query
+        attention with ``num_kv_heads=1``), reducing the size of the key/value
+        projections and cache. If None, defaults to ``num_heads``.
+      name: Optional name for this module.
+    """
     super().__init__(name=name)
+    if chunk_size is not None and chunk_size < 1:
+      raise ValueError(f"chunk_size must be positive, got {chunk_size}.")
+    if num_kv_heads is not None and (
+        num_kv_heads < 1 or num_heads % num_kv_heads):
+      raise ValueError(f"num_kv_heads ({num_kv_heads}) must be positive and "
+                       f"divide num_heads ({num_heads}).")
     self.num_heads = num_heads
+    self.num_kv_heads = num_kv_heads or num_heads
     self.key_size = key_size
     self.value_size = value_size or key_size
     self.model_size = model_size or key_size * num_heads
+    self.chunk_size = chunk_size
+    self.max_decode_length = max_decode_length
+    self.fuse_qkv = fuse_qkv
     self.w_init = hk.initializers.VarianceScaling(w_init_scale)
 
   def __call__(
@@ -63,34 +398,267 @@ class MultiHeadAttention(hk.Module):
       key: jnp.ndarray,
       value: jnp.ndarray,
       mask: Optional[jnp.ndarray] = None,
+      *,
+      causal: bool = False,
+      window_size: Optional[int] = None,
+      local_block_size: Optional[int] = None,
+      key_lengths: Optional[jnp.ndarray] = None,
   ) -> jnp.ndarray:
-    """Compute (optionally masked) MHA with queries, keys & values."""
-    query_heads = self._linear_projection(query, self.key_size, "query")
-    key_heads = self._linear_projection(key, self.key_size, "key")
-    value_heads = self._linear_projection(value, self.value_size, "value")
+    """Compute (optionally masked) MHA with queries, keys & values.
+
+    In addition to a dense ``mask``, structured masks can be requested with
+    ``causal``, ``window_size``, ``local_block_size`` and ``key_lengths``.
+    These are computed from query and key positions as needed, rather than
+    being passed as a ``[..., T', T]`` array, and are equivalent to passing the
+    corresponding dense mask. With ``chunk_size`` set they are computed per
+    chunk and chunks which are entirely masked are skipped.
+
+    Args:
+      query: Embeddings sequence used to compute queries; shape [..., T', D_q].
+      key: Embeddings sequence used to compute keys; shape [..., T, D_k].
+      value: Embeddings sequence used to compute values; shape [..., T, D_v].
+      mask: Optional mask applied to attention weights; shape [..., H, T', T]
+        (or broadcastable to it). When decoding the last axis is over the
+        cache, so T is ``max_decode_length``.
+      causal: If ``True`` each query only attends to keys at the same or
+        earlier positions. Decoding is always causal.
+      window_size: If set each query only attends to keys less than
+        ``window_size`` positions away (combine with ``causal`` for a causal
+        sliding window).
+      local_block_size: If set positions are split into blocks of this size and
+        each query only attends to keys in the same block.
+      key_lengths: Optional integer array with the batch shape of the inputs
+        (i.e. ``[...]``) giving the number of valid keys, keys at later
+        positions are masked (e.g. padding).
+
+    Returns:
+      A new sequence of embeddings, consisting of a projection of the
+        attention-weighted value projections; shape [..., T', D'].
+    """
+    if self.fuse_qkv:
+      if not query is key is value:
+        raise ValueError("fuse_qkv=True requires query, key and value to be "
+                         "the same array (i.e. self-attention).")
+      query_heads, key_heads, value_heads = self._fused_projection(query)
+    else:
+      query_heads = self._linear_projection(query, self.key_size, "query")
+      key_heads = self._linear_projection(key, self.key_size, "key",
+                                          self.num_kv_heads)
+      value_heads = self._linear_projection(value, self.value_size, "value",
+                                            self.num_kv_heads)
+
+    structured_mask = StructuredMask(causal=causal,
+                                     window_size=window_size,
+                                     local_block_size=local_block_size,
+                                     key_lengths=key_lengths)
+    cache_fits = None
+    if self.max_decode_length is not None:
+      key_heads, value_heads, cache_index, cache_fits = self._update_cache(
+          key_heads, value_heads)
+      structured_mask = structured_mask._replace(causal=True,
+                                                 query_offset=cache_index)
 
-    attn_logits = jnp.einsum("...thd,...Thd->...htT", query_heads, key_heads)
     sqrt_key_size = np.sqrt(self.key_size).astype(key.dtype)
-    attn_logits = attn_logits / sqrt_key_size
+
+    logits_ndim = max(query_heads.ndim, key_heads.ndim)
     if mask is not None:
-      if mask.ndim != attn_logits.ndim:
+      if mask.ndim != logits_ndim:
         raise ValueError(f"Mask dimensionality {mask.ndim} must match logits "
-                         f"{attn_logits.ndim}.")
-      attn_logits = jnp.where(mask, attn_logits, -1e30)
+                         f"{logits_ndim}.")
+    if key_lengths is not None and key_lengths.ndim != logits_ndim - 3:
+      raise ValueError(f"key_lengths must have shape [...] (batch shape of the "
+                       f"inputs), got {key_lengths.shape}.")
 
-    attn_weights = jax.nn.softmax(attn_logits)
-    attn = jnp.einsum("...htT,...Thd->...thd", attn_weights, value_heads)
+    if self.chunk_size is not None:
+      attn = chunked_attention(query_heads / sqrt_key_size, key_heads,
+                               value_heads, mask, self.chunk_size,
+                               structured_mask)
+    else:
+      attn_logits = attention_logits(query_heads, key_heads)
+      attn_logits = attn_logits / sqrt_key_size
+      if mask is not None:
+        attn_logits = jnp.where(mask, attn_logits, -1e30)
+      if structured_mask.is_active:
+        m = structured_mask(jnp.arange(query_heads.shape[-3]),
+                            jnp.arange(key_heads.shape[-3]), logits_ndim)
+        attn_logits = jnp.where(m, attn_logits, -1e30)
+
+      attn_weights = jax.nn.softmax(attn_logits)
+      attn = attention_values(attn_weights, value_heads)
+    if cache_fits is not None:
+      # The cache is full, so make this loud rather than silently attending to
+      # a cache which does not contain the keys/values of this step.
+      attn = jnp.where(cache_fits, attn, jnp.nan)
     # Concatenate attention matrix of all heads into a single vector.
     attn_vec = jnp.reshape(attn, (*query.shape[:-1], -1))
 
     return hk.Linear(self.model_size, w_init=self.w_init)(attn_vec)
 
+  def _update_cache(
+      self,
+      key_heads: jnp.ndarray,
+      value_heads: jnp.ndarray,
+  ) -> Tuple[jnp.ndarray, jnp.ndarray, jnp.ndarray, jnp.ndarray]:
+    """Appends keys/values to the cache.
+
+    Args:
+      key_heads: Keys of the new tokens.
+      value_heads: Values of the new tokens.
+
+    Returns:
+      The key and value caches, the write index and whether the new tokens fit
+      in the cache. If they do not the cache is left unchanged.
+
+    Raises:
+      ValueError: If there are more new tokens than ``max_decode_length``.
+    """
+    *batch_shape, num_tokens, num_heads, _ = key_heads.shape
+    if num_tokens > self.max_decode_length:
+      raise ValueError(
+          f"Cannot decode {num_tokens} tokens in one step with "
+          f"max_decode_length={self.max_decode_length}.")
+    cache_shape = (*batch_shape, self.max_decode_length, num_heads)
+    key_cache = hk.get_state("key_cache", (*cache_shape, self.key_size),
+                             key_heads.dtype, init=jnp.zeros)
+    value_cache = hk.get_state("value_cache", (*cache_shape, self.value_size),
+                               value_heads.dtype, init=jnp.zeros)
+    cache_index = hk.get_state("cache_index", (), jnp.int32, init=jnp.zeros)
+
+    # NOTE: `dynamic_update_slice` clamps the start index, so writes past the
+    # end of the cache would overwrite its tail. Instead we skip them.
+    axis = len(batch_shape)
+    fits = cache_index + num_tokens <= self.max_decode_length
+
+    def update(caches):
+      key_cache, value_cache = caches
+      key_cache = jax.lax.dynamic_update_slice_in_dim(
+          key_cache, key_heads.astype(key_cache.dtype), cache_index, axis)
+      value_cache = jax.lax.dynamic_update_slice_in_dim(
+          value_cache, value_heads.astype(value_cache.dtype), cache_index, axis)
+      return key_cache, value_cache
+
+    key_cache, value_cache = jax.lax.cond(
+        fits, update, lambda caches: caches, (key_cache, value_cache))
+    hk.set_state("key_cache", key_cache)
+    hk.set_state("value_cache", value_cache)
+    hk.set_state("cache_index", jnp.minimum(cache_index + num_tokens,
+                                            self.max_decode_length))
+    return key_cache, value_cache, cache_index, fits
+
+  @hk.transparent
+  def _fused_projection(
+      self,
+      x: jnp.ndarray,
+  ) -> Tuple[jnp.ndarray, jnp.ndarray, jnp.ndarray]:
+    sizes = qkv_sizes(self.num_heads, self.key_size, self.value_size,
+                      self.num_kv_heads)
+    y = hk.Linear(sum(sizes), w_init=self.w_init, name="qkv")(x)
+    query, key, value = jnp.split(y, np.cumsum(sizes[:-1]), axis=-1)
+    query = query.reshape((*x.shape[:-1], self.num_heads, self.key_size))
+    key = key.reshape((*x.shape[:-1], self.num_kv_heads, self.key_size))
+    value = value.reshape((*x.shape[:-1], self.num_kv_heads, self.value_size))
+    return query, key, value
+
   @hk.transparent
   def _linear_projection(
       self,
       x: jnp.ndarray,
       head_size: int,
-      name: Optional[str] = None
+      name: Optional[str] = None,
+      num_heads: Optional[int] = None,
   ) -> jnp.ndarray:
-    y = hk.Linear(self.num_heads * head_size, w_init=self.w_init, name=name)(x)
-    return y.reshape((*x.shape[:-1], self.num_heads, head_size))
+    num_heads = num_heads or self.num_heads
+    y = hk.Linear(num_heads * head_size, w_init=self.w_init, name=name)(x)
+    return y.reshape((*x.shape[:-1], num_heads, head_size))
+
+
+QKV_NAMES = ("query", "key", "value")
+
+
+def qkv_sizes(
+    num_heads: int,
+    key_size: int,
+    value_size: int,
+    num_kv_heads: Optional[int] = None,
+) -> Tuple[int, int, int]:
+  num_kv_heads = num_kv_heads or num_heads
+  return (num_heads * key_size, num_kv_heads * key_size,
+          num_kv_heads * value_size)
+
+
+def fuse_qkv_params(
+    params: Mapping[str, Mapping[str, jnp.ndarray]],
+) -> Mapping[str, Mapping[str, jnp.ndarray]]:
+  """Converts :class:`MultiHeadAttention` parameters to the fused layout.
+
+  Replaces the ``query``, ``key`` and ``value`` linear layers of every
+  :class:`MultiHeadAttention` module in ``params`` with a single ``qkv`` layer,
+  as used with ``fuse_qkv=True``:
+
+  >>> f = hk.transform(lambda x: hk.MultiHeadAttention(
+  ...     num_heads=2, key_size=4, w_init_scale=1.)(x, x, x))
+  >>> params = f.init(jax.random.PRNGKey(42), jnp.ones([3, 8]))
+  >>> fused = hk.experimental.fuse_qkv_params(params)
+  >>> sorted(fused)
+  ['multi_head_attention/linear', 'multi_head_attention/qkv']
+  >>> fused["multi_head_attention/qkv"]["w"].shape
+  (8, 24)
+
+  Args:
+    params: Parameters for a model using ``fuse_qkv=False``.
+
+  Returns:
+    Parameters for the same model using ``fuse_qkv=True``.
+  """
+  out = {}
+  for module_name, bundle in params.items():
+    prefix, _, name = module_name.rpartition("/")
+    siblings = [f"{prefix}/{n}" for n in QKV_NAMES]
+    if name in QKV_NAMES and all(s in params for s in siblings):
+      if name == "query":
+        out[f"{prefix}/qkv"] = {
+            k: jnp.concatenate([params[s][k] for s in siblings], axis=-1)
+            for k in bundle}
+    else:
+      out[module_name] = dict(bundle)
+  return hk.data_structures.to_haiku_dict(out)
+
+
+def unfuse_qkv_params(
+    params: Mapping[str, Mapping[str, jnp.ndarray]],
+    *,
+    num_heads: int,
+    key_size: int,
+    value_size: Optional[int] = None,
+    num_kv_heads: Optional[int] = None,
+) -> Mapping[str, Mapping[str, jnp.ndarray]]:
+  """Inverse of :func:`fuse_qkv_params`.
+
+  Args:
+    params: Parameters for a model using ``fuse_qkv=True``.
+    num_heads: Number of attention heads in each fused module.
+    key_size: Key size of each fused module.
+    value_size: Value size of each fused module, defaults to ``key_size``.
+    num_kv_heads: Number of key/value heads in each fused module, defaults to
+      ``num_heads``.
+
+  Returns:
+    Parameters for the same model using ``fuse_qkv=False``.
+  """
+  sizes = qkv_sizes(num_heads, key_size, value_size or key_size, num_kv_heads)
+  out = {}
+  for module_name, bundle in params.items():
+    prefix, _, name = module_name.rpartition("/")
+    if name != "qkv":
+      out[module_name] = dict(bundle)
+      continue
+    for k, v in bundle.items():
+      if v.shape[-1] != sum(sizes):
+        raise ValueError(
+            f"{module_name}/{k} has shape {v.shape}, expected the last axis to "
+            f"have size {sum(sizes)} for num_heads={num_heads}, "
+            f"key_size={key_size} and value_size={value_size}.")
+      splits = jnp.split(v, np.cumsum(sizes[:-1]), axis=-1)
+      for qkv_name, split in zip(QKV_NAMES, splits):
+        out.setdefault(f"{prefix}/{qkv_name}", {})[k] = split
+  return hk.data_structures.to_haiku_dict(out)
@@ -23,6 +23,7 @@ from haiku._src import transform
 
 import jax
 import jax.numpy as jnp
+import numpy as np
 
 
 class MultiHeadAttentionTest(parameterized.TestCase):
@@ -104,5 +105,297 @@ class MultiHeadAttentionTest(parameterized.TestCase):
     y = vapply(params, rngs, query, key, value)
     self.assertEqual(y.shape, (13, 7, 15))
 
+  @parameterized.parameters(1, 2, 3, 5, 8)
+  def test_chunked_matches_default(self, chunk_size):
+    query = jax.random.normal(jax.random.PRNGKey(0), (2, 5, 6))
+    key = value = jax.random.normal(jax.random.PRNGKey(1), (2, 7, 6))
+    # Includes a query that cannot attend to any key.
+    mask = jax.random.bernoulli(jax.random.PRNGKey(2), 0.7, (2, 1, 5, 7))
+    mask = mask.at[:, :, 0].set(False)
+    self.assertChunkedMatchesDefault(chunk_size, query, key, value, mask)
+
+  @parameterized.parameters(
+      ("no_mask", None),
+      ("key_padding", (1, 1, 1, 7)),
+      ("per_head", (1, 4, 5, 7)),
+  )
+  def test_chunked_mask_shapes(self, _, mask_shape):
+    query = jax.random.normal(jax.random.PRNGKey(0), (3, 5, 6))
+    key = value = jax.random.normal(jax.random.PRNGKey(1), (3, 7, 6))
+    mask = None
+    if mask_shape is not None:
+      mask = jax.random.bernoulli(jax.random.PRNGKey(2), 0.7, mask_shape)
+    self.assertChunkedMatchesDefault(3, query, key, value, mask)
+
+  def test_chunked_grad(self):
+    query = key = value = jax.random.normal(jax.random.PRNGKey(0), (4, 6))
+
+    def loss(chunk_size, x):
+      return jnp.sum(attention.MultiHeadAttention(
+          key_size=3, num_heads=2, w_init_scale=1.0,
+          chunk_size=chunk_size)(x, x, x) ** 2)
+
+    f = transform.transform(lambda x: loss(None, x))
+    g = transform.transform(lambda x: loss(3, x))
+    params = f.init(jax.random.PRNGKey(42), query)
+    grad_f = jax.grad(f.apply)(params, None, query)
+    grad_g = jax.jit(jax.grad(g.apply))(params, None, query)
+    jax.tree_multimap(
+        lambda a, b: np.testing.assert_allclose(a, b, rtol=1e-4, atol=1e-5),
+        grad_f, grad_g)
+
+  def test_chunk_size_must_be_positive(self):
+    with self.assertRaisesRegex(ValueError, "chunk_size must be positive"):
+      test_utils.transform_and_run(lambda: attention.MultiHeadAttention(
+          key_size=3, num_heads=2, w_init_scale=1.0, chunk_size=0))()
+
+  @parameterized.parameters(None, 2)
+  def test_decode_matches_causal_attention(self, chunk_size):
+    seq_len = 6
+    x = jax.random.normal(jax.random.PRNGKey(0), (2, seq_len, 5))
+
+    def f(x, max_decode_length=None):
+      mha = attention.MultiHeadAttention(
+          key_size=3, num_heads=4, w_init_scale=1.0, chunk_size=chunk_size,
+          max_decode_length=max_decode_length)
+      if max_decode_length is None:
+        mask = jnp.tril(jnp.ones([seq_len, seq_len], dtype=bool))[None, None]
+        return mha(x, x, x, mask=mask)
+      return mha(x, x, x)
+
+    f = transform.transform_with_state(f)
+    rng = jax.random.PRNGKey(42)
+    params, _ = f.init(rng, x)
+    expected, _ = f.apply(params, {}, rng, x)
+
+    # Prime the cache with two tokens then decode one token at a time.
+    _, state = f.init(rng, x[:, :2], max_decode_length=8)
+    apply = jax.jit(f.apply, static_argnums=4)
+    outputs = []
+    for start, end in [(0, 2), (2, 3), (3, 4), (4, 5), (5, 6)]:
+      out, state = apply(params, state, rng, x[:, start:end], 8)
+      outputs.append(out)
+    actual = jnp.concatenate(outputs, axis=1)
+    np.testing.assert_allclose(actual, expected, rtol=1e-5, atol=1e-5)
+    self.assertEqual(
+        state["multi_head_attention"]["cache_index"], seq_len)
+    self.assertEqual(
+        state["multi_head_attention"]["key_cache"].shape, (2, 8, 4, 3))
+
+  @parameterized.parameters(None, 2)
+  def test_decode_past_max_decode_length(self, chunk_size):
+    def f(x):
+      return attention.MultiHeadAttention(
+          key_size=3, num_heads=2, w_init_scale=1.0, chunk_size=chunk_size,
+          max_decode_length=3)(x, x, x)
+
+    f = transform.transform_with_state(f)
+    rng = jax.random.PRNGKey(42)
+    x = jax.random.normal(rng, (1, 2, 5))
+    params, state = f.init(rng, x)
+    apply = jax.jit(f.apply)
+    out, state = apply(params, state, rng, x)
+    out, state = apply(params, state, rng, x[:, :1])
+    self.assertFalse(np.isnan(out).any())
+    full_state = state
+
+    # One step past the end of the cache.
+    out, state = apply(params, state, rng, x[:, :1])
+    self.assertTrue(np.isnan(out).all())
+    self.assertEqual(state["multi_head_attention"]["cache_index"], 3)
+    jax.tree_multimap(np.testing.assert_array_equal, state, full_state)
+
+  def test_decode_step_larger_than_cache(self):
+    def f(x):
+      return attention.MultiHeadAttention(
+          key_size=3, num_heads=2, w_init_scale=1.0,
+          max_decode_length=3)(x, x, x)
+
+    f = transform.transform_with_state(f)
+    with self.assertRaisesRegex(ValueError, "max_decode_length=3"):
+      f.init(jax.random.PRNGKey(42), jnp.ones([1, 4, 5]))
+
+  @parameterized.parameters(None, 5)
+  def test_fused_qkv_matches_unfused(self, value_size):
+    x = jax.random.normal(jax.random.PRNGKey(0), (2, 4, 6))
+
+    def f(x, fuse_qkv):
+      return attention.MultiHeadAttention(
+          key_size=3, num_heads=2, value_size=value_size, w_init_scale=1.0,
+          fuse_qkv=fuse_qkv)(x, x, x)
+
+    f = transform.transform(f)
+    params = f.init(jax.random.PRNGKey(42), x, False)
+    fused_params = attention.fuse_qkv_params(params)
+    self.assertEqual(
+        jax.tree_map(lambda x: x.shape, fused_params),
+        jax.tree_map(lambda x: x.shape,
+                     f.init(jax.random.PRNGKey(42), x, True)))
+    expected = f.apply(params, None, x, False)
+    actual = f.apply(fused_params, None, x, True)
+    np.testing.assert_allclose(actual, expected, rtol=1e-5, atol=1e-5)
+
+    unfused_params = attention.unfuse_qkv_params(
+        fused_params, num_heads=2, key_size=3, value_size=value_size)
+    jax.tree_multimap(np.testing.assert_array_equal, unfused_params, params)
+
+  def test_fused_qkv_requires_self_attention(self):
+    f = lambda x, y: attention.MultiHeadAttention(
+        key_size=3, num_heads=2, w_init_scale=1.0, fuse_qkv=True)(x, y, y)
+    x = jnp.ones([2, 6])
+    with self.assertRaisesRegex(ValueError, "requires query, key and value"):
+      transform.transform(f).init(jax.random.PRNGKey(42), x, x + 1)
+
+  def test_unfuse_qkv_params_wrong_size(self):
+    params = {"mha/qkv": {"w": jnp.zeros([6, 18])}}
+    with self.assertRaisesRegex(ValueError, "expected the last axis"):
+      attention.unfuse_qkv_params(params, num_heads=2, key_size=4)
+
+  @parameterized.parameters(
+      (1, None, False), (2, None, False), (2, 3, False), (2, None, True))
+  def test_grouped_query_matches_repeated_kv(
+      self, num_kv_heads, chunk_size, fuse_qkv):
+    num_heads, key_size = 4, 3
+    x = jax.random.normal(jax.random.PRNGKey(0), (2, 5, 6))
+    mask = jax.random.bernoulli(jax.random.PRNGKey(1), 0.7,
+                                (1, num_heads, 5, 5))
+
+    def f(x, num_kv_heads, fuse_qkv):
+      return attention.MultiHeadAttention(
+          key_size=key_size, num_heads=num_heads, w_init_scale=1.0,
+          num_kv_heads=num_kv_heads, chunk_size=chunk_size,
+          fuse_qkv=fuse_qkv)(x, x, x, mask=mask)
+
+    f = transform.transform(f)
+    params = f.init(jax.random.PRNGKey(42), x, num_kv_heads, fuse_qkv)
+    actual = f.apply(params, None, x, num_kv_heads, fuse_qkv)
+
+    if fuse_qkv:
+      params = attention.unfuse_qkv_params(
+          params, num_heads=num_heads, key_size=key_size,
+          num_kv_heads=num_kv_heads)
+    # Repeat each key/value head for each query head in its group.
+    repeat = lambda w: jnp.repeat(
+        w.reshape((*w.shape[:-1], num_kv_heads, key_size)),
+        num_heads // num_kv_heads, axis=-2).reshape((*w.shape[:-1], -1))
+    params = {k: (jax.tree_map(repeat, v) if k.endswith(("/key", "/value"))
+                  else v) for k, v in params.items()}
+    expected = f.apply(params, None, x, None, False)
+    np.testing.assert_allclose(actual, expected, rtol=1e-5, atol=1e-5)
+
+  @test_utils.transform_and_run
+  def test_grouped_query_shapes(self):
+    x = jnp.ones([2, 5, 6])
+    mha = attention.MultiHeadAttention(
+        key_size=3, num_heads=4, value_size=2, w_init_scale=1.0,
+        num_kv_heads=2)
+    self.assertEqual(mha(x, x, x).shape, (2, 5, 12))
+    params = mha.params_dict()
+    self.assertEqual(params["multi_head_attention/query/w"].shape, (6, 12))
+    self.assertEqual(params["multi_head_attention/key/w"].shape, (6, 6))
+    self.assertEqual(params["multi_head_attention/value/w"].shape, (6, 4))
+
+  @parameterized.parameters(0, 3)
+  def test_invalid_num_kv_heads(self, num_kv_heads):
+    with self.assertRaisesRegex(ValueError, "must be positive and divide"):
+      test_utils.transform_and_run(lambda: attention.MultiHeadAttention(
+          key_size=3, num_heads=4, w_init_scale=1.0,
+          num_kv_heads=num_kv_heads))()
+
+  @parameterized.named_parameters(
+      ("causal", dict(causal=True)),
+      ("window", dict(window_size=2)),
+      ("causal_window", dict(causal=True, window_size=3)),
+      ("local_block", dict(local_block_size=3)),
+      ("key_lengths", dict(key_lengths=jnp.array([7, 4]))),
+      ("all", dict(causal=True, window_size=4, local_block_size=4,
+                   key_lengths=jnp.array([5, 7]))),
+  )
+  def test_structured_mask_matches_dense(self, kwargs):
+    seq_len = 7
+    x = jax.random.normal(jax.random.PRNGKey(0), (2, seq_len, 6))
+    i = jnp.arange(seq_len)[:, None]
+    j = jnp.arange(seq_len)[None, :]
+    dense = jnp.ones([2, 1, seq_len, seq_len], dtype=bool)
+    if kwargs.get("causal"):
+      dense &= j <= i
+    if "window_size" in kwargs:
+      dense &= jnp.abs(i - j) < kwargs["window_size"]
+    if "local_block_size" in kwargs:
+      block_size = kwargs["local_block_size"]
+      dense &= i // block_size == j // block_size
+    if "key_lengths" in kwargs:
+      dense &= j < kwargs["key_lengths"][:, None, None, None]
+
+    def f(x, chunk_size, structured):
+      mha = attention.MultiHeadAttention(
+          key_size=3, num_heads=2, w_init_scale=1.0, chunk_size=chunk_size)
+      if structured:
+        return mha(x, x, x, **kwargs)
+      return mha(x, x, x, mask=dense)
+
+    f = transform.transform(f)
+    params = f.init(jax.random.PRNGKey(42), x, None, False)
+    expected = f.apply(params, None, x, None, False)
+    for chunk_size in (None, 2, 3):
+      actual = f.apply(params, None, x, chunk_size, True)
+      np.testing.assert_allclose(actual, expected, rtol=1e-5, atol=1e-5)
+
+  @parameterized.parameters(None, 1)
+  def test_structured_mask_chunked_all_key_chunks_skipped(self, num_kv_heads):
+    # Queries 3-5 are in a different block to all keys, so for query chunks
+    # containing them every key chunk is skipped.
+    query = jax.random.normal(jax.random.PRNGKey(0), (2, 6, 6))
+    key = jax.random.normal(jax.random.PRNGKey(1), (2, 3, 6))
+
+    def f(query, key, chunk_size):
+      return attention.MultiHeadAttention(
+          key_size=3, num_heads=2, w_init_scale=1.0, chunk_size=chunk_size,
+          num_kv_heads=num_kv_heads)(query, key, key, local_block_size=3)
+
+    f = transform.transform(f)
+    params = f.init(jax.random.PRNGKey(42), query, key, None)
+    expected = f.apply(params, None, query, key, None)
+    for chunk_size in (2, 3):
+      actual = f.apply(params, None, query, key, chunk_size)
+      self.assertFalse(np.isnan(actual).any())
+      np.testing.assert_allclose(actual, expected, rtol=1e-5, atol=1e-5)
+
+  def test_structured_mask_chunked_grad(self):
+    x = jax.random.normal(jax.random.PRNGKey(0), (8, 6))
+
+    def f(x, chunk_size):
+      return jnp.sum(attention.MultiHeadAttention(
+          key_size=3, num_heads=2, w_init_scale=1.0, chunk_size=chunk_size)(
+              x, x, x, causal=True, window_size=3) ** 2)
+
+    f = transform.transform(f)
+    params = f.init(jax.random.PRNGKey(42), x, None)
+    expected = jax.grad(f.apply)(params, None, x, None)
+    actual = jax.jit(jax.grad(f.apply), static_argnums=3)(params, None, x, 2)
+    jax.tree_multimap(
+        lambda a, b: np.testing.assert_allclose(a, b, rtol=1e-4, atol=1e-5),
+        actual, expected)
+
+  @test_utils.transform_and_run
+  def test_key_lengths_wrong_rank(self):
+    x = jnp.ones([2, 3, 4])
+    mha = attention.MultiHeadAttention(key_size=3, num_heads=2,
+                                       w_init_scale=1.0)
+    with self.assertRaisesRegex(ValueError, "key_lengths must have shape"):
+      mha(x, x, x, key_lengths=jnp.array(3))
+
+  def assertChunkedMatchesDefault(self, chunk_size, query, key, value, mask):
+    def f(chunk_size, query, key, value, mask):
+      return attention.MultiHeadAttention(
+          key_size=3, num_heads=4, value_size=2, w_init_scale=1.0,
+          chunk_size=chunk_size)(query, key, value, mask=mask)
+
+    f = transform.transform(f)
+    params = f.init(jax.random.PRNGKey(42), None, query, key, value, mask)
+    expected = f.apply(params, None, None, query, key, value, mask)
+    actual = f.apply(params, None, chunk_size, query, key, value, mask)
+    np.testing.assert_allclose(actual, expected, rtol=1e-5, atol=1e-5)
+
 if __name__ == "__main__":
   absltest.main()
@@ -17,9 +17,9 @@
 import collections
 import contextlib
 import functools
-from typing import (Callable, Iterator, Iterable, MutableMapping, NamedTuple,
-                    Optional, Set, Tuple, Union, Any, Sequence, Mapping,
-                    FrozenSet)
+from typing import (Callable, ContextManager, Dict, Iterator, Iterable,
+                    MutableMapping, NamedTuple, Optional, Set, Tuple, Union,
+                    Any, Sequence, Mapping, FrozenSet)
 import warnings
 
 from haiku._src import data_structures
@@ -50,6 +50,9 @@ param_creator_stack: ThreadLocalStack["Creator"] = ThreadLocalStack()
 state_creator_stack: ThreadLocalStack["Creator"] = ThreadLocalStack()
 param_getter_stack: ThreadLocalStack["Getter"] = ThreadLocalStack()
 state_getter_stack: ThreadLocalStack["Getter"] = ThreadLocalStack()
+param_lookup_hook_stack: ThreadLocalStack["LookupHook"] = ThreadLocalStack()
+state_lookup_hook_stack: ThreadLocalStack["LookupHook"] = ThreadLocalStack()
+getter_hook_stack: ThreadLocalStack["GetterHook"] = ThreadLocalStack()
 
 
 class Frame(NamedTuple):
@@ -66,6 +69,9 @@ class Frame(NamedTuple):
   counter_stack: Stack[collections.Counter]
   used_names_stack: Stack[Set[str]]
 
+  # Lazily populated index of (bundle_name, name) -> value for frozen params.
+  params_index: Dict[Tuple[str, str], jnp.ndarray]
+
   @property
   def params_frozen(self):
     return self.freeze_params
@@ -80,7 +86,8 @@ class Frame(NamedTuple):
                   freeze_params=freeze_params,
                   module_stack=Stack(),
                   counter_stack=Stack(),
-                  used_names_stack=Stack())
+                  used_names_stack=Stack(),
+                  params_index={})
     frame.rng_stack.push(rng)
     frame.counter_stack.push(collections.Counter())
     frame.used_names_stack.push(set())
@@ -104,7 +111,18 @@ class Frame(NamedTuple):
                  freeze_params=self.freeze_params,
                  module_stack=module_stack,
                  counter_stack=counter_stack,
-                 used_names_stack=used_names_stack)
+                 used_names_stack=used_names_stack,
+                 params_index={})
+
+  def frozen_params_index(self) -> Mapping[Tuple[str, str], jnp.ndarray]:
+    """Returns a flat index of ``params``, only valid if params are frozen."""
+    index = self.params_index
+    if not index:
+      for bundle_name, bundle in self.params.items():
+        if isinstance(bundle, Mapping):
+          for name, value in bundle.items():
+            index[(bundle_name, name)] = value
+    return index
 
   @contextlib.contextmanager
   def module(self, module_state: ModuleState):
@@ -298,10 +316,33 @@ def get_parameter(
   assert_context("get_parameter")
   if init is None:
     raise ValueError("Initializer must be specified.")
+  if param_lookup_hook_stack:
+    with run_lookup_hooks(param_lookup_hook_stack, name, shape, dtype):
+      return get_parameter_internal(name, shape, dtype, init)
+  return get_parameter_internal(name, shape, dtype, init)
+
 
+def get_parameter_internal(
+    name: str,
+    shape: Sequence[int],
+    dtype: Any,
+    init: Initializer,
+) -> jnp.ndarray:
+  """See :func:`get_parameter`."""
   bundle_name = current_bundle_name()
   frame = current_frame()
 
+  if frame.params_frozen and not param_getter_stack:
+    # Fast path for apply without custom getters, we can return the value
+    # directly without creating a `GetterContext`.
+    param = frame.frozen_params_index().get((bundle_name, name))
+    if param is not None:
+      if param.shape != tuple(shape):
+        raise ValueError(
+            "{!r} with retrieved shape {!r} does not match shape={!r} dtype={!r}"
+            .format(bundle_name + "/" + name, param.shape, shape, dtype))
+      return param
+
   if frame.params_frozen and bundle_name not in frame.params:
     raise ValueError(
         "Unable to retrieve parameter {!r} for module {!r}. "
@@ -453,7 +494,11 @@ def run_getters(
 
   def next_getter(value):
     if stack_copy:
-      return stack_copy.popleft()(next_getter, value, context)
+      getter = stack_copy.popleft()
+      if getter_hook_stack:
+        with run_getter_hooks(getter, context):
+          return getter(next_getter, value, context)
+      return getter(next_getter, value, context)
     else:
       return value
 
@@ -505,6 +550,85 @@ def custom_getter(
   return stack
 
 
+LookupHook = Callable[[GetterContext], ContextManager[None]]
+
+
+def hook_lookups(
+    hook: LookupHook,
+    *,
+    params: bool = True,
+    state: bool = False,
+) -> contextlib.AbstractContextManager:
+  """Registers a hook to run around parameter and/or state lookups.
+
+  ``hook`` is called with the :class:`GetterContext` of the parameter (or
+  state) and returns a context manager which is entered for the duration of
+  the call to :func:`get_parameter` (or :func:`get_state`), including any
+  custom creators and getters.
+
+  Args:
+    hook: A lookup hook.
+    params: Whether the hook should run on :func:`get_parameter`.
+    state: Whether the hook should run on :func:`get_state`.
+
+  Returns:
+    Context manager under which the hook is active.
+  """
+  stack = contextlib.ExitStack()
+  if params:
+    stack.enter_context(param_lookup_hook_stack(hook))
+  if state:
+    stack.enter_context(state_lookup_hook_stack(hook))
+  return stack
+
+
+@contextlib.contextmanager
+def run_lookup_hooks(
+    stack: ThreadLocalStack[LookupHook],
+    name: str,
+    shape: Optional[Sequence[int]],
+    dtype: Any,
+):
+  """Enters all lookup hooks in ``stack`` (see :func:`hook_lookups`)."""
+  context = GetterContext(full_name=f"{current_bundle_name()}/{name}",
+                          module=current_module(),
+                          original_dtype=dtype,
+                          original_shape=shape)
+  with contextlib.ExitStack() as exit_stack:
+    for hook in stack:
+      exit_stack.enter_context(hook(context))
+    yield
+
+
+GetterHook = Callable[[Getter, GetterContext], ContextManager[None]]
+
+
+def hook_getters(hook: GetterHook) -> contextlib.AbstractContextManager:
+  """Registers a hook to run around each custom getter.
+
+  ``hook`` is called with each getter (see :func:`custom_getter`) and the
+  :class:`GetterContext` of the parameter (or state) it is run for, and returns
+  a context manager which is entered for the duration of the call to the
+  getter (including any getters it calls in turn).
+
+  Args:
+    hook: A getter hook.
+
+  Returns:
+    Context manager under which the hook is active.
+  """
+  return getter_hook_stack(hook)
+
+
+@contextlib.contextmanager
+def run_getter_hooks(getter: Getter, context: GetterContext):
+  """Enters all getter hooks (see :func:`hook_getters`)."""
+  with contextlib.ExitStack() as exit_stack:
+    for hook in getter_hook_stack:
+      exit_stack.enter_context(hook(getter, context))
+    yield
+
+
 def assert_is_prng_key(key: PRNGKey):
   """Asserts that the given input looks like a `jax.random.PRNGKey`."""
   # TODO(lenamartens): When `jax.config.enable_custom_prng` has been defaulted
@@ -732,6 +856,19 @@ def get_state(
     A jnp.ndarray with the state of the given shape.
   """
   assert_context("get_state")
+  if state_lookup_hook_stack:
+    with run_lookup_hooks(state_lookup_hook_stack, name, shape, dtype):
+      return get_state_internal(name, shape, dtype, init)
+  return get_state_internal(name, shape, dtype, init)
+
+
+def get_state_internal(
+    name: str,
+    shape: Optional[Sequence[int]],
+    dtype: Any,
+    init: Optional[Initializer],
+) -> jnp.ndarray:
+  """See :func:`get_state`."""
   bundle_name = current_bundle_name()
   state = current_frame().state[bundle_name]
   fq_name = f"{bundle_name}/{name}"
@@ -14,6 +14,7 @@
 # ==============================================================================
 """Tests for haiku._src.base."""
 
+import contextlib
 import functools
 import itertools as it
 
@@ -73,6 +74,36 @@ class BaseTest(parameterized.TestCase):
         base.get_parameter("w", (1,), init=jnp.zeros)
         base.get_parameter("w", (2,), init=jnp.zeros)
 
+  def test_get_parameter_frozen(self):
+    w = jnp.ones([2])
+    with base.new_context(params={"~": {"w": w}}):
+      self.assertIs(base.get_parameter("w", [2], init=jnp.zeros), w)
+      with self.assertRaisesRegex(ValueError, "'~/w' .* does not match shape"):
+        base.get_parameter("w", [3], init=jnp.zeros)
+      with self.assertRaisesRegex(
+          ValueError, "parameters must be created as part of `init`"):
+        base.get_parameter("x", [2], init=jnp.zeros)
+
+  def test_get_parameter_frozen_index_built_once(self):
+    params = {"a": {"w": jnp.ones([])}, "~": {"w": jnp.zeros([])}}
+    with base.new_context(params=params):
+      base.get_parameter("w", [], init=jnp.zeros)
+      index = base.current_frame().params_index
+      self.assertEqual(set(index), {("a", "w"), ("~", "w")})
+      base.get_parameter("w", [], init=jnp.zeros)
+      self.assertIs(base.current_frame().params_index, index)
+
+  def test_get_parameter_frozen_runs_getters(self):
+    def getter(next_getter, value, context):
+      self.assertEqual(context.full_name, "~/w")
+      return next_getter(value + 1)
+
+    with base.new_context(params={"~": {"w": jnp.ones([])}}):
+      with base.custom_getter(getter):
+        w = base.get_parameter("w", [], init=jnp.zeros)
+      self.assertEqual(w, 2)
+      self.assertEqual(base.get_parameter("w", [], init=jnp.zeros), 1)
+
   @parameterized.parameters(base.next_rng_key, lambda: base.next_rng_keys(1))
   def test_rng_no_transform(self, f):
     with self.assertRaisesRegex(ValueError,
@@ -298,6 +329,86 @@ class BaseTest(parameterized.TestCase):
     if state:
       self.assertIn("~/state", log)
 
+  @parameterized.parameters(*it.permutations([True, False], 2))
+  def test_lookup_hook_types(self, params, state):
+    log = []
+
+    @contextlib.contextmanager
+    def logging_hook(context):
+      log.append(context.full_name)
+      yield
+
+    with base.new_context():
+      with base.hook_lookups(logging_hook, params=params, state=state):
+        base.get_parameter("params", [], init=jnp.zeros)
+        base.get_state("state", [], init=jnp.zeros)
+
+    self.assertLen(log, int(params) + int(state))
+    if params:
+      self.assertIn("~/params", log)
+    if state:
+      self.assertIn("~/state", log)
+
+  @parameterized.parameters((base.get_parameter, base.custom_creator),
+                            (base.get_state, custom_state_creator))
+  def test_lookup_hook_wraps_creators(self, get_x, custom_x):
+    log = []
+
+    @contextlib.contextmanager
+    def logging_hook(context):
+      log.append(("enter", context.full_name, context.original_shape))
+      yield
+      log.append(("exit", context.full_name, context.original_shape))
+
+    def logging_creator(next_creator, shape, dtype, init, context):
+      log.append(("create", context.full_name, shape))
+      return next_creator(shape, dtype, init)
+
+    with base.new_context():
+      with base.hook_lookups(logging_hook, params=True, state=True), \
+           custom_x(logging_creator):
+        get_x("w", [2], init=jnp.zeros)
+      self.assertEmpty(base.param_lookup_hook_stack)
+      self.assertEmpty(base.state_lookup_hook_stack)
+
+    self.assertEqual(log, [("enter", "~/w", [2]),
+                           ("create", "~/w", [2]),
+                           ("exit", "~/w", [2])])
+
+  @parameterized.parameters((base.get_parameter, base.custom_getter),
+                            (base.get_state, custom_state_getter))
+  def test_getter_hook(self, get_x, custom_x):
+    log = []
+
+    @contextlib.contextmanager
+    def logging_hook(getter, context):
+      log.append(("enter", getter.__name__, context.full_name))
+      yield
+      log.append(("exit", getter.__name__, context.full_name))
+
+    def outer_getter(next_getter, value, context):
+      del context
+      log.append("outer_getter")
+      return next_getter(value)
+
+    def inner_getter(next_getter, value, context):
+      del context
+      log.append("inner_getter")
+      return next_getter(value)
+
+    with base.new_context():
+      with base.hook_getters(logging_hook), \
+           custom_x(outer_getter), custom_x(inner_getter):
+        get_x("w", [], init=jnp.zeros)
+      self.assertEmpty(base.getter_hook_stack)
+
+    self.assertEqual(log, [("enter", "outer_getter", "~/w"),
+                           "outer_getter",
+                           ("enter", "inner_getter", "~/w"),
+                           "inner_getter",
+                           ("exit", "inner_getter", "~/w"),
+                           ("exit", "outer_getter", "~/w")])
+
   @parameterized.parameters(base.custom_creator, custom_state_creator)
   def test_creator_requires_context(self, custom_x):
     def my_creator(next_creator, shape, dtype, init, context):
@@ -21,14 +21,17 @@
 
 import collections
 import contextlib
+import functools
 import os
 import pprint
 import threading
 from typing import (Any, Callable, Dict, Generic, Mapping, NamedTuple, Optional,
-                    Sequence, TypeVar, Union)
+                    Sequence, Tuple, TypeVar, Union)
 
 from haiku._src import utils
 import jax
+import jax.numpy as jnp
+import numpy as np
 
 K = TypeVar("K")
 V = TypeVar("V")
@@ -138,6 +141,26 @@ def to_haiku_dict(structure: Mapping[K, V]) -> Mapping[K, V]:
   return to_dict(structure)
 
 
+# Whether values of a given type are pytree leaves other than mappings (e.g.
+# arrays) and so have no structure to copy.
+_LEAF_TYPES: Dict[type, bool] = {}
+
+
+def _is_leaf_type(value: Any) -> bool:
+  """Returns True if values of this type are non-mapping pytree leaves."""
+  value_type = type(value)
+  is_leaf = _LEAF_TYPES.get(value_type)
+  if is_leaf is None:
+    # NOTE: Whether a value is a leaf is a property of its type (the type is
+    # either registered as a pytree node or not), other than for `None` which
+    # is a node with no children.
+    treedef = jax.tree_structure(value)
+    is_leaf = (treedef.num_nodes == 1 and treedef.num_leaves == 1 and
+               not isinstance(value, Mapping))
+    _LEAF_TYPES[value_type] = is_leaf
+  return is_leaf
+
+
 def _copy_structure(tree):
   """Returns a copy of the given structure."""
   leaves, treedef = jax.tree_flatten(tree)
@@ -145,7 +168,13 @@ def _copy_structure(tree):
 
 
 def _to_dict_recurse(value: Any):
-  if isinstance(value, Mapping):
+  value_type = type(value)
+  if value_type is dict or value_type is FlatMap:
+    return {k: _to_dict_recurse(v) for k, v in value.items()}
+  elif _is_leaf_type(value):
+    # There is no structure to copy (e.g. `value` is an array).
+    return value
+  elif isinstance(value, Mapping):
     return {k: _to_dict_recurse(v) for k, v in value.items()}
   else:
     return _copy_structure(value)
@@ -178,16 +207,53 @@ class FlatComponents(NamedTuple):
   structure: PyTreeDef
 
 
+class FlatMapIndex(NamedTuple):
+  """Location of each value in the leaves of a FlatMap.
+
+  Attributes:
+    keys: Keys of the mapping in iteration order.
+    slots: For each key a tuple of ``(start, stop, structure)`` where the value
+      is made from ``leaves[start:stop]`` and ``structure`` is ``None`` if the
+      value is a single leaf.
+  """
+  keys: Sequence[Any]
+  slots: Mapping[Any, Tuple[int, int, Optional[PyTreeDef]]]
+
+
+@functools.lru_cache(maxsize=1024)
+def _flat_map_index(structure: PyTreeDef) -> FlatMapIndex:
+  """Returns the index for a FlatMap with the given structure."""
+  # NOTE: `structure` is always that of a dict, whose keys are iterated in the
+  # same (sorted) order as they are flattened. Placeholder leaves must not be
+  # pytree nodes (e.g. `None`) since nested FlatMaps would reflatten them.
+  leaf = object()
+  mapping = jax.tree_unflatten(structure, [leaf] * structure.num_leaves)
+  slots = {}
+  start = 0
+  for key, value in mapping.items():
+    value_structure = jax.tree_structure(value)
+    stop = start + value_structure.num_leaves
+    if value_structure.num_nodes == 1 and value_structure.num_leaves == 1:
+      value_structure = None
+    slots[key] = (start, stop, value_structure)
+    start = stop
+  return FlatMapIndex(tuple(mapping), slots)
+
+
 class FlatMap(Mapping[K, V]):
   """Immutable mapping with O(1) flatten and O(n) unflatten operation.
 
   Warning: this type is only efficient when used with ``jax.tree_*``. When used
   with ``tree.*`` it has similar performance to ``dict``.
 
+  Lookups use an index of the leaves cached per structure, so values can be
+  read from a ``FlatMap`` created by ``jax.tree_unflatten`` (e.g. the output of
+  ``jax.tree_map``) without unflattening the whole mapping.
+
   Note that to prevent common errors immutable shims are returned for any
   nested mappings.
   """
-  __slots__ = ("_structure", "_leaves", "_mapping")
+  __slots__ = ("_structure", "_leaves", "_mapping", "_index")
 
   def __init__(self, *args, **kwargs):
     """Accepts FlatComponents or the same arguments as `dict`."""
@@ -208,26 +274,36 @@ class FlatMap(Mapping[K, V]):
     self._structure = structure
     self._leaves = tuple(leaves)
     self._mapping = mapping
+    self._index = None
 
   def _to_mapping(self) -> Mapping[K, V]:
     if self._mapping is None:
       self._mapping = jax.tree_unflatten(self._structure, self._leaves)
     return self._mapping
 
+  def _to_index(self) -> FlatMapIndex:
+    # NOTE: Hashing the structure to look up the index is O(n) so we only do
+    # this once per instance.
+    if self._index is None:
+      self._index = _flat_map_index(self._structure)
+    return self._index
+
   def keys(self):
-    return KeysOnlyKeysView(self._to_mapping())
+    return KeysOnlyKeysView(self)
 
   def values(self):
-    return self._to_mapping().values()
+    return collections.abc.ValuesView(self)
 
   def items(self):
-    return self._to_mapping().items()
+    return collections.abc.ItemsView(self)
 
   def __eq__(self, other):
     if other is None:
       return False
     t = type(other)
     if t is FlatMap:
+      if self._structure == other._structure:
+        return self._leaves == other._leaves
       other = other._to_mapping()
     return self._to_mapping() == other
 
@@ -235,17 +311,26 @@ class FlatMap(Mapping[K, V]):
     return hash((self._structure, self._leaves))
 
   def __getitem__(self, key: K) -> V:
-    return self._to_mapping()[key]
+    if self._mapping is not None:
+      return self._mapping[key]
+    start, stop, structure = self._to_index().slots[key]
+    if structure is None:
+      return self._leaves[start]
+    return jax.tree_unflatten(structure, self._leaves[start:stop])
 
   def __getattr__(self, key):
     raise AttributeError(
         f"`x.{key}` is not supported on FlatMapping, use `x['{key}']` instead.")
 
   def __iter__(self):
-    return iter(self.keys())
+    if self._mapping is not None:
+      return iter(self._mapping)
+    return iter(self._to_index().keys)
 
   def __len__(self):
-    return len(self._to_mapping())
+    if self._mapping is not None:
+      return len(self._mapping)
+    return len(self._to_index().keys)
 
   def __str__(self):
     single_line = "{}({{{}}})".format(
@@ -295,6 +380,170 @@ class FlatMapping(FlatMap, metaclass=FlatMappingMeta):
     del args, kwargs
     assert False, "This should never happen."
 
+
+class FlatParamsEntry(NamedTuple):
+  """Location of a single parameter inside the buffers of a FlatParams."""
+  buffer: int
+  offset: int
+  shape: Tuple[int, ...]
+
+
+# Module name to a tuple of (parameter name, entry) pairs.
+FlatParamsIndex = Tuple[Tuple[str, Tuple[Tuple[str, FlatParamsEntry], ...]],
+                        ...]
+
+
+def _view(buffer, entry: FlatParamsEntry):
+  size = int(np.prod(entry.shape, dtype=np.int64))
+  return buffer[entry.offset:entry.offset + size].reshape(entry.shape)
+
+
+class _FlatParamsModule(Mapping[str, Any]):
+  """Read only view of the parameters of a single module in a FlatParams."""
+  __slots__ = ("_buffers", "_entries")
+
+  def __init__(self, buffers, entries: Mapping[str, FlatParamsEntry]):
+    self._buffers = buffers
+    self._entries = entries
+
+  def __getitem__(self, name: str):
+    entry = self._entries[name]
+    return _view(self._buffers[entry.buffer], entry)
+
+  def __iter__(self):
+    return iter(self._entries)
+
+  def __len__(self):
+    return len(self._entries)
+
+  def keys(self):
+    return KeysOnlyKeysView(self)
+
+  def __repr__(self):
+    return repr(dict(self.items()))
+
+
+class FlatParams(Mapping[str, Mapping[str, Any]]):
+  """Two level mapping storing all leaves of each dtype in one flat buffer.
+
+  >>> params = {"linear": {"w": jnp.ones([2, 3]), "b": jnp.zeros([3])}}
+  >>> flat = hk.data_structures.FlatParams(params)
+  >>> [b.shape for b in flat.buffers]
+  [(9,)]
+  >>> flat["linear"]["w"].shape
+  (2, 3)
+
+  ``FlatParams`` is a pytree whose leaves are the buffers (one per dtype), so
+  ``jax.device_put``, cross device reductions (e.g. ``jax.lax.pmean``) and
+  elementwise optimizer updates run once per dtype rather than once per
+  parameter. Parameters are returned as slices of the buffers: under ``jit``
+  XLA fuses these into their consumers. Only host NumPy buffers give zero-copy
+  views, slicing a device array outside of ``jit`` copies the parameter. Since
+  a ``FlatParams`` is a ``Mapping`` it can be passed directly to ``apply``.
+
+  Note that updates which are not elementwise (e.g. per parameter norms) see
+  the buffers rather than individual parameters.
+  """
+  __slots__ = ("_buffers", "_index", "_modules")
+
+  def __init__(self, params: Mapping[str, Mapping[str, Any]]):
+    """Packs the given two level mapping of arrays into flat buffers.
+
+    Args:
+      params: A two level mapping of arrays (e.g. the params returned by
+        ``init``).
+    """
+    dtypes = []
+    leaves = collections.defaultdict(list)
+    offsets = collections.defaultdict(int)
+    index = []
+    for module_name, module in params.items():
+      entries = []
+      for name, value in module.items():
+        dtype = np.dtype(value.dtype)
+        if dtype not in leaves:
+          dtypes.append(dtype)
+        buffer = dtypes.index(dtype)
+        entries.append(
+            (name, FlatParamsEntry(buffer, offsets[dtype], tuple(value.shape))))
+        offsets[dtype] += int(np.prod(value.shape, dtype=np.int64))
+        leaves[dtype].append(jnp.ravel(value))
+      index.append((module_name, tuple(entries)))
+
+    buffers = tuple(jnp.concatenate(leaves[dtype]) for dtype in dtypes)
+    self._init(tuple(index), buffers)
+
+  def _init(self, index: FlatParamsIndex, buffers: Tuple[Any, ...]):
+    self._index = index
+    self._buffers = buffers
+    self._modules = {module_name: dict(entries)
+                     for module_name, entries in index}
+
+  @classmethod
+  def from_buffers(
+      cls,
+      index: FlatParamsIndex,
+      buffers: Sequence[Any],
+  ) -> "FlatParams":
+    """Creates a ``FlatParams`` from the ``index`` and ``buffers`` of another.
+
+    Args:
+      index: The ``index`` of an existing ``FlatParams``.
+      buffers: One flat buffer per entry in ``buffers`` of the same
+        ``FlatParams``.
+
+    Returns:
+      A new ``FlatParams`` with the same structure using the given buffers.
+    """
+    out = object.__new__(cls)
+    out._init(index, tuple(buffers))  # pylint: disable=protected-access
+    return out
+
+  @property
+  def buffers(self) -> Tuple[Any, ...]:
+    """One flat buffer per dtype containing all parameters of that dtype."""
+    return self._buffers
+
+  @property
+  def index(self) -> FlatParamsIndex:
+    """The location of each parameter in :attr:`buffers`."""
+    return self._index
+
+  def __getitem__(self, module_name: str) -> Mapping[str, Any]:
+    return _FlatParamsModule(self._buffers, self._modules[module_name])
+
+  def __getattr__(self, key):
+    raise AttributeError(
+        f"`x.{key}` is not supported on FlatParams, use `x['{key}']` instead.")
+
+  def __iter__(self):
+    return iter(self._modules)
+
+  def __len__(self):
+    return len(self._modules)
+
+  def keys(self):
+    return KeysOnlyKeysView(self)
+
+  def __str__(self):
+    return "{}({{\n{},\n}})".format(
+        type(self).__name__,
+        utils.indent(2, ",\n".join(_repr_item(k, v) for k, v in self.items())))
+
+  __repr__ = __str__
+
+  def __reduce__(self):
+    return FlatParams.from_buffers, (self._index, self._buffers)
+
+  # Workaround for https://github.com/python/typing/issues/498.
+  __copy__ = None
+
+
+jax.tree_util.register_pytree_node(
+    FlatParams,
+    lambda s: (s.buffers, s.index),
+    FlatParams.from_buffers)
+
 #      _                               _           _
 #   __| | ___ _ __  _ __ ___  ___ __ _| |_ ___  __| |
 #  / _` |/ _ \ '_ \| '__/ _ \/ __/ _` | __/ _ \/ _` |
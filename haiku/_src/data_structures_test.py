@@ -26,10 +26,13 @@ import dill
 from haiku._src import data_structures
 from haiku._src import test_utils
 import jax
+import jax.numpy as jnp
+import numpy as np
 import tree
 
 frozendict = data_structures.frozendict
 FlatMap = data_structures.FlatMap
+FlatParams = data_structures.FlatParams
 all_picklers = parameterized.parameters(cloudpickle, dill, pickle)
 
 
@@ -198,6 +201,25 @@ class FlatMappingTest(parameterized.TestCase):
     self.assertEqual(type(p), FlatMap)
     self.assertEqual(p._to_mapping(), {"a": "v: 1", "b": {"c": "v: 2"}})
 
+  def test_lookup_after_unflatten(self):
+    f = data_structures.to_immutable_dict(
+        {"a": {"x": 1, "y": None, "z": [2, 3]}, "b": {}, "c": 4})
+    f = jax.tree_map(lambda x: x * 10, f)
+    self.assertEqual(list(f), ["a", "b", "c"])
+    self.assertLen(f, 3)
+    self.assertEqual(f["c"], 40)
+    self.assertEqual(type(f["a"]), FlatMap)
+    self.assertEqual(f["a"]["z"], [20, 30])
+    self.assertIsNone(f["a"]["y"])
+    self.assertEqual(f["b"], {})
+    self.assertIn("a", f)
+    self.assertNotIn("d", f)
+    self.assertEqual(dict(f.items())["c"], 40)
+    with self.assertRaises(KeyError):
+      f["d"]  # pylint: disable=pointless-statement
+    # The mapping is never unflattened.
+    self.assertIsNone(f._mapping)
+
   def test_eq_hash(self):
     a = FlatMap(dict(a=1, b=2))
     b = FlatMap(dict(a=1, b=2))
@@ -407,6 +429,80 @@ class FlatMappingTest(parameterized.TestCase):
             outerdef, innerdef, FlatMap({"a": [3, 4], "b": [5, 6]})))
 
 
+def _params():
+  return {
+      "linear": {"w": jnp.arange(6.).reshape([2, 3]), "b": jnp.ones([3])},
+      "embed": {"embeddings": jnp.zeros([4], jnp.int32),
+                "scale": jnp.asarray(2.)},
+      "empty": {},
+  }
+
+
+class FlatParamsTest(parameterized.TestCase):
+
+  def test_getitem(self):
+    params = _params()
+    flat = FlatParams(params)
+    self.assertEqual(list(flat), list(params))
+    for module_name, module in params.items():
+      self.assertEqual(list(flat[module_name]), list(module))
+      for name, value in module.items():
+        actual = flat[module_name][name]
+        self.assertEqual(actual.dtype, value.dtype)
+        np.testing.assert_array_equal(actual, value)
+
+  def test_getitem_missing(self):
+    flat = FlatParams(_params())
+    with self.assertRaises(KeyError):
+      flat["missing"]  # pylint: disable=pointless-statement
+    with self.assertRaises(KeyError):
+      flat["linear"]["missing"]  # pylint: disable=pointless-statement
+
+  def test_one_buffer_per_dtype(self):
+    flat = FlatParams(_params())
+    leaves = jax.tree_leaves(flat)
+    self.assertLen(leaves, 2)
+    self.assertEqual([l.shape for l in leaves], [(10,), (4,)])
+    self.assertEqual([l.dtype for l in leaves], [jnp.float32, jnp.int32])
+
+  def test_tree_map(self):
+    flat = FlatParams(_params())
+    out = jax.tree_map(lambda x: x + 1, flat)
+    self.assertIsInstance(out, FlatParams)
+    np.testing.assert_array_equal(out["linear"]["w"],
+                                  _params()["linear"]["w"] + 1)
+
+  def test_numpy_buffers_are_views(self):
+    flat = FlatParams(_params())
+    flat = jax.tree_map(np.array, flat)
+    self.assertTrue(
+        np.shares_memory(flat["linear"]["b"], flat.buffers[0]))
+
+  def test_to_dict(self):
+    params = _params()
+    out = data_structures.to_dict(FlatParams(params))
+    self.assertEqual(jax.tree_structure(out), jax.tree_structure(params))
+    jax.tree_multimap(np.testing.assert_array_equal, out, params)
+
+  def test_grad(self):
+    def loss(params):
+      return jnp.sum(params["linear"]["w"] ** 2) + params["embed"]["scale"]
+
+    grads = jax.jit(jax.grad(loss, allow_int=True))(FlatParams(_params()))
+    self.assertIsInstance(grads, FlatParams)
+    np.testing.assert_array_equal(grads["linear"]["w"],
+                                  2 * _params()["linear"]["w"])
+    np.testing.assert_array_equal(grads["linear"]["b"], jnp.zeros([3]))
+    self.assertEqual(grads["embed"]["scale"], 1.)
+
+  @all_picklers
+  def test_pickle_roundtrip(self, pickler):
+    flat = FlatParams(_params())
+    out = pickler.loads(pickler.dumps(flat))
+    self.assertEqual(out.index, flat.index)
+    jax.tree_multimap(np.testing.assert_array_equal, out, flat)
+
+
 class DataStructuresTest(parameterized.TestCase):
 
   @parameterized.parameters(dict, frozendict, FlatMap,
@@ -431,6 +527,34 @@ class DataStructuresTest(parameterized.TestCase):
     v.append(4)
     self.assertNotEqual(mapping_in, mapping_out)
 
+  def test_to_dict_shares_leaves(self):
+    w = jnp.ones([2])
+    mapping_in = {"m": {"w": w, "n": None}}
+    mapping_out = data_structures.to_dict(mapping_in)
+    self.assertEqual(mapping_out, {"m": {"w": w, "n": None}})
+    self.assertIs(mapping_out["m"]["w"], w)
+
+  def test_to_dict_unregistered_mapping(self):
+    class MyMapping(collections.abc.Mapping):
+
+      def __init__(self, d):
+        self._d = d
+
+      def __getitem__(self, key):
+        return self._d[key]
+
+      def __iter__(self):
+        return iter(self._d)
+
+      def __len__(self):
+        return len(self._d)
+
+    mapping_in = MyMapping({"m": MyMapping({"w": 1})})
+    for _ in range(2):
+      mapping_out = data_structures.to_dict(mapping_in)
+      self.assertEqual(mapping_out, {"m": {"w": 1}})
+      self.assertIs(type(mapping_out["m"]), dict)
+
   def test_to_dict_recursively_changes_leaf_types(self):
     mapping_in = {"m": {"w": FlatMap(a=FlatMap(b=0))}}
     mapping_out = data_structures.to_dict(mapping_in)
@@ -15,9 +15,15 @@
 """Functions for filtering parameters and state in Haiku."""
 
 import collections
-from typing import Any, Callable, Generator, Mapping, Tuple, TypeVar
+import fnmatch
+import operator
+import re
+from typing import (Any, Callable, Dict, FrozenSet, Generator, List, Mapping,
+                    NamedTuple, Optional, Pattern, Sequence, Tuple, TypeVar)
 
 from haiku._src import data_structures
+from haiku._src import utils
+import jax
 import jax.numpy as jnp
 
 T = TypeVar("T")
@@ -215,6 +221,309 @@ def merge(
   return data_structures.to_haiku_dict(out)
 
 
+def _take(leaves: Sequence[Any], indices: Sequence[int]) -> Sequence[Any]:
+  """Returns ``[leaves[i] for i in indices]``."""
+  if not indices:
+    return ()
+  elif len(indices) == 1:
+    return (leaves[indices[0]],)
+  else:
+    return operator.itemgetter(*indices)(leaves)
+
+
+# Maximum number of structures a `Partitioner` or `Selector` caches plans or
+# matches for, the least recently used entry is evicted first.
+_MAX_CACHE_SIZE = 1024
+
+
+class _SplitPlan(NamedTuple):
+  """How to split the leaves of a given structure.
+
+  Attributes:
+    indices: For each output the indices of its leaves in the input.
+    structures: For each output its tree structure.
+  """
+  indices: Tuple[Tuple[int, ...], ...]
+  structures: Tuple[Any, ...]
+
+
+class _MergePlan(NamedTuple):
+  """How to merge the leaves of given structures.
+
+  Attributes:
+    structure: Tree structure of the output.
+    indices: For each leaf in the output its index in the concatenated leaves
+      of all inputs.
+  """
+  structure: Any
+  indices: Tuple[int, ...]
+
+
+class Partitioner:
+  """Partitions structures with a given predicate, caching the partition.
+
+  :func:`partition` calls the predicate for every parameter each time it is
+  called. ``Partitioner`` instead calls it once for each structure (e.g. the
+  first time it is used to split params or gradients of a given model) and
+  caches which leaves belong in each output, such that :meth:`split` and
+  :meth:`merge` only need to rearrange leaves:
+
+  >>> trainable = hk.data_structures.Partitioner(
+  ...     lambda module_name, name, value: module_name.startswith('head'))
+  >>> params = {'head': {'w': 1, 'b': 2}, 'backbone': {'w': 3}}
+  >>> head, backbone = trainable.split(params)
+  >>> head
+  {'head': {'b': 2, 'w': 1}}
+  >>> backbone
+  {'backbone': {'w': 3}}
+  >>> trainable.merge(head, backbone)
+  {'backbone': {'w': 3}, 'head': {'b': 2, 'w': 1}}
+
+  Since the partition is cached the predicate should only depend on the module
+  name and name (and not on the values, which may be tracers inside
+  ``jax.jit``). Partitions are cached for the 1024 most recently used
+  structures.
+  """
+
+  def __init__(self, predicate: Callable[[str, str, Any], bool]):
+    """Constructs a partitioner.
+
+    Args:
+      predicate: criterion to be used to partition the input data, as in
+        :func:`partition`.
+    """
+    self._predicate = predicate
+    self._split_plans = collections.OrderedDict()
+    self._merge_plans = collections.OrderedDict()
+
+  def _split_plan(self, structure, treedef) -> _SplitPlan:
+    """Partitions the given structure, returning a plan for its treedef."""
+    # Each leaf is replaced with its index and partitioned using the predicate
+    # applied to the original values.
+    positions = jax.tree_unflatten(treedef, range(treedef.num_leaves))
+    outputs = partition(
+        lambda m, n, _: self._predicate(m, n, structure[m][n]), positions)
+    return _SplitPlan(indices=tuple(tuple(jax.tree_leaves(o)) for o in outputs),
+                      structures=tuple(jax.tree_structure(o) for o in outputs))
+
+  def _merge_plan(self, treedefs) -> _MergePlan:
+    """Merges structures with the given treedefs, returning a plan."""
+    # Each leaf is replaced with its index in the concatenated leaves of all
+    # inputs, so the plan only depends on `treedefs`.
+    positions, offset = [], 0
+    for treedef in treedefs:
+      positions.append(jax.tree_unflatten(
+          treedef, range(offset, offset + treedef.num_leaves)))
+      offset += treedef.num_leaves
+    indices, structure = jax.tree_flatten(merge(*positions))
+    return _MergePlan(structure=structure, indices=tuple(indices))
+
+  def split(
+      self,
+      structure: Mapping[str, Mapping[str, T]],
+  ) -> Tuple[Mapping[str, Mapping[str, T]], Mapping[str, Mapping[str, T]]]:
+    """Partitions the input structure in two, as in :func:`partition`.
+
+    Args:
+      structure: Haiku params or state data structure to be partitioned.
+
+    Returns:
+      A tuple containing the entries of the input matching the predicate and
+      the rest.
+    """
+    leaves, treedef = jax.tree_flatten(structure)
+    plan = utils.lru_lookup(self._split_plans, treedef,
+                            lambda: self._split_plan(structure, treedef),
+                            _MAX_CACHE_SIZE)
+    return tuple(jax.tree_unflatten(s, _take(leaves, i))
+                 for s, i in zip(plan.structures, plan.indices))
+
+  def merge(
+      self,
+      *structures: Mapping[str, Mapping[str, T]],
+  ) -> Mapping[str, Mapping[str, T]]:
+    """Merges structures, as in :func:`merge`.
+
+    The result only depends on the inputs (not on the structure they were
+    split from), so as in :func:`merge` modules without any entries are not
+    restored. How to merge is cached for each combination of input structures.
+
+    Args:
+      *structures: The (possibly transformed, e.g. updated params) outputs of
+        :meth:`split`.
+
+    Returns:
+      A single structure with an entry for each path in the input structures.
+    """
+    leaves, treedefs = [], []
+    for structure in structures:
+      structure_leaves, treedef = jax.tree_flatten(structure)
+      leaves.extend(structure_leaves)
+      treedefs.append(treedef)
+    treedefs = tuple(treedefs)
+    plan = utils.lru_lookup(self._merge_plans, treedefs,
+                            lambda: self._merge_plan(treedefs),
+                            _MAX_CACHE_SIZE)
+    return jax.tree_unflatten(plan.structure, _take(leaves, plan.indices))
+
+
+class _GlobNode:
+  """Node in a trie of glob patterns split into path components."""
+  __slots__ = ("children", "wildcards", "double_star", "loop", "accept")
+
+  def __init__(self, loop: bool = False):
+    self.children: Dict[str, "_GlobNode"] = {}
+    self.wildcards: List[Tuple[Pattern[str], "_GlobNode"]] = []
+    self.double_star: Optional["_GlobNode"] = None
+    # If True this node matches any number of components (it is a `**`).
+    self.loop = loop
+    self.accept = False
+
+  def insert(self, components: Sequence[str]):
+    node = self
+    for component in components:
+      if component == "**":
+        if node.double_star is None:
+          node.double_star = _GlobNode(loop=True)
+        node = node.double_star
+      elif not any(c in component for c in "*?["):
+        node = node.children.setdefault(component, _GlobNode())
+      else:
+        pattern = re.compile(fnmatch.translate(component))
+        for other, child in node.wildcards:
+          if other.pattern == pattern.pattern:
+            node = child
+            break
+        else:
+          child = _GlobNode()
+          node.wildcards.append((pattern, child))
+          node = child
+    node.accept = True
+
+
+def _closure(nodes) -> FrozenSet[_GlobNode]:
+  """Adds nodes reachable by matching ``**`` with no components."""
+  out = set()
+  todo = list(nodes)
+  while todo:
+    node = todo.pop()
+    if node not in out:
+      out.add(node)
+      if node.double_star is not None:
+        todo.append(node.double_star)
+  return frozenset(out)
+
+
+def _step(nodes: FrozenSet[_GlobNode], component: str) -> FrozenSet[_GlobNode]:
+  """Returns the nodes reached by matching ``component`` from ``nodes``."""
+  out = []
+  for node in nodes:
+    child = node.children.get(component)
+    if child is not None:
+      out.append(child)
+    for pattern, child in node.wildcards:
+      if pattern.match(component):
+        out.append(child)
+    if node.loop:
+      out.append(node)
+  return _closure(out)
+
+
+class Selector:
+  """Selects parameters or state by matching their ``module_name/name`` path.
+
+  Patterns are globs by default, where ``*`` matches any characters within a
+  path component (e.g. ``linear_*``), ``**`` matches any number of components
+  and ``?`` and ``[seq]`` are as in :mod:`fnmatch`:
+
+  >>> selector = hk.data_structures.Selector('mlp/~/linear_0/*', '**/b')
+  >>> selector('mlp/~/linear_0', 'w')
+  True
+  >>> selector('mlp/~/linear_1', 'w')
+  False
+  >>> selector('mlp/~/linear_1', 'b')
+  True
+
+  A ``Selector`` is a predicate, so it can be passed to :func:`filter`,
+  :func:`partition` and :class:`Partitioner`:
+
+  >>> params = {'mlp/~/linear_0': {'w': 1, 'b': 2},
+  ...           'mlp/~/linear_1': {'w': 3, 'b': 4}}
+  >>> hk.data_structures.filter(selector, params)
+  {'mlp/~/linear_0': {'b': 2, 'w': 1}, 'mlp/~/linear_1': {'b': 4}}
+
+  Or used in functions passed to :func:`map` and custom getters:
+
+  >>> hk.data_structures.map(
+  ...     lambda m, n, v: v * 10 if selector(m, n) else v, params)
+  {'mlp/~/linear_0': {'b': 20, 'w': 10}, 'mlp/~/linear_1': {'b': 40, 'w': 3}}
+  >>> def getter(next_getter, value, context):
+  ...   if selector(context.module_name, context.name):
+  ...     value = jax.lax.stop_gradient(value)
+  ...   return next_getter(value)
+
+  Glob patterns are compiled into a trie over path components, which is walked
+  once for each module (the result is cached) such that matching a parameter
+  only needs to match its name. With ``regex=True`` patterns are instead
+  regular expressions that must match the whole path, which are combined into
+  a single regular expression. In both cases results are cached for the 1024
+  most recently used modules and paths.
+  """
+
+  def __init__(self, *patterns: str, regex: bool = False):
+    """Constructs a selector.
+
+    Args:
+      *patterns: Glob (or regex) patterns over ``module_name/name`` paths. A
+        path is selected if it matches any pattern.
+      regex: If True, patterns are regular expressions rather than globs.
+    """
+    self.patterns = patterns
+    self._regex = None
+    self._root = None
+    if regex:
+      self._regex = re.compile("|".join(f"(?:{p})" for p in patterns))
+    else:
+      root = _GlobNode()
+      for pattern in patterns:
+        root.insert(pattern.split("/"))
+      self._root = _closure([root])
+    self._module_nodes = collections.OrderedDict()
+    self._cache = collections.OrderedDict()
+
+  def _walk(self, module_name: str) -> FrozenSet[_GlobNode]:
+    nodes = self._root
+    for component in module_name.split("/"):
+      if not nodes:
+        break
+      nodes = _step(nodes, component)
+    return nodes
+
+  def _match(self, module_name: str, name: str) -> bool:
+    if self._regex is not None:
+      return self._regex.fullmatch(f"{module_name}/{name}") is not None
+    nodes = utils.lru_lookup(self._module_nodes, module_name,
+                             lambda: self._walk(module_name), _MAX_CACHE_SIZE)
+    return any(node.accept for node in _step(nodes, name))
+
+  def matches(self, module_name: str, name: str) -> bool:
+    """Returns True if ``module_name/name`` matches any pattern."""
+    return utils.lru_lookup(self._cache, (module_name, name),
+                            lambda: self._match(module_name, name),
+                            _MAX_CACHE_SIZE)
+
+  def __call__(self, module_name: str, name: str, value: Any = None) -> bool:
+    """Returns True if ``module_name/name`` matches any pattern."""
+    del value
+    return self.matches(module_name, name)
+
+  def __repr__(self):
+    args = [repr(p) for p in self.patterns]
+    if self._regex is not None:
+      args.append("regex=True")
+    return f"Selector({', '.join(args)})"
+
+
 def is_subset(
     *,
     subset: Mapping[str, Mapping[str, Any]],
@@ -19,9 +19,11 @@ import itertools
 import re
 import types
 from typing import Any, Callable, Sequence, Set, Tuple
+from unittest import mock
 
 from absl.testing import absltest
 from absl.testing import parameterized
+from haiku._src import base
 from haiku._src import basic
 from haiku._src import data_structures
 from haiku._src import filtering
@@ -366,5 +368,191 @@ class FilteringTest(parameterized.TestCase):
           assert_type_recursive(part)
 
 
+class PartitionerTest(parameterized.TestCase):
+
+  def test_split_matches_partition(self):
+    params = transform.transform(get_net).init(
+        jax.random.PRNGKey(428), jnp.ones((1, 1)))
+    predicate = lambda module_name, name, _: name == "w"
+    partitioner = filtering.Partitioner(predicate)
+    expected = filtering.partition(predicate, params)
+    for _ in range(2):
+      actual = partitioner.split(params)
+      self.assertEqual(jax.tree_structure(actual),
+                       jax.tree_structure(expected))
+      jax.tree_multimap(self.assertIs, actual, expected)
+
+  def test_predicate_called_once(self):
+    calls = []
+    def predicate(module_name, name, value):
+      calls.append((module_name, name, value))
+      return name == "w"
+
+    partitioner = filtering.Partitioner(predicate)
+    params = {"a": {"w": 1, "b": 2}, "b": {"w": 3}}
+    for i in range(3):
+      params = jax.tree_map(lambda x, i=i: x + i, params)
+      partitioner.split(params)
+    self.assertLen(calls, 3)
+
+  def test_merge(self):
+    partitioner = filtering.Partitioner(lambda m, n, v: m == "b")
+    params = {"a": {"w": 1, "b": 2}, "b": {"w": 3}, "c": {}}
+    b, rest = partitioner.split(params)
+    self.assertEqual(b, {"b": {"w": 3}})
+    self.assertEqual(rest, {"a": {"w": 1, "b": 2}})
+    b, rest = jax.tree_map(lambda x: x * 10, (b, rest))
+    self.assertEqual(partitioner.merge(b, rest),
+                     {"a": {"w": 10, "b": 20}, "b": {"w": 30}})
+    self.assertEqual(partitioner.merge(b, rest), filtering.merge(b, rest))
+
+  def test_merge_same_outputs_different_inputs(self):
+    partitioner = filtering.Partitioner(lambda m, n, v: m == "b")
+    for params in ({"a": {"w": 1}, "b": {"w": 2}, "c": {}},
+                   {"a": {"w": 1}, "b": {"w": 2}},
+                   data_structures.to_immutable_dict(
+                       {"a": {"w": 1}, "b": {"w": 2}})):
+      b, rest = partitioner.split(params)
+      self.assertEqual(b, {"b": {"w": 2}})
+      self.assertEqual(rest, {"a": {"w": 1}})
+    out = partitioner.merge(b, rest)
+    self.assertEqual(out, {"a": {"w": 1}, "b": {"w": 2}})
+    self.assertEqual(jax.tree_structure(out),
+                     jax.tree_structure(filtering.merge(b, rest)))
+
+  def test_cache_is_bounded(self):
+    partitioner = filtering.Partitioner(lambda m, n, v: n == "w")
+    with mock.patch.object(filtering, "_MAX_CACHE_SIZE", 2):
+      for i in range(5):
+        params = {f"module_{i}": {"w": 1, "b": 2}}
+        self.assertEqual(partitioner.merge(*partitioner.split(params)),
+                         params)
+    # pylint: disable=protected-access
+    self.assertLen(partitioner._split_plans, 2)
+    self.assertLen(partitioner._merge_plans, 2)
+    # pylint: enable=protected-access
+
+  def test_merge_unknown_structures(self):
+    partitioner = filtering.Partitioner(lambda m, n, v: True)
+    self.assertEqual(partitioner.merge({"a": {"w": 1}}, {"a": {"b": 2}}),
+                     {"a": {"w": 1, "b": 2}})
+
+  def test_nested_values(self):
+    partitioner = filtering.Partitioner(lambda m, n, v: n == "a")
+    structure = {"layer": {"a": [1, 2, 3], "b": {"c": 4}, "d": None}}
+    a, rest = partitioner.split(structure)
+    self.assertEqual(a, {"layer": {"a": [1, 2, 3]}})
+    self.assertEqual(rest, {"layer": {"b": {"c": 4}, "d": None}})
+    self.assertEqual(partitioner.merge(a, rest), structure)
+
+  def test_jit(self):
+    params = transform.transform(get_net).init(
+        jax.random.PRNGKey(428), jnp.ones((1, 1)))
+    partitioner = filtering.Partitioner(
+        lambda module_name, *_: module_name == "first_layer")
+
+    @jax.jit
+    def f(params):
+      first, second = partitioner.split(params)
+      first = jax.tree_map(jnp.zeros_like, first)
+      return partitioner.merge(first, second)
+
+    out = f(params)
+    self.assertEqual(get_names(out), get_names(params))
+    self.assertEqual(out["first_layer"]["w"], 0)
+    self.assertEqual(out["second_layer"]["w"], params["second_layer"]["w"])
+
+
+class SelectorTest(parameterized.TestCase):
+
+  @parameterized.parameters(
+      ("mlp/~/linear_0/*", "mlp/~/linear_0", "w", True),
+      ("mlp/~/linear_0/*", "mlp/~/linear_1", "w", False),
+      ("mlp/*/w", "mlp/~/linear_0", "w", False),
+      ("*/~/linear_[01]/b", "mlp/~/linear_1", "b", True),
+      ("*/~/linear_[01]/b", "mlp/~/linear_2", "b", False),
+      ("linear_?/w", "linear_1", "w", True),
+      ("linear_?/w", "linear_10", "w", False),
+      ("**", "mlp/~/linear_0", "w", True),
+      ("**/b", "linear", "b", True),
+      ("**/b", "mlp/~/linear_0", "b", True),
+      ("**/b", "mlp/~/linear_0", "w", False),
+      ("mlp/**/w", "mlp", "w", True),
+      ("mlp/**/linear_0/w", "mlp/~/block/linear_0", "w", True),
+      ("mlp/**/linear_0/w", "mlp/~/block/linear_1", "w", False),
+      ("encoder/**", "decoder/~/linear", "w", False),
+  )
+  def test_glob(self, pattern, module_name, name, expected):
+    selector = filtering.Selector(pattern)
+    for _ in range(2):
+      self.assertEqual(selector(module_name, name, None), expected)
+      self.assertEqual(selector.matches(module_name, name), expected)
+
+  def test_multiple_patterns(self):
+    selector = filtering.Selector("encoder/**", "**/b", "decoder/*/w")
+    self.assertTrue(selector("encoder/~/linear", "w"))
+    self.assertTrue(selector("decoder/~/linear", "b"))
+    self.assertTrue(selector("decoder/linear", "w"))
+    self.assertFalse(selector("decoder/~/linear", "w"))
+
+  def test_regex(self):
+    selector = filtering.Selector(r"mlp/~/linear_\d+/w", "head/.*",
+                                  regex=True)
+    self.assertTrue(selector("mlp/~/linear_10", "w"))
+    self.assertTrue(selector("head/~/linear", "b"))
+    self.assertFalse(selector("mlp/~/linear_10", "b"))
+    # Patterns must match the whole path.
+    self.assertFalse(selector("big_mlp/~/linear_1", "w"))
+
+  def test_repr(self):
+    self.assertEqual(repr(filtering.Selector("a/*", "**/b")),
+                     "Selector('a/*', '**/b')")
+    self.assertEqual(repr(filtering.Selector("a/.*", regex=True)),
+                     "Selector('a/.*', regex=True)")
+
+  @parameterized.parameters(False, True)
+  def test_cache_is_bounded(self, regex):
+    selector = filtering.Selector(
+        r"linear_\d+/w" if regex else "linear_*/w", regex=regex)
+    with mock.patch.object(filtering, "_MAX_CACHE_SIZE", 2):
+      for i in range(5):
+        self.assertTrue(selector(f"linear_{i}", "w"))
+        self.assertFalse(selector(f"linear_{i}", "b"))
+    # pylint: disable=protected-access
+    self.assertLen(selector._cache, 2)
+    self.assertLessEqual(len(selector._module_nodes), 2)
+    # pylint: enable=protected-access
+
+  def test_with_filtering(self):
+    params = transform.transform(get_net).init(
+        jax.random.PRNGKey(428), jnp.ones((1, 1)))
+    selector = filtering.Selector("first_layer/*", "*/b")
+    self.assertEqual(
+        get_names(filtering.filter(selector, params)),
+        {"first_layer/w", "first_layer/b", "second_layer/b"})
+    selected, rest = filtering.Partitioner(selector).split(params)
+    self.assertEqual(get_names(selected),
+                     {"first_layer/w", "first_layer/b", "second_layer/b"})
+    self.assertEqual(get_names(rest), {"second_layer/w"})
+
+  def test_custom_getter(self):
+    selector = filtering.Selector("first_layer/*")
+
+    def zeros_getter(next_getter, value, context):
+      if selector(context.module_name, context.name):
+        value = jnp.zeros_like(value)
+      return next_getter(value)
+
+    def f(x):
+      with base.custom_getter(zeros_getter):
+        return get_net(x)
+
+    f = transform.transform(f)
+    x = jnp.ones((1, 1))
+    params = f.init(jax.random.PRNGKey(428), x)
+    # The first layer outputs zeros, so the output is the second layer bias.
+    self.assertEqual(f.apply(params, None, x), params["second_layer"]["b"])
+
+
 if __name__ == "__main__":
   absltest.main()
@@ -38,5 +38,13 @@ class SummariseTest(parameterized.TestCase):
     x = jnp.ones(shape, dtype)
     self.assertIsNotNone(hk.experimental.tabulate(f)(x))
 
+  @test_utils.combined_named_parameters(descriptors.ALL_MODULES)
+  def test_eval_summary_cost_analysis(self, module_fn: ModuleFn, shape, dtype):
+    f = lambda x: module_fn()(x)  # pylint: disable=unnecessary-lambda
+    x = jnp.ones(shape, dtype)
+    for invocation in hk.experimental.eval_summary(f, cost_analysis=True)(x):
+      self.assertGreaterEqual(invocation.cost.total_flops,
+                              invocation.cost.flops)
+
 if __name__ == '__main__':
   absltest.main()
@@ -275,7 +275,7 @@ def run_interceptors(  # pylint: disable=invalid-name
     **kwargs: Kwargs,
 ) -> Any:
   """Runs any method interceptors or the original method."""
-  if not interceptor_stack:
+  if not interceptor_stack and not interceptor_hook_stack:
     return bound_method(*args, **kwargs)
 
   ctx = MethodContext(module=self,
@@ -288,9 +288,11 @@ def run_interceptors(  # pylint: disable=invalid-name
       # NOTE: The `interceptor_fun` may call `next_fun` to trigger the next
       # interceptor (and so on) allowing interceptors to be run in turn.
       interceptor_fun = interceptor_stack_copy.popleft()
-      return interceptor_fun(next_fun, args, kwargs, ctx)
+      with _interceptor_call(interceptor_fun, ctx):
+        return interceptor_fun(next_fun, args, kwargs, ctx)
     else:
-      return bound_method(*args, **kwargs)
+      with _interceptor_call(None, ctx):
+        return bound_method(*args, **kwargs)
 
   return next_fun(*args, **kwargs)
 
@@ -704,3 +706,35 @@ def _module_method_call(module: Module, method_name: str):
     for method_hook in method_hook_stack:
       stack.enter_context(method_hook(module, method_name))
     yield
+
+InterceptorHook = Callable[[Optional[MethodGetter], MethodContext],
+                           ContextManager[None]]
+interceptor_hook_stack: ThreadLocalStack[InterceptorHook] = ThreadLocalStack()
+
+
+def hook_interceptors(hook: InterceptorHook) -> ContextManager[None]:
+  """Context manager that registers a hook run around each method interceptor.
+
+  The hook is called with each interceptor (or ``None`` for the underlying
+  method, which runs after all interceptors) and the :class:`MethodContext`,
+  and returns a context manager entered for the duration of that call.
+
+  Args:
+    hook: An interceptor hook.
+
+  Returns:
+    Context manager under which the hook is active.
+  """
+  return interceptor_hook_stack(hook)
+
+
+@contextlib.contextmanager
+def _interceptor_call(
+    interceptor: Optional[MethodGetter],
+    context: MethodContext,
+):
+  """Context manager that wraps an interceptor (or method) being called."""
+  with contextlib.ExitStack() as stack:
+    for hook in interceptor_hook_stack:
+      stack.enter_context(hook(interceptor, context))
+    yield
@@ -296,6 +296,37 @@ class ModuleTest(parameterized.TestCase):
                               ("exit", "__call__", "scalar_module"),
                               ("exit", "__call__", "captures_module")])
 
+  @test_utils.transform_and_run
+  def test_interceptor_hook(self):
+    events = []
+
+    @contextlib.contextmanager
+    def interceptor_hook(interceptor, context):
+      name = getattr(interceptor, "__name__", None)
+      events.append(("enter", name, context.method_name))
+      yield
+      events.append(("exit", name, context.method_name))
+
+    def my_interceptor(next_f, args, kwargs, context):
+      del context
+      events.append("my_interceptor")
+      return next_f(*args, **kwargs)
+
+    m = ScalarModule()
+    with module.hook_interceptors(interceptor_hook):
+      m()
+      self.assertEqual(events, [("enter", None, "__call__"),
+                                ("exit", None, "__call__")])
+
+      del events[:]
+      with module.intercept_methods(my_interceptor):
+        m()
+    self.assertEqual(events, [("enter", "my_interceptor", "__call__"),
+                              "my_interceptor",
+                              ("enter", None, "__call__"),
+                              ("exit", None, "__call__"),
+                              ("exit", "my_interceptor", "__call__")])
+
   @test_utils.transform_and_run
   def test_callback_runs_after_submodules_updated(self):
     params = []
@@ -0,0 +1,331 @@
+# Copyright 2021 DeepMind Technologies Limited. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Profiles the Python overhead of tracing Haiku functions."""
+
+import collections
+import contextlib
+import dataclasses
+import json
+import time
+import types
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+from haiku._src import base
+from haiku._src import module as module_lib
+from haiku._src import transform
+import jax
+import tabulate as tabulate_lib
+
+# If you are forking replace this block with `import haiku as hk`.
+hk = types.ModuleType("haiku")
+hk.custom_creator = base.custom_creator
+hk.GetterContext = base.GetterContext
+hk.hook_getters = base.hook_getters
+hk.hook_interceptors = module_lib.hook_interceptors
+hk.hook_lookups = base.hook_lookups
+hk.hook_methods = module_lib.hook_methods
+hk.MethodContext = module_lib.MethodContext
+hk.transform_with_state = transform.transform_with_state
+hk.Transformed = transform.Transformed
+hk.TransformedWithState = transform.TransformedWithState
+
+# Categories of events recorded by the profiler.
+TRANSFORM = "transform"
+MODULE = "module"
+METHOD = "method"
+INTERCEPTOR = "interceptor"
+GET_PARAMETER = "get_parameter"
+GET_STATE = "get_state"
+CREATOR = "creator"
+GETTER = "getter"
+INITIALIZER = "initializer"
+
+
+@dataclasses.dataclass(frozen=True)
+class TraceEvent:
+  """Wall clock time spent in some part of a Haiku function while tracing.
+
+  Attributes:
+    name: The name of the event (e.g. ``mlp/~/linear_0.__call__``).
+    category: The kind of event (e.g. ``method`` or ``get_parameter``).
+    start: Start time in seconds relative to the start of the profile.
+    duration: Total time in seconds spent in this event.
+    self_duration: Time in seconds spent in this event excluding any nested
+      events.
+    depth: The number of events enclosing this one.
+  """
+  name: str
+  category: str
+  start: float
+  duration: float
+  self_duration: float
+  depth: int
+
+
+@dataclasses.dataclass
+class OpenEvent:
+  name: Optional[str]
+  category: str
+  start: float
+  child_duration: float = 0.
+
+
+def callable_name(f) -> str:
+  f = getattr(f, "func", f)  # Unwrap functools.partial.
+  return getattr(f, "__qualname__", None) or type(f).__qualname__
+
+
+class Recorder:
+  """Records nested trace events."""
+
+  def __init__(self):
+    self.t0 = time.perf_counter()
+    self.events: List[TraceEvent] = []
+    self.open: List[OpenEvent] = []
+
+  @contextlib.contextmanager
+  def event(self, category: str, name: Optional[str] = None):
+    """Records an event, ``name`` may be set on the yielded value."""
+    event = OpenEvent(name, category, time.perf_counter())
+    self.open.append(event)
+    try:
+      yield event
+    finally:
+      end = time.perf_counter()
+      assert self.open.pop() is event
+      duration = end - event.start
+      if self.open:
+        self.open[-1].child_duration += duration
+      self.events.append(TraceEvent(
+          name=event.name or "<unknown>",
+          category=category,
+          start=event.start - self.t0,
+          duration=duration,
+          self_duration=duration - event.child_duration,
+          depth=len(self.open)))
+
+  def wrap(
+      self,
+      category: str,
+      f: Callable[..., Any],
+      name: Optional[str] = None,
+  ):
+    name = name or callable_name(f)
+    def wrapper(*args, **kwargs):
+      with self.event(category, name):
+        return f(*args, **kwargs)
+    return wrapper
+
+
+def method_event_name(module, method_name: str) -> str:
+  # NOTE: For `__init__` the name is only available after it has run.
+  module_name = getattr(module, "module_name", None)
+  if module_name is None:
+    module_name = type(module).__qualname__
+  return f"{module_name}.{method_name}"
+
+
+class TraceProfile:
+  """The result of profiling a Haiku function with :func:`trace_profile`."""
+
+  def __init__(self, events: Sequence[TraceEvent]):
+    self.events = tuple(sorted(events, key=lambda e: e.start))
+
+  def total_time(self) -> float:
+    """Returns the total time spent in top level events."""
+    return sum(e.duration for e in self.events if e.depth == 0)
+
+  def summary(self) -> List[Dict[str, Any]]:
+    """Aggregates events by category and name, sorted by self time (desc)."""
+    rows = collections.OrderedDict()
+    for event in self.events:
+      key = (event.category, event.name)
+      row = rows.get(key)
+      if row is None:
+        row = rows[key] = {"category": event.category, "name": event.name,
+                           "count": 0, "total_time": 0., "self_time": 0.}
+      row["count"] += 1
+      row["self_time"] += event.self_duration
+      row["total_time"] += event.duration
+    return sorted(rows.values(), key=lambda r: (-r["self_time"], r["name"]))
+
+  def table(
+      self,
+      *,
+      categories: Optional[Sequence[str]] = None,
+      max_rows: Optional[int] = None,
+      tabulate_kwargs={"tablefmt": "grid"},
+  ) -> str:
+    """Returns a table of time spent per event sorted by self time."""
+    rows = self.summary()
+    if categories is not None:
+      rows = [r for r in rows if r["category"] in categories]
+    if max_rows is not None:
+      rows = rows[:max_rows]
+    return tabulate_lib.tabulate(
+        [[r["category"], r["name"], r["count"],
+          "{:.3f}".format(r["self_time"] * 1e3),
+          "{:.3f}".format(r["total_time"] * 1e3)] for r in rows],
+        headers=["Category", "Name", "Count", "Self (ms)", "Total (ms)"],
+        colalign=["left", "left", "right", "right", "right"],
+        **tabulate_kwargs)
+
+  def chrome_trace(self) -> Dict[str, Any]:
+    """Returns the events in Chrome trace event format.
+
+    The result can be saved as JSON (see :meth:`save_chrome_trace`) and loaded
+    in ``chrome://tracing`` or https://ui.perfetto.dev.
+    """
+    return {
+        "traceEvents": [
+            {"name": e.name, "cat": e.category, "ph": "X", "pid": 0, "tid": 0,
+             "ts": e.start * 1e6, "dur": e.duration * 1e6}
+            for e in self.events],
+        "displayTimeUnit": "ms",
+    }
+
+  def save_chrome_trace(self, path: str):
+    """Writes :meth:`chrome_trace` as JSON to the given path."""
+    with open(path, "w") as f:
+      json.dump(self.chrome_trace(), f)
+
+  def __str__(self):
+    return self.table()
+
+
+@contextlib.contextmanager
+def instrument_haiku(recorder: Recorder):
+  """Registers hooks and a creator which record trace events."""
+
+  @contextlib.contextmanager
+  def method_hook(module, method_name):
+    with recorder.event(MODULE) as event:
+      try:
+        yield
+      finally:
+        event.name = method_event_name(module, method_name)
+
+  @contextlib.contextmanager
+  def interceptor_hook(interceptor, context: hk.MethodContext):
+    if interceptor is not None:
+      with recorder.event(INTERCEPTOR, callable_name(interceptor)):
+        yield
+      return
+
+    with recorder.event(METHOD) as event:
+      try:
+        yield
+      finally:
+        event.name = method_event_name(context.module, context.method_name)
+
+  def getter_hook(getter, context: hk.GetterContext):
+    del context
+    return recorder.event(GETTER, callable_name(getter))
+
+  def creator(next_creator, shape, dtype, init, context: hk.GetterContext):
+    init = recorder.wrap(INITIALIZER, init, name=context.full_name)
+    with recorder.event(CREATOR, context.full_name):
+      return next_creator(shape, dtype, init)
+
+  def lookup_hook(category):
+    return lambda context: recorder.event(category, context.full_name)
+
+  with contextlib.ExitStack() as stack:
+    stack.enter_context(hk.hook_methods(method_hook))
+    stack.enter_context(hk.hook_interceptors(interceptor_hook))
+    stack.enter_context(hk.hook_getters(getter_hook))
+    stack.enter_context(hk.custom_creator(creator, state=True))
+    stack.enter_context(hk.hook_lookups(lookup_hook(GET_PARAMETER)))
+    stack.enter_context(hk.hook_lookups(lookup_hook(GET_STATE),
+                                        params=False, state=True))
+    yield
+
+
+def trace_profile(
+    f: Union[Callable[..., Any], hk.Transformed, hk.TransformedWithState],
+) -> Callable[..., TraceProfile]:
+  """Profiles the Python overhead of tracing ``f``.
+
+  ``f`` is traced (using :func:`jax.eval_shape`, so no computation is run) with
+  ``init`` and then ``apply``. Wall clock time is attributed to each module
+  method, method interceptor, :func:`~haiku.get_parameter` and
+  :func:`~haiku.get_state` call, custom getter, parameter/state creation and
+  initializer:
+
+  >>> f = lambda x: hk.nets.MLP([300, 100, 10])(x)
+  >>> profile = hk.experimental.trace_profile(f)(jnp.ones([8, 28 * 28]))
+  >>> print(profile.table(max_rows=2))  # doctest: +SKIP
+  +-------------+------------------+---------+-------------+--------------+
+  | Category    | Name             |   Count |   Self (ms) |   Total (ms) |
+  +=============+==================+=========+=============+==============+
+  | initializer | mlp/~/linear_0/w |       1 |      19.392 |       19.392 |
+  +-------------+------------------+---------+-------------+--------------+
+  | method      | mlp.__call__     |       2 |       7.358 |       77.658 |
+  +-------------+------------------+---------+-------------+--------------+
+  >>> profile.save_chrome_trace("/tmp/trace.json")  # doctest: +SKIP
+
+  Each event records the total time spent inside it and its "self" time, which
+  excludes time spent in nested events (e.g. the self time of a module method
+  excludes time spent in submodules or ``get_parameter``). Events in the
+  ``method`` category measure the body of module methods, events in the
+  ``module`` category measure the overhead Haiku adds around each method call
+  (e.g. name scoping and running interceptors). Time spent in custom creators
+  is part of the ``creator`` event for the parameter. Events are also
+  available in Chrome trace format via :meth:`TraceProfile.chrome_trace`.
+
+  The profiler is installed using hooks and a custom creator, which are only
+  active in the current thread while tracing ``f``. It does not install a
+  custom getter, so parameter lookups in ``apply`` take the same path as
+  without profiling. Note that profiling adds some overhead to each
+  instrumented call.
+
+  Args:
+    f: A function to transform OR one of the init/apply functions from Haiku
+      or the result of :func:`~haiku.transform` or
+      :func:`~haiku.transform_with_state`.
+
+  Returns:
+    A callable taking the same arguments as ``f`` but returning a
+    :class:`TraceProfile`.
+  """
+  try:
+    f = transform.get_original_fn(f)
+  except AttributeError:
+    pass
+
+  f_orig = f
+
+  def wrapper(*args, **kwargs) -> TraceProfile:
+    recorder = Recorder()
+
+    # As in `eval_summary` we only trace `f` once inside `eval_shape`, so do
+    # not want Haiku to reject jit/pmap decorated functions.
+    def instrumented(*args, **kwargs):
+      with instrument_haiku(recorder):
+        return f_orig(*args, **kwargs)
+
+    f = hk.transform_with_state(instrumented)
+
+    def init_apply(*args, **kwargs):
+      init_rng, apply_rng = jax.random.split(jax.random.PRNGKey(42))
+      with recorder.event(TRANSFORM, "init"):
+        params, state = f.init(init_rng, *args, **kwargs)
+      with recorder.event(TRANSFORM, "apply"):
+        f.apply(params, state, apply_rng, *args, **kwargs)
+
+    jax.eval_shape(init_apply, *args, **kwargs)
+    return TraceProfile(recorder.events)
+
+  return wrapper
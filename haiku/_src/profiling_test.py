@@ -0,0 +1,204 @@
+# Copyright 2021 DeepMind Technologies Limited. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for haiku._src.profiling."""
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+from absl.testing import absltest
+from haiku._src import base
+from haiku._src import basic
+from haiku._src import module
+from haiku._src import profiling
+from haiku._src import transform
+import jax
+import jax.numpy as jnp
+
+
+def names(profile, category):
+  return {e.name for e in profile.events if e.category == category}
+
+
+def category_events(profile, category):
+  return [e for e in profile.events if e.category == category]
+
+
+def summary_row(profile, category, name):
+  for row in profile.summary():
+    if row["category"] == category and row["name"] == name:
+      return row
+  raise KeyError((category, name))
+
+
+class SleepyModule(module.Module):
+
+  def __call__(self, x):
+    time.sleep(0.01)
+    return basic.Linear(1)(x)
+
+
+class TraceProfileTest(absltest.TestCase):
+
+  def test_records_modules_and_parameters(self):
+    f = lambda x: basic.Linear(2)(x)  # pylint: disable=unnecessary-lambda
+    profile = profiling.trace_profile(f)(jnp.ones([1, 3]))
+    self.assertEqual(names(profile, profiling.TRANSFORM), {"init", "apply"})
+    self.assertEqual(names(profile, profiling.METHOD),
+                     {"linear.__init__", "linear.__call__"})
+    self.assertEqual(names(profile, profiling.MODULE),
+                     {"linear.__init__", "linear.__call__"})
+    self.assertEqual(names(profile, profiling.GET_PARAMETER),
+                     {"linear/w", "linear/b"})
+    self.assertEqual(names(profile, profiling.INITIALIZER),
+                     {"linear/w", "linear/b"})
+    # Initializers only run in init, get_parameter in both init and apply.
+    self.assertEqual(
+        summary_row(profile, profiling.INITIALIZER, "linear/w")["count"], 1)
+    self.assertEqual(
+        summary_row(profile, profiling.GET_PARAMETER, "linear/w")["count"], 2)
+
+  def test_transformed(self):
+    f = transform.transform(lambda: base.get_state("s", [], init=jnp.zeros))
+    profile = profiling.trace_profile(f)()
+    self.assertEqual(names(profile, profiling.GET_STATE), {"~/s"})
+
+  def test_self_time(self):
+    f = lambda x: SleepyModule()(x)  # pylint: disable=unnecessary-lambda
+    profile = profiling.trace_profile(f)(jnp.ones([1, 1]))
+    row = summary_row(profile, profiling.METHOD, "sleepy_module.__call__")
+    self.assertEqual(row["count"], 2)
+    self.assertGreaterEqual(row["self_time"], 0.02)
+    linear = summary_row(profile, profiling.METHOD,
+                         "sleepy_module/linear.__call__")
+    # Time spent in the nested Linear is excluded from self time.
+    self.assertAlmostEqual(row["total_time"] - row["self_time"],
+                           linear["total_time"], delta=0.01)
+
+  def test_creators_getters_and_interceptors(self):
+    def my_creator(next_creator, shape, dtype, init, context):
+      del context
+      return next_creator(shape, dtype, init)
+
+    def my_getter(next_getter, value, context):
+      del context
+      return next_getter(value)
+
+    def my_interceptor(next_f, args, kwargs, context):
+      del context
+      return next_f(*args, **kwargs)
+
+    def f(x):
+      with base.custom_creator(my_creator), \
+           base.custom_getter(my_getter), \
+           module.intercept_methods(my_interceptor):
+        return basic.Linear(2)(x)
+
+    profile = profiling.trace_profile(f)(jnp.ones([1, 3]))
+    qualname = "TraceProfileTest.test_creators_getters_and_interceptors.<locals>"
+    self.assertEqual(names(profile, profiling.CREATOR),
+                     {"linear/w", "linear/b"})
+    self.assertEqual(names(profile, profiling.INITIALIZER),
+                     {"linear/w", "linear/b"})
+    self.assertEqual(names(profile, profiling.GET_PARAMETER),
+                     {"linear/w", "linear/b"})
+    self.assertEqual(names(profile, profiling.GETTER),
+                     {f"{qualname}.my_getter"})
+    self.assertEqual(names(profile, profiling.INTERCEPTOR),
+                     {f"{qualname}.my_interceptor"})
+    # Interceptors wrap the method body.
+    self.assertEqual(names(profile, profiling.METHOD),
+                     {"linear.__init__", "linear.__call__"})
+    interceptors = category_events(profile, profiling.INTERCEPTOR)
+    methods = category_events(profile, profiling.METHOD)
+    self.assertLen(interceptors, len(methods))
+    for interceptor, method in zip(interceptors, methods):
+      self.assertEqual(method.depth, interceptor.depth + 1)
+      self.assertGreaterEqual(interceptor.duration, method.duration)
+
+  def test_no_custom_getter_installed(self):
+    getter_stacks = []
+
+    def f(x):
+      getter_stacks.append((len(base.param_getter_stack),
+                            len(base.state_getter_stack)))
+      return basic.Linear(2)(x)
+
+    profiling.trace_profile(f)(jnp.ones([1, 3]))
+    self.assertEqual(getter_stacks, [(0, 0), (0, 0)])
+
+  def test_does_not_modify_haiku_internals(self):
+    before = (base.run_creators, base.run_getters, base.get_parameter_internal,
+              base.get_state_internal, module.run_interceptors)
+    f = lambda x: basic.Linear(2)(x)  # pylint: disable=unnecessary-lambda
+    profiling.trace_profile(f)(jnp.ones([1, 3]))
+    after = (base.run_creators, base.run_getters, base.get_parameter_internal,
+             base.get_state_internal, module.run_interceptors)
+    self.assertEqual(before, after)
+    self.assertEmpty(module.method_hook_stack)
+    self.assertEmpty(module.interceptor_stack)
+    self.assertEmpty(module.interceptor_hook_stack)
+    self.assertEmpty(base.getter_hook_stack)
+    self.assertEmpty(base.param_lookup_hook_stack)
+    self.assertEmpty(base.state_lookup_hook_stack)
+
+  def test_other_threads_not_profiled(self):
+    events = []
+
+    def other_thread():
+      def g(x):
+        events.append(len(module.interceptor_hook_stack))
+        return basic.Linear(2)(x)
+
+      transform.transform(g).init(jax.random.PRNGKey(0), jnp.ones([1, 3]))
+
+    def f(x):
+      thread = threading.Thread(target=other_thread)
+      thread.start()
+      thread.join()
+      return basic.Linear(2)(x)
+
+    profile = profiling.trace_profile(f)(jnp.ones([1, 3]))
+    # `f` is traced for both init and apply.
+    self.assertEqual(events, [0, 0])
+    self.assertEqual(
+        summary_row(profile, profiling.METHOD, "linear.__call__")["count"], 2)
+
+  def test_table(self):
+    f = lambda x: basic.Linear(2)(x)  # pylint: disable=unnecessary-lambda
+    profile = profiling.trace_profile(f)(jnp.ones([1, 3]))
+    table = profile.table(categories=[profiling.GET_PARAMETER])
+    self.assertIn("linear/w", table)
+    self.assertNotIn("__call__", table)
+    self.assertIn("Self (ms)", table)
+    self.assertLen(profile.table(max_rows=1, tabulate_kwargs={}).splitlines(),
+                   3)
+
+  def test_chrome_trace(self):
+    f = lambda x: basic.Linear(2)(x)  # pylint: disable=unnecessary-lambda
+    profile = profiling.trace_profile(f)(jnp.ones([1, 3]))
+    path = os.path.join(tempfile.mkdtemp(), "trace.json")
+    profile.save_chrome_trace(path)
+    with open(path) as fp:
+      trace = json.load(fp)
+    events = trace["traceEvents"]
+    self.assertLen(events, len(profile.events))
+    self.assertTrue(all(e["ph"] == "X" for e in events))
+    self.assertIn("linear.__call__", {e["name"] for e in events})
+
+if __name__ == "__main__":
+  absltest.main()
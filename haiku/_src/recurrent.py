@@ -15,6 +15,9 @@
 """Haiku recurrent core."""
 
 import abc
+import collections.abc
+import functools
+import math
 import types
 from typing import Any, NamedTuple, Optional, Sequence, Tuple, Union
 
@@ -35,8 +38,14 @@ hk.Linear = basic.Linear
 hk.ConvND = conv.ConvND
 hk.get_parameter = base.get_parameter
 hk.Module = module.Module
+hk.cond = stateful.cond
+hk.eval_shape = stateful.eval_shape
+hk.remat = stateful.remat
 hk.scan = stateful.scan
+hk.vmap = stateful.vmap
 inside_transform = base.inside_transform
+name_like = module.name_like
+params_frozen = base.params_frozen
 del base, basic, conv, initializers, module
 
 
@@ -80,7 +89,152 @@ class RNNCore(hk.Module):
     """
 
 
-def static_unroll(core, input_sequence, initial_state, time_major=True):
+class LinearTransitionCore(RNNCore):
+  """Base class for RNN cores with a linear state transition.
+
+  Cores whose next state is an elementwise linear function of the previous
+  state may subclass this to support
+  :func:`~haiku.experimental.associative_unroll`, by implementing
+  :meth:`linear_transition` (and optionally :meth:`linear_output`) in addition
+  to the methods of :class:`~haiku.RNNCore`.
+  """
+
+  @abc.abstractmethod
+  def linear_transition(self, inputs) -> Tuple[Any, Any]:
+    """Returns the linear state transition of the core for ``inputs``.
+
+    The next state must be given by::
+
+        a, b = core.linear_transition(inputs)
+        next_state = a * prev_state + b  # For each leaf of the state.
+
+    Args:
+      inputs: An arbitrarily nested structure.
+
+    Returns:
+      A tuple ``a, b`` of structures matching the core state. Leaves of ``b``
+      must have the shape of the state, leaves of ``a`` must be broadcastable
+      to it.
+    """
+
+  def linear_output(self, inputs, state):
+    """Returns the output of the core given ``inputs`` and the next ``state``.
+
+    Defaults to returning the state.
+
+    Args:
+      inputs: An arbitrarily nested structure.
+      state: The next state of the core (after applying ``inputs``).
+
+    Returns:
+      The output of the core, as returned by ``__call__``.
+    """
+    del inputs
+    return state
+
+
+class ProjectedInputs(NamedTuple):
+  """Inputs to an :class:`InputProjectionCore` that have already been projected.
+
+  Attributes:
+    projected: The output of :meth:`InputProjectionCore.input_projection` for
+      one step.
+  """
+  projected: Any
+
+
+class InputProjectionCore(RNNCore):
+  """Base class for RNN cores that can project all of their inputs at once.
+
+  Cores subclassing this allow :func:`~haiku.static_unroll` and
+  :func:`~haiku.dynamic_unroll` to compute the part of the computation that
+  only depends on the inputs for all time steps at once (e.g. using one large
+  matrix multiply rather than one per step). Subclasses implement
+  :meth:`input_projection` and must accept :class:`ProjectedInputs` in
+  ``__call__``, such that::
+
+      core(inputs, prev_state) == core(
+          ProjectedInputs(core.input_projection(inputs)), prev_state)
+
+  Subclasses overriding ``__call__`` must handle :class:`ProjectedInputs` too.
+  """
+
+  @abc.abstractmethod
+  def input_projection(self, inputs):
+    """Returns the part of the core's computation only depending on ``inputs``.
+
+    Args:
+      inputs: An arbitrarily nested structure of inputs with arbitrary leading
+        dimensions (e.g. ``[T, B, ...]``).
+
+    Returns:
+      The projected inputs, with the same leading dimensions as ``inputs``.
+    """
+
+
+def _project_inputs(core, input_sequence):
+  """Projects all inputs at once if ``core`` is an :class:`InputProjectionCore`.
+
+  Args:
+    core: The core being unrolled.
+    input_sequence: The input sequence.
+
+  Returns:
+    A tuple of a function to call on each step and the (projected) input
+    sequence.
+  """
+  if not isinstance(core, InputProjectionCore):
+    return core, input_sequence
+  step = functools.partial(_projected_step, core)
+  return step, core.input_projection(input_sequence)
+
+
+def _projected_step(core, projected, prev_state):
+  return core(ProjectedInputs(projected), prev_state)
+
+
+def _prepare_unroll(core, input_sequence, initial_state, should_reset):
+  """Returns a function to call on each step of an unroll and its inputs.
+
+  If ``should_reset`` is given (or ``core`` is a :class:`ResetCore`), the state
+  to reset to is computed once here rather than on every step.
+
+  Args:
+    core: The core being unrolled.
+    input_sequence: The input sequence.
+    initial_state: The initial state of the core.
+    should_reset: Optional reset signal for each step.
+
+  Returns:
+    A tuple of a function to call on each step and the input sequence for it.
+  """
+  if (should_reset is None and isinstance(core, ResetCore) and
+      type(core).__call__ is ResetCore.__call__):
+    core, (input_sequence, should_reset) = core.core, input_sequence
+
+  step, input_sequence = _project_inputs(core, input_sequence)
+  if should_reset is None:
+    return step, input_sequence
+
+  reset_state = _reset_state(core, initial_state)
+  step = functools.partial(_reset_step, step, reset_state)
+  return step, (input_sequence, should_reset)
+
+
+def _reset_step(core, reset_state, inputs, prev_state):
+  inputs, should_reset = inputs
+  should_reset = _conform_should_reset(should_reset, prev_state)
+  prev_state = jax.tree_multimap(jnp.where, should_reset, reset_state,
+                                 prev_state)
+  return core(inputs, prev_state)
+
+
+def static_unroll(core,
+                  input_sequence,
+                  initial_state,
+                  time_major=True,
+                  sequence_length=None,
+                  should_reset=None):
   """Performs a static unroll of an RNN.
 
   An *unroll* corresponds to calling the core on each element of the
@@ -109,13 +263,27 @@ def static_unroll(core, input_sequence, initial_state, time_major=True):
     initial_state: An initial state of the given core.
     time_major: If True, inputs are expected time-major, otherwise they are
       expected batch-major.
+    sequence_length: Optional integer array of shape ``[B]`` with the length of
+      each sequence in the batch. If given, the state of each example is not
+      updated past the end of its sequence and the corresponding outputs are
+      zero. The core and ``initial_state`` must be batched.
+    should_reset: Optional boolean array of shape ``[T, B]`` if time-major, or
+      ``[B, T]`` if batch-major, (or a nest compatible with the state, as for
+      :class:`ResetCore`) indicating that the state should be reset to
+      ``core.initial_state`` before each step. This is equivalent to unrolling
+      ``ResetCore(core)`` on ``(input_sequence, should_reset)`` but computes
+      the reset state once rather than on every step (unrolling a
+      :class:`ResetCore` does this automatically).
 
   Returns:
     A tuple with two elements:
       * **output_sequence** - An arbitrarily nested structure of tensors
         of shape ``[T, ...]`` if time-major, otherwise ``[B, T, ...]``.
-      * **final_state** - Core state at time step ``T``.
+      * **final_state** - Core state at time step ``T`` (or at the end of each
+        sequence if ``sequence_length`` is given).
   """
+  core, input_sequence = _prepare_unroll(core, input_sequence, initial_state,
+                                        should_reset)
   output_sequence = []
   time_axis = 0 if time_major else 1
   num_steps = jax.tree_leaves(input_sequence)[0].shape[time_axis]
@@ -125,7 +293,10 @@ def static_unroll(core, input_sequence, initial_state, time_major=True):
       inputs = jax.tree_map(lambda x, _t=t: x[_t], input_sequence)
     else:
       inputs = jax.tree_map(lambda x, _t=t: x[:, _t], input_sequence)
-    outputs, state = core(inputs, state)
+    if sequence_length is None:
+      outputs, state = core(inputs, state)
+    else:
+      outputs, state = _masked_step(core, inputs, state, t < sequence_length)
     output_sequence.append(outputs)
 
   # Stack outputs along the time axis.
@@ -140,11 +311,31 @@ def _swap_batch_time(inputs):
   return jax.tree_map(lambda x: jnp.swapaxes(x, 0, 1), inputs)
 
 
+def _select(valid, on_true, on_false):
+  """Selects ``on_true`` where ``valid`` (of shape ``[B]``) else ``on_false``."""
+  def select(x, y):
+    mask = jnp.reshape(valid, valid.shape + (1,) * (jnp.ndim(x) - 1))
+    return jnp.where(mask, x, y)
+  return jax.tree_multimap(select, on_true, on_false)
+
+
+def _masked_step(core, inputs, prev_state, valid):
+  """Steps ``core`` keeping ``prev_state`` and zeroing outputs if not valid."""
+  outputs, next_state = core(inputs, prev_state)
+  outputs = _select(valid, outputs, jax.tree_map(jnp.zeros_like, outputs))
+  next_state = _select(valid, next_state, prev_state)
+  return outputs, next_state
+
+
 def dynamic_unroll(core,
                    input_sequence,
                    initial_state,
                    time_major=True,
-                   reverse=False):
+                   reverse=False,
+                   sequence_length=None,
+                   should_reset=None,
+                   remat: Union[bool, str] = False,
+                   remat_policy=None):
   """Performs a dynamic unroll of an RNN.
 
   An *unroll* corresponds to calling the core on each element of the
@@ -170,13 +361,42 @@ def dynamic_unroll(core,
       reversing the time dimension in both inputs and outputs. See
       https://jax.readthedocs.io/en/latest/_autosummary/jax.lax.scan.html for
       more details.
+    sequence_length: Optional integer array of shape ``[B]`` with the length of
+      each sequence in the batch. If given, the state of each example is not
+      updated past the end of its sequence and the corresponding outputs are
+      zero. Steps past the end of the longest sequence are skipped (outside of
+      ``init``) using :func:`jax.lax.cond`. The core and ``initial_state``
+      must be batched.
+    should_reset: Optional boolean array of shape ``[T, B]`` if time-major, or
+      ``[B, T]`` if batch-major, (or a nest compatible with the state, as for
+      :class:`ResetCore`) indicating that the state should be reset to
+      ``core.initial_state`` before each step. This is equivalent to unrolling
+      ``ResetCore(core)`` on ``(input_sequence, should_reset)`` but computes
+      the reset state once rather than on every step (unrolling a
+      :class:`ResetCore` does this automatically).
+    remat: Trades compute for memory in the backward pass. If ``True`` each
+      step of the unroll is rematerialized (see :func:`~haiku.remat`), such
+      that only the state (and not the intermediate activations of the core)
+      is stored for each step. If ``"segment"`` the unroll is split into
+      segments of ``ceil(sqrt(T))`` steps and each segment is rematerialized,
+      such that the state is only stored at segment boundaries and memory
+      scales with ``O(sqrt(T))``, at the cost of running the forward pass of
+      the core twice.
+    remat_policy: Optional policy passed to :func:`jax.checkpoint` if ``remat``
+      is set (e.g. ``jax.checkpoint_policies.dots_saveable``).
 
   Returns:
     A tuple with two elements:
       * **output_sequence** - An arbitrarily nested structure of tensors
         of shape ``[T, ...]`` if time-major, otherwise ``[B, T, ...]``.
-      * **final_state** - Core state at time step ``T``.
+      * **final_state** - Core state at time step ``T`` (or at the end of each
+        sequence if ``sequence_length`` is given).
   """
+  if remat not in (True, False, "segment"):
+    raise ValueError(f"remat must be a bool or 'segment', got {remat!r}.")
+
+  core, input_sequence = _prepare_unroll(core, input_sequence, initial_state,
+                                        should_reset)
   scan = hk.scan if inside_transform() else jax.lax.scan
   # Swap the input and output of core.
   def scan_f(prev_state, inputs):
@@ -185,6 +405,32 @@ def dynamic_unroll(core,
   # TODO(hamzamerzic): Remove axis swapping once scan supports time axis arg.
   if not time_major:
     input_sequence = _swap_batch_time(input_sequence)
+
+  num_steps = jax.tree_leaves(input_sequence)[0].shape[0]
+  remat_fn = functools.partial(
+      hk.remat if inside_transform() else jax.checkpoint, policy=remat_policy)
+
+  if remat == "segment" and num_steps > 1:
+    def unroll_segment(segment, state, offset):
+      length = None if sequence_length is None else sequence_length - offset
+      return dynamic_unroll(core, segment, state, reverse=reverse,
+                            sequence_length=length)
+
+    output_sequence, final_state = _chunked_unroll(
+        remat_fn(unroll_segment), input_sequence, initial_state,
+        chunk_size=math.ceil(math.sqrt(num_steps)), reverse=reverse)
+    if not time_major:
+      output_sequence = _swap_batch_time(output_sequence)
+    return output_sequence, final_state
+
+  if sequence_length is not None:
+    scan_f = _length_masked_scan_f(core, input_sequence, initial_state,
+                                   sequence_length)
+    input_sequence = (jnp.arange(num_steps), input_sequence)
+
+  if remat:
+    scan_f = remat_fn(scan_f)
+
   final_state, output_sequence = scan(
       scan_f,
       initial_state,
@@ -195,6 +441,290 @@ def dynamic_unroll(core,
   return output_sequence, final_state
 
 
+def _length_masked_scan_f(core, input_sequence, initial_state, sequence_length):
+  """Returns a scan body masking steps past the end of each sequence.
+
+  The body expects ``(t, inputs)`` as input. Steps past the end of the longest
+  sequence do not call ``core``, which avoids the work for batches where all
+  sequences are shorter than the input. During ``init`` all steps call ``core``
+  since parameters must be created the same way in both branches.
+
+  Args:
+    core: The core being unrolled.
+    input_sequence: The time-major input sequence.
+    initial_state: The initial state of the core.
+    sequence_length: The length of each sequence, of shape ``[B]``.
+
+  Returns:
+    A function suitable to pass to :func:`hk.scan` or :func:`jax.lax.scan`.
+  """
+  sequence_length = jnp.asarray(sequence_length)
+  max_length = jnp.max(sequence_length)
+  transformed = inside_transform()
+  skip_steps = not transformed or params_frozen()
+
+  if skip_steps:
+    eval_shape = hk.eval_shape if transformed else jax.eval_shape
+    cond = hk.cond if transformed else jax.lax.cond
+    inputs0 = jax.tree_map(lambda x: x[0], input_sequence)
+    outputs_shape, _ = eval_shape(core, inputs0, initial_state)
+
+  def scan_f(prev_state, inputs):
+    t, inputs = inputs
+    valid = t < sequence_length
+    if not skip_steps:
+      outputs, next_state = _masked_step(core, inputs, prev_state, valid)
+      return next_state, outputs
+
+    def step(operand):
+      inputs, prev_state = operand
+      return _masked_step(core, inputs, prev_state, valid)
+
+    def skip(operand):
+      _, prev_state = operand
+      outputs = jax.tree_map(lambda s: jnp.zeros(s.shape, s.dtype),
+                             outputs_shape)
+      return outputs, prev_state
+
+    outputs, next_state = cond(t < max_length, step, skip,
+                               (inputs, prev_state))
+    return next_state, outputs
+
+  return scan_f
+
+
+def _chunked_unroll(unroll_chunk, input_sequence, initial_state, chunk_size,
+                    reverse=False):
+  """Unrolls a time-major input sequence in chunks of ``chunk_size`` steps.
+
+  Full chunks are unrolled using a scan, remaining steps are unrolled
+  separately (before the full chunks if ``reverse``).
+
+  Args:
+    unroll_chunk: A function ``(chunk, state, offset) -> (outputs, state)``
+      where ``offset`` is the index of the first step of ``chunk``.
+    input_sequence: The time-major input sequence.
+    initial_state: The initial state.
+    chunk_size: The number of steps in each chunk.
+    reverse: If True, chunks are unrolled in reverse order.
+
+  Returns:
+    A tuple of the output sequence and the final state.
+  """
+  scan = hk.scan if inside_transform() else jax.lax.scan
+  num_steps = jax.tree_leaves(input_sequence)[0].shape[0]
+  num_chunks, remainder = divmod(num_steps, chunk_size)
+  split = num_chunks * chunk_size
+
+  def unroll_full_chunks(state):
+    chunks = jax.tree_map(
+        lambda x: jnp.reshape(x[:split], (num_chunks, chunk_size) + x.shape[1:]),
+        input_sequence)
+    offsets = jnp.arange(num_chunks) * chunk_size
+    def scan_f(state, inputs):
+      offset, chunk = inputs
+      outputs, state = unroll_chunk(chunk, state, offset)
+      return state, outputs
+    state, outputs = scan(scan_f, state, (offsets, chunks), reverse=reverse)
+    outputs = jax.tree_map(
+        lambda x: jnp.reshape(x, (split,) + x.shape[2:]), outputs)
+    return outputs, state
+
+  def unroll_remainder(state):
+    chunk = jax.tree_map(lambda x: x[split:], input_sequence)
+    return unroll_chunk(chunk, state, split)
+
+  unrolls = []
+  if num_chunks:
+    unrolls.append(unroll_full_chunks)
+  if remainder:
+    unrolls.append(unroll_remainder)
+  if reverse:
+    unrolls.reverse()
+
+  state = initial_state
+  output_chunks = []
+  for unroll in unrolls:
+    outputs, state = unroll(state)
+    output_chunks.append(outputs)
+  if reverse:
+    output_chunks.reverse()
+  output_sequence = jax.tree_multimap(
+      lambda *args: jnp.concatenate(args), *output_chunks)
+  return output_sequence, state
+
+
+def truncated_unroll(core,
+                     input_sequence,
+                     initial_state,
+                     chunk_size: int,
+                     time_major=True):
+  """Performs a dynamic unroll of an RNN with truncated backpropagation.
+
+  The input sequence is split into chunks of ``chunk_size`` steps (the last
+  chunk may be shorter), each of which is unrolled using
+  :func:`dynamic_unroll`. The state is carried across chunks but gradients are
+  stopped at chunk boundaries, and each chunk is rematerialized (see
+  :func:`~haiku.remat`) so only the state at the start of each chunk is kept
+  for the backward pass. This bounds activation memory by the size of one
+  chunk rather than the length of the sequence::
+
+      state = initial_state
+      for chunk in chunks(input_sequence, chunk_size):
+        outputs, state = dynamic_unroll(core, chunk, stop_gradient(state))
+
+  ``input_sequence`` may also be an iterator (e.g. a generator) of chunks, in
+  which case chunks are unrolled as they are produced and ``chunk_size`` is
+  ignored. To process unbounded streams call your transformed function on each
+  chunk, passing the ``final_state`` from one call to the next.
+
+  >>> core = hk.LSTM(4)
+  >>> xs = jnp.ones([100, 8, 2])
+  >>> outs, state = hk.truncated_unroll(core, xs, core.initial_state(8),
+  ...                                   chunk_size=32)
+  >>> outs.shape
+  (100, 8, 4)
+
+  Args:
+    core: An :class:`RNNCore` to unroll.
+    input_sequence: An arbitrarily nested structure of tensors of shape
+      ``[T, ...]`` if time-major=True, or ``[B, T, ...]`` if time_major=False,
+      where ``T`` is the number of time steps. Alternatively an iterator of
+      such structures.
+    initial_state: An initial state of the given core.
+    chunk_size: The number of time steps after which gradients are truncated.
+    time_major: If True, inputs are expected time-major, otherwise they are
+      expected batch-major.
+
+  Returns:
+    A tuple with two elements:
+      * **output_sequence** - An arbitrarily nested structure of tensors
+        of shape ``[T, ...]`` if time-major, otherwise ``[B, T, ...]``.
+      * **final_state** - Core state at time step ``T``.
+  """
+  if chunk_size < 1:
+    raise ValueError(f"chunk_size must be positive, got {chunk_size}.")
+
+  remat = hk.remat if inside_transform() else jax.checkpoint
+
+  def unroll_chunk(chunk, state, time_major=True):
+    @remat
+    def f(chunk, state):
+      state = jax.lax.stop_gradient(state)
+      return dynamic_unroll(core, chunk, state, time_major=time_major)
+    return f(chunk, state)
+
+  if isinstance(input_sequence, collections.abc.Iterator):
+    state = initial_state
+    output_chunks = []
+    for chunk in input_sequence:
+      outputs, state = unroll_chunk(chunk, state, time_major)
+      output_chunks.append(outputs)
+    if not output_chunks:
+      raise ValueError("truncated_unroll requires at least one chunk.")
+    time_axis = 0 if time_major else 1
+    output_sequence = jax.tree_multimap(
+        lambda *args: jnp.concatenate(args, axis=time_axis), *output_chunks)
+    return output_sequence, state
+
+  if not time_major:
+    input_sequence = _swap_batch_time(input_sequence)
+  output_sequence, final_state = _chunked_unroll(
+      lambda chunk, state, _: unroll_chunk(chunk, state), input_sequence,
+      initial_state, chunk_size)
+  if not time_major:
+    output_sequence = _swap_batch_time(output_sequence)
+  return output_sequence, final_state
+
+
+def associative_unroll(core,
+                       input_sequence,
+                       initial_state,
+                       time_major=True,
+                       reverse=False):
+  """Performs a parallel unroll of an RNN with a linear state transition.
+
+  For cores implementing :class:`LinearTransitionCore` the result is the
+  same as :func:`~haiku.dynamic_unroll`, but rather than running the core one
+  step at a time the state transitions for all time steps are computed at once
+  and combined using :func:`jax.lax.associative_scan`. This reduces the
+  sequential depth of the unroll from ``T`` to ``O(log T)``, which can
+  significantly reduce the latency of long unrolls, at the cost of doing
+  ``O(T log T)`` work.
+
+  >>> class EMA(hk.experimental.LinearTransitionCore):
+  ...   def __call__(self, inputs, prev_state):
+  ...     state = 0.9 * prev_state + 0.1 * inputs
+  ...     return state, state
+  ...   def initial_state(self, batch_size):
+  ...     return jnp.zeros([batch_size, 1])
+  ...   def linear_transition(self, inputs):
+  ...     return 0.9, 0.1 * inputs
+  >>> core = EMA()
+  >>> xs = jnp.ones([10000, 8, 1])
+  >>> outs, state = hk.experimental.associative_unroll(
+  ...     core, xs, core.initial_state(8))
+  >>> outs.shape
+  (10000, 8, 1)
+
+  Args:
+    core: A :class:`LinearTransitionCore`.
+    input_sequence: An arbitrarily nested structure of tensors of shape
+      ``[T, ...]`` if time-major=True, or ``[B, T, ...]`` if time_major=False,
+      where ``T`` is the number of time steps.
+    initial_state: An initial state of the given core.
+    time_major: If True, inputs are expected time-major, otherwise they are
+      expected batch-major.
+    reverse: If True, inputs are scanned in the reversed order. Equivalent to
+      reversing the time dimension in both inputs and outputs.
+
+  Returns:
+    A tuple with two elements:
+      * **output_sequence** - An arbitrarily nested structure of tensors
+        of shape ``[T, ...]`` if time-major, otherwise ``[B, T, ...]``.
+      * **final_state** - Core state at time step ``T``.
+
+  Raises:
+    TypeError: If ``core`` is not a :class:`LinearTransitionCore`.
+  """
+  if not isinstance(core, LinearTransitionCore):
+    raise TypeError("associative_unroll requires a LinearTransitionCore, got "
+                    f"{type(core).__name__}.")
+
+  vmap = (functools.partial(hk.vmap, split_rng=False) if inside_transform()
+          else jax.vmap)
+
+  if not time_major:
+    input_sequence = _swap_batch_time(input_sequence)
+  if reverse:
+    input_sequence = jax.tree_map(lambda x: jnp.flip(x, 0), input_sequence)
+
+  def transition(inputs):
+    a, b = core.linear_transition(inputs)
+    a = jax.tree_multimap(lambda a, b: jnp.broadcast_to(a, b.shape), a, b)
+    return a, b
+
+  def compose(first, second):
+    (a1, b1), (a2, b2) = first, second
+    return (jax.tree_multimap(lambda a1, a2: a2 * a1, a1, a2),
+            jax.tree_multimap(lambda b1, a2, b2: a2 * b1 + b2, b1, a2, b2))
+
+  # The transition from the initial state to the state at each step is given by
+  # composing the transitions of all previous steps.
+  a, b = vmap(transition)(input_sequence)
+  if jax.tree_leaves(b):
+    a, b = jax.lax.associative_scan(compose, (a, b))
+  states = jax.tree_multimap(lambda a, b, s: a * s + b, a, b, initial_state)
+  output_sequence = vmap(core.linear_output)(input_sequence, states)
+  final_state = jax.tree_map(lambda s: s[-1], states)
+
+  if reverse:
+    output_sequence = jax.tree_map(lambda x: jnp.flip(x, 0), output_sequence)
+  if not time_major:
+    output_sequence = _swap_batch_time(output_sequence)
+  return output_sequence, final_state
+
+
 def add_batch(nest, batch_size: Optional[int]):
   """Adds a batch dimension at axis 0 to the leaves of a nested structure."""
   broadcast = lambda x: jnp.broadcast_to(x, (batch_size,) + x.shape)
@@ -258,7 +788,7 @@ class LSTMState(NamedTuple):
   cell: jnp.ndarray
 
 
-class LSTM(RNNCore):
+class LSTM(InputProjectionCore):
   r"""Long short-term memory (LSTM) RNN core.
 
   The implementation is based on :cite:`zaremba2014recurrent`. Given
@@ -300,13 +830,19 @@ class LSTM(RNNCore):
 
   def __call__(
       self,
-      inputs: jnp.ndarray,
+      inputs: Union[jnp.ndarray, ProjectedInputs],
       prev_state: LSTMState,
   ) -> Tuple[jnp.ndarray, LSTMState]:
-    if len(inputs.shape) > 2 or not inputs.shape:
-      raise ValueError("LSTM input must be rank-1 or rank-2.")
-    x_and_h = jnp.concatenate([inputs, prev_state.hidden], axis=-1)
-    gated = hk.Linear(4 * self.hidden_size)(x_and_h)
+    linear = hk.Linear(4 * self.hidden_size)
+    if isinstance(inputs, ProjectedInputs):
+      w, _ = _linear_params(linear)
+      input_size = w.shape[0] - self.hidden_size
+      gated = inputs.projected + jnp.dot(prev_state.hidden, w[input_size:])
+    else:
+      if len(inputs.shape) > 2 or not inputs.shape:
+        raise ValueError("LSTM input must be rank-1 or rank-2.")
+      x_and_h = jnp.concatenate([inputs, prev_state.hidden], axis=-1)
+      gated = linear(x_and_h)
     # TODO(slebedev): Consider aligning the order of gates with Sonnet.
     # i = input, g = cell_gate, f = forget_gate, o = output_gate
     i, g, f, o = jnp.split(gated, indices_or_sections=4, axis=-1)
@@ -315,6 +851,20 @@ class LSTM(RNNCore):
     h = jax.nn.sigmoid(o) * jnp.tanh(c)
     return h, LSTMState(h, c)
 
+  # Named like `__call__` such that the linear is shared with `__call__`.
+  @name_like("__call__")
+  def input_projection(self, inputs: jnp.ndarray) -> jnp.ndarray:
+    if not inputs.shape:
+      raise ValueError("LSTM input must not be scalar.")
+    input_size = inputs.shape[-1]
+    linear = hk.Linear(4 * self.hidden_size)
+    if not linear.params_dict():
+      # Creates the parameters, there is no computation for an empty batch.
+      linear(jnp.zeros([0, input_size + self.hidden_size], inputs.dtype))
+    w, b = _linear_params(linear)
+    out = jnp.dot(inputs, w[:input_size])
+    return out + jnp.broadcast_to(b, out.shape)
+
   def initial_state(self, batch_size: Optional[int]) -> LSTMState:
     state = LSTMState(hidden=jnp.zeros([self.hidden_size]),
                       cell=jnp.zeros([self.hidden_size]))
@@ -323,6 +873,18 @@ class LSTM(RNNCore):
     return state
 
 
+def _linear_params(linear: hk.Linear) -> Tuple[jnp.ndarray, jnp.ndarray]:
+  """Returns the existing ``w`` and ``b`` parameters of ``linear``."""
+  params = linear.params_dict()
+  name = linear.module_name
+  if f"{name}/w" not in params:
+    raise ValueError(
+        f"Calling LSTM with ProjectedInputs requires the parameters of {name} "
+        "to have been created by `input_projection` or `__call__` (or passed "
+        "to `apply`).")
+  return params[f"{name}/w"], params[f"{name}/b"]
+
+
 class ConvNDLSTM(RNNCore):
   r"""``num_spatial_dims``-D convolutional LSTM.
 
@@ -496,7 +1058,7 @@ class Conv3DLSTM(ConvNDLSTM):  # pylint: disable=empty-docstring
         name=name)
 
 
-class GRU(RNNCore):
+class GRU(InputProjectionCore):
   r"""Gated Recurrent Unit.
 
   The implementation is based on: https://arxiv.org/pdf/1412.3555v1.pdf with
@@ -533,32 +1095,38 @@ class GRU(RNNCore):
     self.b_init = b_init or jnp.zeros
 
   def __call__(self, inputs, state):
-    if inputs.ndim not in (1, 2):
-      raise ValueError("GRU input must be rank-1 or rank-2.")
-
-    input_size = inputs.shape[-1]
     hidden_size = self.hidden_size
-    w_i = hk.get_parameter("w_i", [input_size, 3 * hidden_size], inputs.dtype,
-                           init=self.w_i_init)
-    w_h = hk.get_parameter("w_h", [hidden_size, 3 * hidden_size], inputs.dtype,
-                           init=self.w_h_init)
-    b = hk.get_parameter("b", [3 * hidden_size], inputs.dtype, init=self.b_init)
-    w_h_z, w_h_a = jnp.split(w_h, indices_or_sections=[2 * hidden_size], axis=1)
-    b_z, b_a = jnp.split(b, indices_or_sections=[2 * hidden_size], axis=0)
+    if isinstance(inputs, ProjectedInputs):
+      # The projected inputs already include the biases.
+      gates_x = inputs.projected
+      w_h, _ = _gru_recurrent_params(self, gates_x.dtype)
+    else:
+      if inputs.ndim not in (1, 2):
+        raise ValueError("GRU input must be rank-1 or rank-2.")
+      w_i = _gru_input_weights(self, inputs)
+      w_h, b = _gru_recurrent_params(self, inputs.dtype)
+      gates_x = jnp.matmul(inputs, w_i)
+      gates_x += jnp.broadcast_to(b, gates_x.shape)
 
-    gates_x = jnp.matmul(inputs, w_i)
+    w_h_z, w_h_a = jnp.split(w_h, indices_or_sections=[2 * hidden_size], axis=1)
     zr_x, a_x = jnp.split(
         gates_x, indices_or_sections=[2 * hidden_size], axis=-1)
-    zr_h = jnp.matmul(state, w_h_z)
-    zr = zr_x + zr_h + jnp.broadcast_to(b_z, zr_h.shape)
+    zr = zr_x + jnp.matmul(state, w_h_z)
     z, r = jnp.split(jax.nn.sigmoid(zr), indices_or_sections=2, axis=-1)
 
-    a_h = jnp.matmul(r * state, w_h_a)
-    a = jnp.tanh(a_x + a_h + jnp.broadcast_to(b_a, a_h.shape))
+    a = jnp.tanh(a_x + jnp.matmul(r * state, w_h_a))
 
     next_state = (1 - z) * state + z * a
     return next_state, next_state
 
+  def input_projection(self, inputs):
+    if not inputs.shape:
+      raise ValueError("GRU input must not be scalar.")
+    w_i = _gru_input_weights(self, inputs)
+    _, b = _gru_recurrent_params(self, inputs.dtype)
+    out = jnp.matmul(inputs, w_i)
+    return out + jnp.broadcast_to(b, out.shape)
+
   def initial_state(self, batch_size: Optional[int]):
     state = jnp.zeros([self.hidden_size])
     if batch_size is not None:
@@ -566,7 +1134,20 @@ class GRU(RNNCore):
     return state
 
 
-class IdentityCore(RNNCore):
+def _gru_input_weights(core: GRU, inputs: jnp.ndarray) -> jnp.ndarray:
+  return hk.get_parameter("w_i", [inputs.shape[-1], 3 * core.hidden_size],
+                          inputs.dtype, init=core.w_i_init)
+
+
+def _gru_recurrent_params(core: GRU, dtype) -> Tuple[jnp.ndarray, jnp.ndarray]:
+  hidden_size = core.hidden_size
+  w_h = hk.get_parameter("w_h", [hidden_size, 3 * hidden_size], dtype,
+                         init=core.w_h_init)
+  b = hk.get_parameter("b", [3 * hidden_size], dtype, init=core.b_init)
+  return w_h, b
+
+
+class IdentityCore(LinearTransitionCore):
   """A recurrent core that forwards the inputs and an empty state.
 
   This is commonly used when switching between recurrent and feedforward
@@ -579,6 +1160,12 @@ class IdentityCore(RNNCore):
   def initial_state(self, batch_size: Optional[int]):
     return ()
 
+  def linear_transition(self, inputs):
+    return (), ()
+
+  def linear_output(self, inputs, state):
+    return inputs
+
 
 def _validate_and_conform(should_reset, state):
   """Ensures that should_reset is compatible with state."""
@@ -591,6 +1178,80 @@ def _validate_and_conform(should_reset, state):
       "state shape {}".format(should_reset.shape, state.shape))
 
 
+def _conform_should_reset(should_reset, state):
+  """Returns ``should_reset`` as a nest broadcastable against ``state``."""
+  if jax.treedef_is_leaf(jax.tree_structure(should_reset)):
+    # Equivalent to not tree.is_nested, but with support for Jax extensible
+    # pytrees.
+    should_reset = jax.tree_map(lambda _: should_reset, state)
+
+  # We now need to manually pad 'on the right' to ensure broadcasting operates
+  # correctly.
+  # Automatic broadcasting would in fact implicitly pad 'on the left',
+  # resulting in the signal to trigger resets for parts of the state
+  # across batch entries. For example:
+  #
+  # import jax
+  # import jax.numpy as jnp
+  #
+  # shape = (2, 2, 2)
+  # x = jnp.zeros(shape)
+  # y = jnp.ones(shape)
+  # should_reset = jnp.array([False, True])
+  # v = jnp.where(should_reset, x, y)
+  # for batch_entry in range(shape[0]):
+  #   print("batch_entry {}:\n".format(batch_entry), v[batch_entry])
+  #
+  # >> batch_entry 0:
+  # >>  [[1. 0.]
+  # >>  [1. 0.]]
+  # >> batch_entry 1:
+  # >>  [[1. 0.]
+  # >>  [1. 0.]]
+  #
+  # Note how manually padding the should_reset tensor yields the desired
+  # behavior.
+  #
+  # import jax
+  # import jax.numpy as jnp
+  #
+  # shape = (2, 2, 2)
+  # x = jnp.zeros(shape)
+  # y = jnp.ones(shape)
+  # should_reset = jnp.array([False, True])
+  # dims_to_add = x.ndim - should_reset.ndim
+  # should_reset = should_reset.reshape(should_reset.shape + (1,)*dims_to_add)
+  # v = jnp.where(should_reset, x, y)
+  # for batch_entry in range(shape[0]):
+  #   print("batch_entry {}:\n".format(batch_entry), v[batch_entry])
+  #
+  # >> batch_entry 0:
+  # >>  [[1. 1.]
+  # >>  [1. 1.]]
+  # >> batch_entry 1:
+  # >>  [[0. 0.]
+  # >>  [0. 0.]]
+  return jax.tree_multimap(_validate_and_conform, should_reset, state)
+
+
+def _is_batched(core, state):
+  state = jax.tree_leaves(state)
+  if not state:  # Empty state is treated as unbatched.
+    return False
+  batched = jax.tree_leaves(core.initial_state(batch_size=1))
+  return all(b.shape[1:] == s.shape[1:] for b, s in zip(batched, state))
+
+
+def _reset_state(core, state):
+  """Returns the initial state of ``core`` with the shape/dtype of ``state``."""
+  if _is_batched(core, state):
+    batch_size = jax.tree_leaves(state)[0].shape[0]
+  else:
+    batch_size = None
+  return jax.tree_multimap(
+      lambda s, i: i.astype(s.dtype), state, core.initial_state(batch_size))
+
+
 class ResetCore(RNNCore):
   """A wrapper for managing state resets during unrolls.
 
@@ -624,59 +1285,8 @@ class ResetCore(RNNCore):
       Tuple of the wrapped core's ``output, next_state``.
     """
     inputs, should_reset = inputs
-    if jax.treedef_is_leaf(jax.tree_structure(should_reset)):
-      # Equivalent to not tree.is_nested, but with support for Jax extensible
-      # pytrees.
-      should_reset = jax.tree_map(lambda _: should_reset, state)
-
-    # We now need to manually pad 'on the right' to ensure broadcasting operates
-    # correctly.
-    # Automatic broadcasting would in fact implicitly pad 'on the left',
-    # resulting in the signal to trigger resets for parts of the state
-    # across batch entries. For example:
-    #
-    # import jax
-    # import jax.numpy as jnp
-    #
-    # shape = (2, 2, 2)
-    # x = jnp.zeros(shape)
-    # y = jnp.ones(shape)
-    # should_reset = jnp.array([False, True])
-    # v = jnp.where(should_reset, x, y)
-    # for batch_entry in range(shape[0]):
-    #   print("batch_entry {}:\n".format(batch_entry), v[batch_entry])
-    #
-    # >> batch_entry 0:
-    # >>  [[1. 0.]
-    # >>  [1. 0.]]
-    # >> batch_entry 1:
-    # >>  [[1. 0.]
-    # >>  [1. 0.]]
-    #
-    # Note how manually padding the should_reset tensor yields the desired
-    # behavior.
-    #
-    # import jax
-    # import jax.numpy as jnp
-    #
-    # shape = (2, 2, 2)
-    # x = jnp.zeros(shape)
-    # y = jnp.ones(shape)
-    # should_reset = jnp.array([False, True])
-    # dims_to_add = x.ndim - should_reset.ndim
-    # should_reset = should_reset.reshape(should_reset.shape + (1,)*dims_to_add)
-    # v = jnp.where(should_reset, x, y)
-    # for batch_entry in range(shape[0]):
-    #   print("batch_entry {}:\n".format(batch_entry), v[batch_entry])
-    #
-    # >> batch_entry 0:
-    # >>  [[1. 1.]
-    # >>  [1. 1.]]
-    # >> batch_entry 1:
-    # >>  [[0. 0.]
-    # >>  [0. 0.]]
-    should_reset = jax.tree_multimap(_validate_and_conform, should_reset, state)
-    if self._is_batched(state):
+    should_reset = _conform_should_reset(should_reset, state)
+    if _is_batched(self, state):
       batch_size = jax.tree_leaves(inputs)[0].shape[0]
     else:
       batch_size = None
@@ -688,12 +1298,6 @@ class ResetCore(RNNCore):
   def initial_state(self, batch_size: Optional[int]):
     return self.core.initial_state(batch_size)
 
-  def _is_batched(self, state):
-    state = jax.tree_leaves(state)
-    if not state:  # Empty state is treated as unbatched.
-      return False
-    batched = jax.tree_leaves(self.initial_state(batch_size=1))
-    return all(b.shape[1:] == s.shape[1:] for b, s in zip(batched, state))
 
 
 class _DeepRNN(RNNCore):
@@ -794,3 +1398,172 @@ def deep_rnn_with_skip_connections(layers: Sequence[RNNCore],
     ValueError: If any of the layers is not an :class:`RNNCore`.
   """
   return _DeepRNN(layers, skip_connections=True, name=name)
+
+
+def pipelined_unroll(core,
+                     input_sequence,
+                     initial_state,
+                     time_major=True):
+  """Performs a pipelined (wavefront) dynamic unroll of a :class:`DeepRNN`.
+
+  A :func:`dynamic_unroll` of a :class:`DeepRNN` with ``L`` recurrent layers
+  runs ``L * T`` layer steps one after the other. Since layer ``l`` at time
+  ``t`` only depends on layer ``l`` at time ``t - 1`` and layer ``l - 1`` at
+  time ``t``, all layers can instead be stepped together, with layer ``l``
+  processing time ``t`` while layer ``l + 1`` processes time ``t - 1``. This
+  reduces the number of sequential steps to ``T + L - 1`` and gives the
+  compiler ``L`` independent layer steps to run in parallel on each of them::
+
+      wave 0:  layer0(t=0)
+      wave 1:  layer0(t=1)  layer1(t=0)
+      wave 2:  layer0(t=2)  layer1(t=1)  layer2(t=0)
+      ...
+
+  The result is the same as ``dynamic_unroll(core, ...)``.
+
+  >>> core = hk.DeepRNN([hk.LSTM(8), jax.nn.relu, hk.LSTM(8)])
+  >>> xs = jnp.ones([100, 4, 2])
+  >>> outs, state = hk.experimental.pipelined_unroll(
+  ...     core, xs, core.initial_state(4))
+  >>> outs.shape
+  (100, 4, 8)
+
+  Args:
+    core: A :class:`DeepRNN` (or the result of
+      :func:`deep_rnn_with_skip_connections`) to unroll.
+    input_sequence: An arbitrarily nested structure of tensors of shape
+      ``[T, ...]`` if time-major=True, or ``[B, T, ...]`` if time_major=False,
+      where ``T`` is the number of time steps.
+    initial_state: An initial state of the given core.
+    time_major: If True, inputs are expected time-major, otherwise they are
+      expected batch-major.
+
+  Returns:
+    A tuple with two elements:
+      * **output_sequence** - An arbitrarily nested structure of tensors
+        of shape ``[T, ...]`` if time-major, otherwise ``[B, T, ...]``.
+      * **final_state** - Core state at time step ``T``.
+
+  Raises:
+    TypeError: If ``core`` is not a :class:`DeepRNN`.
+  """
+  if not isinstance(core, _DeepRNN):
+    raise TypeError(
+        f"pipelined_unroll requires a DeepRNN, got {type(core).__name__}.")
+
+  # Each stage is a recurrent layer with any callables preceding it.
+  stages = []
+  fns = []
+  for layer in core.layers:
+    if isinstance(layer, RNNCore):
+      stages.append((tuple(fns), layer))
+      fns = []
+    else:
+      fns.append(layer)
+  final_fns = tuple(fns)
+  num_stages = len(stages)
+  if num_stages < 2:
+    return dynamic_unroll(core, input_sequence, initial_state,
+                          time_major=time_major)
+
+  if not time_major:
+    input_sequence = _swap_batch_time(input_sequence)
+  num_steps = jax.tree_leaves(input_sequence)[0].shape[0]
+  concat = lambda *args: jnp.concatenate(args, axis=-1)
+  skip_connections = core.skip_connections
+  last = num_stages - 1
+
+  def run_stage(i, inputs, prev_outputs, state):
+    """Runs stage ``i`` given the core inputs and outputs of stage ``i-1``."""
+    if i == 0:
+      x = inputs
+    elif skip_connections:
+      x = jax.tree_multimap(concat, inputs, prev_outputs)
+    else:
+      x = prev_outputs
+    fns, layer = stages[i]
+    for fn in fns:
+      x = fn(x)
+    x, state = layer(x, state)
+    if i == last:
+      for fn in final_fns:
+        x = fn(x)
+    return x, state
+
+  def wave(active, inputs, outputs, states):
+    """Runs the active stages given outputs from the previous wavefront."""
+    outputs, states = list(outputs), list(states)
+    new_outputs = list(outputs)
+    for i in active:
+      new_outputs[i], states[i] = run_stage(
+          i, inputs[i], outputs[i - 1] if i else None, states[i])
+    return tuple(new_outputs), tuple(states)
+
+  def stage_inputs(wave_idx, active):
+    if skip_connections:
+      stages_using_inputs = active
+    else:
+      stages_using_inputs = [i for i in active if i == 0]
+    return [jax.tree_map(lambda x, t=wave_idx - i: x[t], input_sequence)
+            if i in stages_using_inputs else None
+            for i in range(num_stages)]
+
+  # NOTE: We run static waves while the pipeline fills (and drains), such that
+  # stages are only run on valid time steps, and scan over the waves where all
+  # stages are active.
+  states = tuple(initial_state)
+  outputs = (None,) * num_stages
+  stage_outputs = [[] for _ in range(num_stages)]
+
+  def static_wave(wave_idx, outputs, states):
+    active = [i for i in range(num_stages) if 0 <= wave_idx - i < num_steps]
+    outputs, states = wave(active, stage_inputs(wave_idx, active), outputs,
+                           states)
+    for i in active:
+      stage_outputs[i].append(
+          jax.tree_map(lambda x: jnp.expand_dims(x, 0), outputs[i]))
+    return outputs, states
+
+  first_full_wave, last_full_wave = last, num_steps - 1
+  for wave_idx in range(min(first_full_wave, num_steps + last)):
+    outputs, states = static_wave(wave_idx, outputs, states)
+
+  if first_full_wave <= last_full_wave:
+    all_stages = tuple(range(num_stages))
+    scan = hk.scan if inside_transform() else jax.lax.scan
+
+    def scan_f(carry, inputs):
+      # Only outputs consumed by the next wave are carried.
+      outputs, states = carry
+      outputs, states = wave(all_stages, inputs, outputs + (None,), states)
+      if skip_connections:
+        ys = outputs
+      else:
+        ys = (outputs[last],)
+      return (outputs[:last], states), ys
+
+    xs = [jax.tree_map(lambda x, i=i: x[first_full_wave - i:num_steps - i],
+                       input_sequence)
+          if skip_connections or i == 0 else None
+          for i in range(num_stages)]
+    (outputs, states), ys = scan(scan_f, (outputs[:last], states), xs)
+    outputs += (None,)
+    for i, y in zip(all_stages if skip_connections else (last,), ys):
+      stage_outputs[i].append(y)
+
+  for wave_idx in range(max(first_full_wave, last_full_wave + 1),
+                        num_steps + last):
+    outputs, states = static_wave(wave_idx, outputs, states)
+
+  def stack(chunks):
+    return jax.tree_multimap(lambda *args: jnp.concatenate(args), *chunks)
+
+  if skip_connections:
+    output_sequence = jax.tree_multimap(
+        concat, *[stack(chunks) for chunks in stage_outputs])
+  else:
+    output_sequence = stack(stage_outputs[last])
+
+  if not time_major:
+    output_sequence = _swap_batch_time(output_sequence)
+  return output_sequence, states
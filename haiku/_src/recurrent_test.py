@@ -16,7 +16,9 @@
 import itertools as it
 from absl.testing import absltest
 from absl.testing import parameterized
+from haiku._src import base
 from haiku._src import basic
+from haiku._src import module
 from haiku._src import recurrent
 from haiku._src import test_utils
 from haiku._src import transform
@@ -387,6 +389,63 @@ class ResetCoreTest(parameterized.TestCase):
       core((state, reset), state)
 
 
+class _CountingCore(_IncrementByOneCore):
+
+  def __init__(self, name=None):
+    super().__init__(name=name)
+    self.num_initial_state_calls = 0
+
+  def initial_state(self, batch_size):
+    self.num_initial_state_calls += 1
+    return super().initial_state(batch_size)
+
+
+class UnrollResetTest(parameterized.TestCase):
+
+  @parameterized.product(
+      unroll=(recurrent.dynamic_unroll, recurrent.static_unroll),
+      time_major=(True, False))
+  @test_utils.transform_and_run
+  def test_matches_reset_core(self, unroll, time_major):
+    core = recurrent.LSTM(4)
+    inputs = np.random.RandomState(42).randn(5, 3, 2)
+    should_reset = np.zeros([5, 3], dtype=bool)
+    should_reset[2, 0] = should_reset[4, 1] = True
+    if not time_major:
+      inputs = np.swapaxes(inputs, 0, 1)
+      should_reset = should_reset.T
+    state = core.initial_state(3)
+
+    expected = static_unroll_with_states(
+        recurrent.ResetCore(core),
+        jax.tree_map(lambda x: x if time_major else jnp.swapaxes(x, 0, 1),
+                     (inputs, should_reset)),
+        state)[0]
+    if not time_major:
+      expected = jnp.swapaxes(expected, 0, 1)
+
+    outputs, _ = unroll(core, inputs, state, time_major=time_major,
+                        should_reset=should_reset)
+    np.testing.assert_allclose(outputs, expected, rtol=1e-5, atol=1e-6)
+    outputs, _ = unroll(recurrent.ResetCore(core), (inputs, should_reset),
+                        state, time_major=time_major)
+    np.testing.assert_allclose(outputs, expected, rtol=1e-5, atol=1e-6)
+
+  @parameterized.parameters(recurrent.dynamic_unroll, recurrent.static_unroll)
+  @test_utils.transform_and_run(run_apply=False)
+  def test_reset_state_computed_once(self, unroll):
+    core = _CountingCore()
+    state = core.initial_state(2)
+    core.num_initial_state_calls = 0
+    should_reset = jnp.array([[False, True]] * 8)
+    outputs, _ = unroll(recurrent.ResetCore(core),
+                        (jnp.zeros([8, 2, 1]), should_reset), state)
+    np.testing.assert_array_equal(outputs[:, 0, 0], np.arange(1, 9))
+    np.testing.assert_array_equal(outputs[:, 1, 0], 1)
+    # Once to check if the state is batched and once for the reset state.
+    self.assertEqual(core.num_initial_state_calls, 2)
+
+
 class IdentityCoreTest(parameterized.TestCase):
 
   @test_utils.transform_and_run
@@ -484,5 +543,439 @@ class BatchMajorUnrollTest(parameterized.TestCase):
         time_major_outputs, batch_major_outputs)
 
 
+class SequenceLengthTest(parameterized.TestCase):
+
+  UNROLLS = (recurrent.dynamic_unroll, recurrent.static_unroll)
+
+  @parameterized.parameters(
+      (recurrent.dynamic_unroll, [6, 2, 0]),
+      (recurrent.dynamic_unroll, [3, 1, 2]),
+      (recurrent.static_unroll, [6, 2, 0]),
+      (recurrent.static_unroll, [3, 1, 2]))
+  @test_utils.transform_and_run
+  def test_matches_per_example_unroll(self, unroll, sequence_length):
+    core = recurrent.LSTM(4)
+    num_steps, batch_size = 6, len(sequence_length)
+    inputs = np.random.RandomState(42).randn(num_steps, batch_size, 2)
+    initial_state = jax.tree_map(
+        lambda x: x + 1., core.initial_state(batch_size))
+
+    outputs, final_state = unroll(core, inputs, initial_state,
+                                  sequence_length=jnp.array(sequence_length))
+
+    for b, length in enumerate(sequence_length):
+      state_b = jax.tree_map(lambda x, b=b: x[b:b + 1], initial_state)
+      if not length:
+        jax.tree_multimap(
+            lambda x, y, b=b: np.testing.assert_array_equal(x[b:b + 1], y),
+            final_state, state_b)
+        np.testing.assert_array_equal(outputs[:, b], 0.)
+        continue
+      outputs_b, final_state_b = unroll(core, inputs[:length, b:b + 1],
+                                        state_b)
+      jax.tree_multimap(
+          lambda x, y, b=b: np.testing.assert_allclose(x[b:b + 1], y,
+                                                       rtol=1e-5),
+          final_state, final_state_b)
+      np.testing.assert_allclose(outputs[:length, b:b + 1], outputs_b,
+                                 rtol=1e-5)
+      np.testing.assert_array_equal(outputs[length:, b], 0.)
+
+  @parameterized.parameters(*UNROLLS)
+  @test_utils.transform_and_run
+  def test_batch_major(self, unroll):
+    core = recurrent.LSTM(4)
+    inputs = np.random.randn(3, 5, 2)
+    sequence_length = jnp.array([5, 1, 3])
+    initial_state = core.initial_state(3)
+    time_major_outputs, time_major_state = unroll(
+        core, jnp.swapaxes(inputs, 0, 1), initial_state,
+        sequence_length=sequence_length)
+    batch_major_outputs, batch_major_state = unroll(
+        core, inputs, initial_state, time_major=False,
+        sequence_length=sequence_length)
+    jax.tree_multimap(np.testing.assert_allclose,
+                      time_major_state, batch_major_state)
+    np.testing.assert_allclose(time_major_outputs,
+                               jnp.swapaxes(batch_major_outputs, 0, 1))
+
+  @test_utils.transform_and_run
+  def test_reversed_dynamic_unroll(self):
+    core = recurrent.VanillaRNN(4)
+    inputs = np.random.randn(5, 2, 3)
+    sequence_length = jnp.array([2, 4])
+    initial_state = core.initial_state(2)
+    outputs, final_state = recurrent.dynamic_unroll(
+        core, inputs, initial_state, reverse=True,
+        sequence_length=sequence_length)
+    for b, length in enumerate([2, 4]):
+      outputs_b, final_state_b = recurrent.dynamic_unroll(
+          core, inputs[:length, b:b + 1], initial_state[b:b + 1],
+          reverse=True)
+      np.testing.assert_allclose(final_state[b:b + 1], final_state_b,
+                                 rtol=1e-5)
+      np.testing.assert_allclose(outputs[:length, b:b + 1], outputs_b,
+                                 rtol=1e-5)
+
+  @parameterized.parameters(*UNROLLS)
+  def test_unroll_outside_transform(self, unroll):
+    core = lambda x, s: (x + 1, s + x)
+    seqs = jnp.ones([4, 3])
+    f = jax.jit(lambda seqs, lengths: unroll(core, seqs, jnp.zeros([3]),
+                                             sequence_length=lengths))
+    outs, state = f(seqs, jnp.array([1, 3, 2]))
+    np.testing.assert_allclose(state, [1, 3, 2])
+    np.testing.assert_allclose(outs[:, 0], [2, 0, 0, 0])
+    np.testing.assert_allclose(outs[:, 1], [2, 2, 2, 0])
+
+  @parameterized.parameters(*UNROLLS)
+  def test_grad(self, unroll):
+    def loss(inputs, sequence_length):
+      core = recurrent.GRU(4)
+      outputs, state = unroll(core, inputs, core.initial_state(2),
+                              sequence_length=sequence_length)
+      return jnp.sum(outputs) + jnp.sum(state)
+
+    f = transform.transform(loss)
+    inputs = np.random.randn(5, 2, 3)
+    sequence_length = jnp.array([2, 3])
+    params = f.init(jax.random.PRNGKey(42), inputs, sequence_length)
+    grad_inputs = jax.jit(jax.grad(f.apply, argnums=2))(
+        params, None, inputs, sequence_length)
+    # Inputs past the end of each sequence do not contribute to the loss.
+    np.testing.assert_array_equal(grad_inputs[2:, 0], 0.)
+    np.testing.assert_array_equal(grad_inputs[3:, 1], 0.)
+    self.assertTrue(np.all(np.abs(grad_inputs[:2, 0]) > 0.))
+
+
+class TruncatedUnrollTest(parameterized.TestCase):
+
+  @parameterized.product(num_steps=(6, 7, 2), time_major=(True, False))
+  @test_utils.transform_and_run
+  def test_matches_dynamic_unroll(self, num_steps, time_major):
+    core = recurrent.LSTM(4)
+    inputs = np.random.RandomState(42).randn(num_steps, 2, 3)
+    if not time_major:
+      inputs = np.swapaxes(inputs, 0, 1)
+    initial_state = core.initial_state(2)
+    expected = recurrent.dynamic_unroll(core, inputs, initial_state,
+                                        time_major=time_major)
+    actual = recurrent.truncated_unroll(core, inputs, initial_state,
+                                        chunk_size=3, time_major=time_major)
+    jax.tree_multimap(
+        lambda x, y: np.testing.assert_allclose(x, y, rtol=1e-5, atol=1e-6),
+        actual, expected)
+
+  @test_utils.transform_and_run
+  def test_iterator(self):
+    core = recurrent.GRU(4)
+    inputs = np.random.RandomState(42).randn(7, 2, 3)
+    initial_state = core.initial_state(2)
+    expected = recurrent.truncated_unroll(core, inputs, initial_state,
+                                          chunk_size=3)
+    chunks = (inputs[i:i + 3] for i in range(0, 7, 3))
+    actual = recurrent.truncated_unroll(core, chunks, initial_state,
+                                        chunk_size=3)
+    jax.tree_multimap(
+        lambda x, y: np.testing.assert_allclose(x, y, rtol=1e-5, atol=1e-6),
+        actual, expected)
+
+  def test_gradients_truncated(self):
+    def f(inputs):
+      core = recurrent.VanillaRNN(4)
+      outputs, _ = recurrent.truncated_unroll(
+          core, inputs, core.initial_state(2), chunk_size=3)
+      return jnp.sum(outputs[-1])
+
+    f = transform.transform(f)
+    inputs = np.random.RandomState(42).randn(8, 2, 3).astype(np.float32)
+    params = f.init(jax.random.PRNGKey(42), inputs)
+    grad_inputs = jax.grad(f.apply, argnums=2)(params, None, inputs)
+    # The last output is in the chunk starting at step 6.
+    np.testing.assert_array_equal(grad_inputs[:6], 0.)
+    self.assertTrue(np.any(grad_inputs[6:] != 0.))
+
+  @test_utils.transform_and_run
+  def test_invalid_chunk_size(self):
+    core = recurrent.LSTM(4)
+    with self.assertRaisesRegex(ValueError, "chunk_size must be positive"):
+      recurrent.truncated_unroll(core, jnp.ones([3, 1, 2]),
+                                 core.initial_state(1), chunk_size=0)
+
+
+class RematUnrollTest(parameterized.TestCase):
+
+  @parameterized.product(
+      remat=(True, "segment"), reverse=(True, False),
+      sequence_length=(None, (7, 2)), time_major=(True, False))
+  def test_matches_dynamic_unroll(self, remat, reverse, sequence_length,
+                                  time_major):
+    if sequence_length is not None:
+      sequence_length = jnp.array(sequence_length)
+
+    def f(inputs, remat):
+      core = recurrent.LSTM(4)
+      outputs, state = recurrent.dynamic_unroll(
+          core, inputs, core.initial_state(2), time_major=time_major,
+          reverse=reverse, sequence_length=sequence_length, remat=remat)
+      return jnp.sum(outputs ** 2) + jnp.sum(state.cell)
+
+    f = transform.transform(f)
+    inputs = np.random.RandomState(42).randn(7, 2, 3).astype(np.float32)
+    if not time_major:
+      inputs = np.swapaxes(inputs, 0, 1)
+    rng = jax.random.PRNGKey(42)
+    params = f.init(rng, inputs, False)
+    jax.tree_multimap(np.testing.assert_array_equal,
+                      f.init(rng, inputs, remat), params)
+
+    grad_fn = jax.jit(jax.value_and_grad(f.apply), static_argnums=3)
+    expected = grad_fn(params, None, inputs, False)
+    actual = grad_fn(params, None, inputs, remat)
+    jax.tree_multimap(
+        lambda x, y: np.testing.assert_allclose(x, y, rtol=1e-5, atol=1e-6),
+        actual, expected)
+
+  @parameterized.parameters(True, "segment")
+  def test_outside_transform(self, remat):
+    core = lambda x, s: (x * s, s + x)
+    inputs = jnp.arange(1., 6.)
+    expected = recurrent.dynamic_unroll(core, inputs, 1.)
+    actual = recurrent.dynamic_unroll(core, inputs, 1., remat=remat)
+    jax.tree_multimap(np.testing.assert_allclose, actual, expected)
+
+  @test_utils.transform_and_run
+  def test_invalid_remat(self):
+    core = recurrent.LSTM(4)
+    with self.assertRaisesRegex(ValueError, "remat must be"):
+      recurrent.dynamic_unroll(core, jnp.ones([3, 1, 2]),
+                               core.initial_state(1), remat="step")
+
+
+class DoubleInputLSTM(recurrent.LSTM):
+
+  def __call__(self, inputs, prev_state):
+    if not isinstance(inputs, recurrent.ProjectedInputs):
+      inputs = 2 * inputs
+    return super().__call__(inputs, prev_state)
+
+  def input_projection(self, inputs):
+    return super().input_projection(2 * inputs)
+
+
+class InputProjectionTest(parameterized.TestCase):
+
+  @parameterized.parameters(
+      *it.product((recurrent.LSTM, recurrent.GRU, DoubleInputLSTM),
+                  (recurrent.static_unroll, recurrent.dynamic_unroll)))
+  def test_matches_manual_unroll(self, core_cls, unroll):
+    def manual_unroll(inputs):
+      core = core_cls(4)
+      state = core.initial_state(2)
+      outputs = []
+      for x in inputs:
+        output, state = core(x, state)
+        outputs.append(output)
+      return jnp.stack(outputs), state
+
+    def unrolled(inputs):
+      core = core_cls(4)
+      return unroll(core, inputs, core.initial_state(2))
+
+    manual_unroll = transform.transform(manual_unroll)
+    unrolled = transform.transform(unrolled)
+    inputs = np.random.RandomState(42).randn(5, 2, 3).astype(np.float32)
+    rng = jax.random.PRNGKey(42)
+
+    params = manual_unroll.init(rng, inputs)
+    jax.tree_multimap(np.testing.assert_array_equal,
+                      unrolled.init(rng, inputs), params)
+    jax.tree_multimap(
+        lambda x, y: np.testing.assert_allclose(x, y, rtol=1e-5, atol=1e-6),
+        unrolled.apply(params, None, inputs),
+        manual_unroll.apply(params, None, inputs))
+
+  @parameterized.parameters(recurrent.LSTM, recurrent.GRU)
+  @test_utils.transform_and_run
+  def test_projected_inputs(self, core_cls):
+    core = core_cls(4)
+    inputs = jnp.ones([2, 3])
+    state = core.initial_state(2)
+    expected = core(inputs, state)
+    actual = core(recurrent.ProjectedInputs(core.input_projection(inputs)),
+                  state)
+    jax.tree_multimap(
+        lambda x, y: np.testing.assert_allclose(x, y, rtol=1e-5, atol=1e-6),
+        actual, expected)
+
+  @parameterized.parameters(recurrent.LSTM, recurrent.GRU)
+  def test_projected_inputs_in_fresh_module(self, core_cls):
+    def f(inputs):
+      core = core_cls(4)
+      return core(inputs, core.initial_state(2))
+
+    def project(inputs):
+      return core_cls(4).input_projection(inputs)
+
+    def step(projected):
+      core = core_cls(4)
+      return core(recurrent.ProjectedInputs(projected), core.initial_state(2))
+
+    f = transform.transform(f)
+    project = transform.transform(project)
+    step = transform.transform(step)
+    inputs = jnp.ones([2, 3])
+    params = f.init(jax.random.PRNGKey(42), inputs)
+    # Inputs are projected outside of the module they are passed to.
+    projected = project.apply(params, None, inputs)
+    jax.tree_multimap(
+        lambda x, y: np.testing.assert_allclose(x, y, rtol=1e-5, atol=1e-6),
+        step.apply(params, None, projected), f.apply(params, None, inputs))
+
+  @test_utils.transform_and_run
+  def test_lstm_projected_inputs_different_input_sizes(self):
+    core = recurrent.LSTM(4)
+    state = core.initial_state(2)
+    core(jnp.ones([2, 3]), state)
+    # A second module with a different input size.
+    other = recurrent.LSTM(4)
+    other(jnp.ones([2, 5]), state)
+    inputs = jnp.ones([2, 3])
+    jax.tree_multimap(
+        lambda x, y: np.testing.assert_allclose(x, y, rtol=1e-5, atol=1e-6),
+        core(recurrent.ProjectedInputs(core.input_projection(inputs)), state),
+        core(inputs, state))
+
+  @test_utils.transform_and_run
+  def test_lstm_projected_inputs_without_params(self):
+    core = recurrent.LSTM(4)
+    with self.assertRaisesRegex(ValueError, "requires the parameters"):
+      core(recurrent.ProjectedInputs(jnp.ones([2, 16])), core.initial_state(2))
+
+  @parameterized.parameters(recurrent.LSTM, recurrent.GRU)
+  @test_utils.transform_and_run
+  def test_unroll_calls_core(self, core_cls):
+    core = core_cls(4)
+    method_names = []
+
+    def interceptor(f, args, kwargs, context):
+      if context.module is core:
+        method_names.append(context.method_name)
+      return f(*args, **kwargs)
+
+    with module.intercept_methods(interceptor):
+      recurrent.static_unroll(core, jnp.ones([3, 2, 5]), core.initial_state(2))
+    self.assertEqual(method_names,
+                     ["initial_state", "input_projection"] + ["__call__"] * 3)
+
+
+class DiagonalLinearRNN(recurrent.LinearTransitionCore):
+
+  def __init__(self, hidden_size, name=None):
+    super().__init__(name=name)
+    self.hidden_size = hidden_size
+
+  def __call__(self, inputs, prev_state):
+    a, b = self.linear_transition(inputs)
+    state = a * prev_state + b
+    return self.linear_output(inputs, state), state
+
+  def initial_state(self, batch_size):
+    return jnp.zeros([batch_size, self.hidden_size])
+
+  def linear_transition(self, inputs):
+    a = jax.nn.sigmoid(base.get_parameter(
+        "a", [self.hidden_size], init=jnp.ones))
+    b = basic.Linear(self.hidden_size)(inputs)
+    return a, b
+
+  def linear_output(self, inputs, state):
+    return jnp.tanh(state) + inputs[..., :1]
+
+
+class AssociativeUnrollTest(parameterized.TestCase):
+
+  @parameterized.product(time_major=(True, False), reverse=(True, False))
+  @test_utils.transform_and_run
+  def test_matches_dynamic_unroll(self, time_major, reverse):
+    core = DiagonalLinearRNN(4)
+    inputs = np.random.RandomState(42).randn(7, 3, 2).astype(np.float32)
+    if not time_major:
+      inputs = np.swapaxes(inputs, 0, 1)
+    initial_state = jnp.ones([3, 4])
+    expected = recurrent.dynamic_unroll(core, inputs, initial_state,
+                                        time_major=time_major,
+                                        reverse=reverse)
+    actual = recurrent.associative_unroll(core, inputs, initial_state,
+                                          time_major=time_major,
+                                          reverse=reverse)
+    jax.tree_multimap(
+        lambda x, y: np.testing.assert_allclose(x, y, rtol=1e-5, atol=1e-5),
+        actual, expected)
+
+  @test_utils.transform_and_run
+  def test_identity_core(self):
+    core = recurrent.IdentityCore()
+    inputs = jnp.arange(6.).reshape([3, 2])
+    outputs, state = recurrent.associative_unroll(core, inputs, ())
+    np.testing.assert_array_equal(outputs, inputs)
+    self.assertEqual(state, ())
+
+  @test_utils.transform_and_run
+  def test_not_linear(self):
+    core = recurrent.LSTM(4)
+    with self.assertRaisesRegex(TypeError, "LinearTransitionCore"):
+      recurrent.associative_unroll(core, jnp.ones([3, 1, 2]),
+                                   core.initial_state(1))
+
+
+class PipelinedUnrollTest(parameterized.TestCase):
+
+  @parameterized.product(num_steps=(1, 2, 7), time_major=(True, False))
+  def test_matches_dynamic_unroll(self, num_steps, time_major):
+    def f(inputs, pipelined):
+      core = recurrent.DeepRNN([
+          basic.Linear(5), recurrent.LSTM(3), jax.nn.relu, recurrent.GRU(4),
+          recurrent.VanillaRNN(2), jnp.tanh])
+      unroll = (recurrent.pipelined_unroll if pipelined
+                else recurrent.dynamic_unroll)
+      return unroll(core, inputs, core.initial_state(2),
+                    time_major=time_major)
+
+    self.assert_matches_dynamic_unroll(f, num_steps, time_major)
+
+  @parameterized.parameters(1, 2, 7)
+  def test_skip_connections(self, num_steps):
+    def f(inputs, pipelined):
+      core = recurrent.deep_rnn_with_skip_connections([
+          recurrent.LSTM(3), recurrent.GRU(4), recurrent.VanillaRNN(2)])
+      unroll = (recurrent.pipelined_unroll if pipelined
+                else recurrent.dynamic_unroll)
+      return unroll(core, inputs, core.initial_state(2))
+
+    self.assert_matches_dynamic_unroll(f, num_steps, time_major=True)
+
+  def assert_matches_dynamic_unroll(self, f, num_steps, time_major):
+    f = transform.transform(f)
+    shape = [num_steps, 2, 3] if time_major else [2, num_steps, 3]
+    inputs = np.random.RandomState(42).randn(*shape).astype(np.float32)
+    rng = jax.random.PRNGKey(42)
+    params = f.init(rng, inputs, False)
+    jax.tree_multimap(np.testing.assert_array_equal,
+                      f.init(rng, inputs, True), params)
+    expected = f.apply(params, None, inputs, False)
+    actual = jax.jit(f.apply, static_argnums=3)(params, None, inputs, True)
+    jax.tree_multimap(
+        lambda x, y: np.testing.assert_allclose(x, y, rtol=1e-5, atol=1e-5),
+        actual, expected)
+
+  @test_utils.transform_and_run
+  def test_not_deep_rnn(self):
+    core = recurrent.LSTM(4)
+    with self.assertRaisesRegex(TypeError, "requires a DeepRNN"):
+      recurrent.pipelined_unroll(core, jnp.ones([3, 1, 2]),
+                                 core.initial_state(1))
+
+
 if __name__ == "__main__":
   absltest.main()
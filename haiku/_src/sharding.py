@@ -0,0 +1,215 @@
+# Copyright 2021 DeepMind Technologies Limited. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Initializes parameters in shards across devices or into host memory."""
+
+import contextlib
+import types
+from typing import Any, Callable, Optional, Sequence
+
+from haiku._src import base
+from haiku._src import initializers
+import jax
+import numpy as np
+
+# If you are forking replace this with `import haiku as hk`.
+hk = types.ModuleType("haiku")
+hk.custom_creator = base.custom_creator
+hk.GetterContext = base.GetterContext
+hk.initializers = initializers
+del base, initializers
+
+# Given the context for a parameter returns the axis to shard it along (or
+# `None` if the parameter should be created as normal).
+ShardingRule = Callable[[hk.GetterContext], Optional[int]]
+
+# These initializers derive their values from the full shape of the parameter,
+# so creating them one shard at a time would change their distribution.
+SHAPE_DEPENDENT_INITIALIZERS = (
+    hk.initializers.Identity,
+    hk.initializers.Orthogonal,
+    hk.initializers.UniformScaling,
+    hk.initializers.VarianceScaling,
+)
+
+SHARD_AXIS_NAME = "shards"
+
+
+def shard_shape(
+    context: hk.GetterContext,
+    shape: Sequence[int],
+    axis: int,
+    num_shards: int,
+) -> Sequence[int]:
+  """Returns the shape of a single shard, checking ``shape`` is divisible."""
+  if not -len(shape) <= axis < len(shape):
+    raise ValueError(f"Cannot shard {context.full_name!r} with shape {shape} "
+                     f"along axis {axis}.")
+  axis %= len(shape)
+  if shape[axis] % num_shards:
+    raise ValueError(f"Cannot shard {context.full_name!r} with shape {shape} "
+                     f"into {num_shards} shards along axis {axis}, the size "
+                     "of the axis must be divisible by the number of shards.")
+  shape = list(shape)
+  shape[axis] //= num_shards
+  return shape
+
+
+def assemble_on_devices(shape, axis, shards, devices) -> jax.Array:
+  """Returns a single array with one shard on each device."""
+  if not hasattr(jax, "make_array_from_single_device_arrays"):
+    raise NotImplementedError(
+        "Sharding parameters across devices requires a version of JAX with "
+        "`jax.make_array_from_single_device_arrays`, use `host_chunks=...` to "
+        "stream parameters into host memory instead.")
+  mesh = jax.sharding.Mesh(np.asarray(devices), (SHARD_AXIS_NAME,))
+  spec = [None] * len(shape)
+  spec[axis] = SHARD_AXIS_NAME
+  sharding = jax.sharding.NamedSharding(mesh, jax.sharding.PartitionSpec(*spec))
+  return jax.make_array_from_single_device_arrays(tuple(shape), sharding,
+                                                  shards)
+
+
+def sharded_creator(
+    rule: ShardingRule,
+    *,
+    devices: Optional[Sequence[Any]] = None,
+    host_chunks: Optional[int] = None,
+):
+  """Returns a creator that initializes parameters one shard at a time.
+
+  See :func:`sharded_init` for details.
+
+  Args:
+    rule: A function taking a :class:`~haiku.GetterContext` and returning the
+      axis to shard along, or ``None`` to create the parameter as normal.
+    devices: The devices to shard parameters across, defaults to
+      :func:`jax.local_devices`.
+    host_chunks: If set then instead of placing shards on ``devices``,
+      parameters are created in this many chunks which are copied into host
+      memory one at a time.
+
+  Returns:
+    A creator suitable for use with :func:`~haiku.custom_creator`.
+  """
+  if host_chunks is not None and host_chunks < 1:
+    raise ValueError(f"host_chunks must be positive, got {host_chunks}.")
+
+  def creator(next_creator, shape, dtype, init, context: hk.GetterContext):
+    axis = rule(context)
+    if axis is None:
+      return next_creator(shape, dtype, init)
+
+    if isinstance(init, SHAPE_DEPENDENT_INITIALIZERS):
+      raise ValueError(
+          f"Cannot shard {context.full_name!r} since it uses "
+          f"{type(init).__name__} which depends on the full parameter shape. "
+          "Exclude it from the sharding rule or use an elementwise "
+          "initializer (e.g. `hk.initializers.TruncatedNormal`).")
+
+    if host_chunks is not None:
+      num_shards = host_chunks
+      target_devices = None
+    else:
+      target_devices = devices if devices is not None else jax.local_devices()
+      num_shards = len(target_devices)
+
+    shard = shard_shape(context, shape, axis, num_shards)
+    axis %= len(shape)
+
+    out = None
+    shards = []
+    for i in range(num_shards):
+      value = next_creator(shard, dtype, init)
+      if isinstance(value, jax.core.Tracer):
+        raise ValueError(
+            f"Cannot shard {context.full_name!r} inside a JAX transform (e.g. "
+            "`jax.jit(f.init)`), sharded initialization must run eagerly.")
+      if target_devices is None:
+        # Copy each chunk straight into a preallocated host buffer so at most
+        # one chunk lives on device at a time and the parameter is never
+        # duplicated in host memory.
+        if out is None:
+          out = np.empty(shape, dtype=value.dtype)
+        index = [slice(None)] * len(shape)
+        index[axis] = slice(i * shard[axis], (i + 1) * shard[axis])
+        out[tuple(index)] = jax.device_get(value)
+      else:
+        shards.append(jax.device_put(value, target_devices[i]))
+      del value
+
+    if target_devices is None:
+      return out
+    else:
+      return assemble_on_devices(shape, axis, shards, target_devices)
+
+  return creator
+
+
+def sharded_init(
+    rule: ShardingRule,
+    *,
+    devices: Optional[Sequence[Any]] = None,
+    host_chunks: Optional[int] = None,
+) -> contextlib.AbstractContextManager:
+  """Creates parameters in shards, without materializing them on one device.
+
+  For each parameter created inside this context ``rule`` is called with the
+  :class:`~haiku.GetterContext` of the parameter and returns the axis to shard
+  along (or ``None`` to create the parameter as normal). Sharded parameters are
+  initialized one shard at a time by calling ``init`` with the shape of a
+  single shard, so at most one shard is materialized on the default device at
+  any time.
+
+  By default each shard is placed on one of :func:`jax.local_devices` and the
+  parameter is a single array partitioned across those devices:
+
+  >>> def f(ids):
+  ...   rule = lambda ctx: 0 if ctx.full_name == "embed/embeddings" else None
+  ...   with hk.experimental.sharded_init(rule):
+  ...     return hk.Embed(vocab_size=1024, embed_dim=16)(ids)
+  >>> f = hk.transform(f)
+  >>> params = f.init(jax.random.PRNGKey(42), jnp.zeros([1], jnp.int32))
+  >>> params["embed"]["embeddings"].shape
+  (1024, 16)
+
+  Alternatively with ``host_chunks=n`` parameters are created in ``n`` chunks
+  which are streamed into host memory (as :class:`numpy.ndarray`).
+
+  Since shards are initialized independently ``init`` must produce values
+  elementwise (e.g. :class:`~haiku.initializers.TruncatedNormal`, as used by
+  default in :class:`~haiku.Linear` and :class:`~haiku.Embed`). Initializers
+  that depend on the full shape (e.g.
+  :class:`~haiku.initializers.VarianceScaling`) are rejected. Sharded
+  initialization must run eagerly (i.e. not inside ``jax.jit(f.init)``).
+
+  Each shard draws its own RNG key from :func:`~haiku.next_rng_key`, so the
+  initial values of a sharded parameter differ from those created without
+  :func:`sharded_init` using the same seed (although they follow the same
+  distribution).
+
+  Args:
+    rule: A function taking a :class:`~haiku.GetterContext` and returning the
+      axis to shard along, or ``None`` to create the parameter as normal.
+    devices: The devices to shard parameters across, defaults to
+      :func:`jax.local_devices`.
+    host_chunks: If set then instead of placing shards on ``devices``,
+      parameters are created in this many chunks which are copied into host
+      memory one at a time.
+
+  Returns:
+    Context manager under which sharded initialization is active.
+  """
+  return hk.custom_creator(
+      sharded_creator(rule, devices=devices, host_chunks=host_chunks))
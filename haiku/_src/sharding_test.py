@@ -0,0 +1,160 @@
+# Copyright 2021 DeepMind Technologies Limited. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for haiku._src.sharding."""
+
+import os
+
+from absl.testing import absltest
+from absl.testing import parameterized
+from haiku._src import base
+from haiku._src import basic
+from haiku._src import embed
+from haiku._src import initializers
+from haiku._src import sharding
+from haiku._src import transform
+import jax
+import jax.numpy as jnp
+import numpy as np
+
+
+def counting_init(shape, dtype):
+  """Returns a shard filled with the number of times it was called."""
+  counting_init.count += 1
+  return jnp.full(shape, counting_init.count, dtype)
+
+
+def shard_all(context):
+  del context
+  return 0
+
+
+class ShardingTest(parameterized.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    counting_init.count = 0
+
+  def test_host_chunks(self):
+    def f():
+      with sharding.sharded_init(shard_all, host_chunks=4):
+        return base.get_parameter("w", [8, 2], init=counting_init)
+
+    params = transform.transform(f).init(None)
+    w = params["~"]["w"]
+    self.assertIsInstance(w, np.ndarray)
+    np.testing.assert_array_equal(w[:, 0], [1, 1, 2, 2, 3, 3, 4, 4])
+
+  def test_host_chunks_negative_axis(self):
+    def f():
+      with sharding.sharded_init(lambda _: -1, host_chunks=2):
+        return base.get_parameter("w", [1, 4], init=counting_init)
+
+    params = transform.transform(f).init(None)
+    np.testing.assert_array_equal(params["~"]["w"], [[1, 1, 2, 2]])
+
+  def test_devices(self):
+    devices = jax.local_devices()
+    num_devices = len(devices)
+    if num_devices < 2:
+      self.skipTest("Requires at least 2 devices, run with XLA_FLAGS="
+                    "--xla_force_host_platform_device_count=8.")
+
+    def f():
+      with sharding.sharded_init(shard_all, devices=devices):
+        return base.get_parameter("w", [num_devices * 2, 3],
+                                  init=counting_init)
+
+    f = transform.transform(f)
+    params = f.init(None)
+    w = params["~"]["w"]
+    self.assertEqual(w.shape, (num_devices * 2, 3))
+    self.assertLen(w.sharding.device_set, num_devices)
+    expected = np.repeat(np.arange(1, num_devices + 1), 2)
+    np.testing.assert_array_equal(np.asarray(w)[:, 0], expected)
+
+    # Sharded params can be used with apply.
+    out = jax.jit(f.apply)(params, None)
+    np.testing.assert_array_equal(out, w)
+
+  def test_rule_sees_context(self):
+    names = []
+
+    def rule(context):
+      names.append(context.full_name)
+      return 0 if context.name == "embeddings" else None
+
+    def f(x):
+      with sharding.sharded_init(rule, host_chunks=2):
+        return basic.Linear(3)(embed.Embed(4, 2)(x))
+
+    params = transform.transform(f).init(jax.random.PRNGKey(42),
+                                        jnp.zeros([1], jnp.int32))
+    self.assertEqual(names, ["embed/embeddings", "linear/w", "linear/b"])
+    self.assertIsInstance(params["embed"]["embeddings"], np.ndarray)
+    self.assertNotIsInstance(params["linear"]["w"], np.ndarray)
+
+  def test_rule_returning_none(self):
+    def f():
+      with sharding.sharded_init(lambda _: None, host_chunks=2):
+        return base.get_parameter("w", [3], init=counting_init)
+
+    params = transform.transform(f).init(None)
+    np.testing.assert_array_equal(params["~"]["w"], [1, 1, 1])
+
+  def test_not_divisible(self):
+    def f():
+      with sharding.sharded_init(shard_all, host_chunks=2):
+        return base.get_parameter("w", [3], init=counting_init)
+
+    with self.assertRaisesRegex(ValueError, "must be divisible"):
+      transform.transform(f).init(None)
+
+  def test_invalid_axis(self):
+    def f():
+      with sharding.sharded_init(lambda _: 1, host_chunks=2):
+        return base.get_parameter("w", [4], init=counting_init)
+
+    with self.assertRaisesRegex(ValueError, "along axis 1"):
+      transform.transform(f).init(None)
+
+  @parameterized.parameters(initializers.VarianceScaling(),
+                            initializers.Orthogonal(),
+                            initializers.UniformScaling())
+  def test_shape_dependent_initializer(self, init):
+    def f():
+      with sharding.sharded_init(shard_all, host_chunks=2):
+        return base.get_parameter("w", [4, 4], init=init)
+
+    with self.assertRaisesRegex(ValueError, "depends on the full parameter"):
+      transform.transform(f).init(jax.random.PRNGKey(42))
+
+  def test_inside_jit(self):
+    def f():
+      with sharding.sharded_init(shard_all, host_chunks=2):
+        return base.get_parameter("w", [4], init=counting_init)
+
+    with self.assertRaisesRegex(ValueError, "must run eagerly"):
+      jax.jit(transform.transform(f).init)(None)
+
+  def test_invalid_host_chunks(self):
+    with self.assertRaisesRegex(ValueError, "must be positive"):
+      sharding.sharded_creator(shard_all, host_chunks=0)
+
+if __name__ == "__main__":
+  _xla_flags = os.environ.get("XLA_FLAGS", "")
+  os.environ["XLA_FLAGS"] = (_xla_flags +
+                             " --xla_force_host_platform_device_count=8")
+
+  absltest.main()
@@ -18,11 +18,12 @@ import dataclasses
 import functools
 import pprint
 import types
-from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple, TypeVar, Union
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple, TypeVar, Union
 
 from haiku._src import base
 from haiku._src import data_structures
 from haiku._src import module as module_lib
+from haiku._src import stateful
 from haiku._src import transform
 from haiku._src import utils
 import jax
@@ -90,6 +91,25 @@ class ModuleDetails:
                          state=state)
 
 
+@dataclasses.dataclass(frozen=True)
+class InvocationCost:
+  """Estimated compute and memory cost of a method invocation.
+
+  Attributes:
+    flops: Floating point operations estimated by XLA for the method, excluding
+      methods called on other modules.
+    total_flops: Floating point operations estimated by XLA for the method,
+      including methods called on other modules.
+    output_bytes: Size in bytes of the arrays returned by the method.
+    total_output_bytes: Size in bytes of the arrays returned by the method
+      and all methods called on other modules.
+  """
+  flops: float
+  total_flops: float
+  output_bytes: int
+  total_output_bytes: int
+
+
 @dataclasses.dataclass(frozen=True)
 class MethodInvocation:
   """Record of a method being invoked on a given module.
@@ -107,6 +127,8 @@ class MethodInvocation:
     call_stack: Stack of modules currently active while calling this module
       method. For example if ``A`` calls ``B`` which calls ``C`` then the call
       stack for ``C`` will be ``[B_DETAILS, A_DETAILS]``.
+    cost: Estimated cost of the invocation, only populated if requested from
+      :func:`eval_summary`.
   """
 
   module_details: ModuleDetails
@@ -115,6 +137,7 @@ class MethodInvocation:
   output_spec: Any  # Actual: PyTree[Union[Any, ArraySpec]]
   context: hk.MethodContext
   call_stack: Sequence[ModuleDetails]
+  cost: Optional[InvocationCost] = None
 
 
 def get_call_stack() -> Sequence[ModuleDetails]:
@@ -132,27 +155,180 @@ def to_spec(tree):
 IGNORED_METHODS = ("__init__", "params_dict", "state_dict")
 
 
+def is_array(x) -> bool:
+  return isinstance(x, jnp.ndarray)
+
+
+def estimate_flops(f: Callable[..., Any], args, kwargs) -> float:
+  """Returns the FLOPs XLA estimates for ``f(*args, **kwargs)``.
+
+  ``f`` is staged out with the current Haiku state passed in explicitly, any
+  changes to Haiku state made by ``f`` are discarded.
+
+  Args:
+    f: A function to estimate the cost of.
+    args: Positional arguments to ``f``.
+    kwargs: Keyword arguments to ``f``.
+
+  Returns:
+    The estimated number of floating point operations.
+  """
+  leaves, treedef = jax.tree_flatten((args, kwargs))
+  dynamic = [is_array(x) for x in leaves]
+
+  def stateless_f(state, dynamic_leaves):
+    dynamic_leaves = iter(dynamic_leaves)
+    all_leaves = [next(dynamic_leaves) if d else x
+                  for x, d in zip(leaves, dynamic)]
+    args, kwargs = jax.tree_unflatten(treedef, all_leaves)
+    with stateful.temporary_internal_state(state):
+      out = f(*args, **kwargs)
+    # Only array outputs can be returned, returning them means they are not
+    # removed as dead code.
+    return [x for x in jax.tree_leaves(out) if is_array(x)]
+
+  to_struct = lambda x: jax.ShapeDtypeStruct(x.shape, x.dtype)
+  state = jax.tree_map(to_struct, stateful.internal_state())
+  dynamic_leaves = [to_struct(x) for x, d in zip(leaves, dynamic) if d]
+  lowered = jax.jit(stateless_f).lower(state, dynamic_leaves)
+  if hasattr(lowered, "cost_analysis"):
+    cost = lowered.cost_analysis()
+  else:
+    cost = lowered.compile().cost_analysis()
+  if isinstance(cost, (list, tuple)):
+    cost = cost[0] if cost else {}
+  return float((cost or {}).get("flops", 0.))
+
+
+def spec_bytes(tree) -> int:
+  return sum(x.size * np.dtype(x.dtype).itemsize
+             for x in jax.tree_leaves(tree) if isinstance(x, ArraySpec))
+
+
+@dataclasses.dataclass
+class CostTracker:
+  """Accumulates the cost of nested method invocations.
+
+  Attributes:
+    children: For each open method invocation, the total FLOPs and output
+      bytes of methods it has called on other modules.
+    child_outputs: For each open method invocation, the outputs of methods it
+      has called on other modules (in call order).
+    staged_outputs: While a method is being staged to estimate its cost, the
+      outputs to return from the methods it calls on other modules (instead of
+      calling them), otherwise ``None``.
+    staged_inputs: While a method is being staged to estimate its cost, the
+      arguments it passed to methods on other modules.
+  """
+  children: List[List[float]] = dataclasses.field(default_factory=list)
+  child_outputs: List[List[Any]] = dataclasses.field(default_factory=list)
+  staged_outputs: Optional[Iterator[Any]] = None
+  staged_inputs: List[Any] = dataclasses.field(default_factory=list)
+
+
+_NO_OUTPUT = object()
+
+
+def estimate_own_flops(
+    cost_tracker: CostTracker,
+    context: hk.MethodContext,
+    args: Tuple[Any, ...],
+    kwargs: Dict[str, Any],
+    child_outputs: List[Any],
+) -> float:
+  """Estimates the FLOPs of a method excluding calls to other modules.
+
+  Calls to other modules are replaced by their (already costed) outputs which
+  are passed in as inputs to the staged computation, so each method is only
+  staged and analysed once regardless of how deeply it is nested. Arguments
+  passed to other modules are returned from the staged computation, so the
+  computation producing them is not removed as dead code.
+
+  Args:
+    cost_tracker: The cost tracker used by the method interceptor.
+    context: Context of the method invocation to estimate the cost of.
+    args: Positional arguments to the method.
+    kwargs: Keyword arguments to the method.
+    child_outputs: The outputs of methods called on other modules, in call
+      order.
+
+  Returns:
+    The estimated number of floating point operations.
+  """
+  def method(child_outputs, *args, **kwargs):
+    cost_tracker.staged_outputs = iter(child_outputs)
+    cost_tracker.staged_inputs = []
+    try:
+      out = context.orig_method(*args, **kwargs)
+      if next(cost_tracker.staged_outputs, _NO_OUTPUT) is not _NO_OUTPUT:
+        raise ValueError(
+            f"{context.module.module_name}.{context.method_name} called fewer "
+            "methods on other modules when staged for cost analysis.")
+      return out, cost_tracker.staged_inputs
+    finally:
+      cost_tracker.staged_outputs = None
+      cost_tracker.staged_inputs = []
+
+  # NOTE: `next_f` may only be called once, so we stage the original method.
+  return estimate_flops(method, (child_outputs,) + tuple(args), kwargs)
+
+
 def log_used_modules(
     used_modules: List[MethodInvocation],
     next_f: Callable[..., T],
     args: Tuple[Any, ...],
     kwargs: Dict[str, Any],
     context: hk.MethodContext,
+    *,
+    cost_tracker: Optional[CostTracker] = None,
 ) -> T:
   """Method interceptor that logs used modules to the given list."""
   if context.method_name in IGNORED_METHODS:
     return next_f(*args, **kwargs)
 
+  if cost_tracker is not None:
+    if cost_tracker.staged_outputs is not None:
+      cost_tracker.staged_inputs.append((args, kwargs))
+      out = next(cost_tracker.staged_outputs, _NO_OUTPUT)
+      if out is _NO_OUTPUT:
+        raise ValueError(
+            f"{context.module.module_name}.{context.method_name} was called "
+            "more times when staged for cost analysis.")
+      return out
+
+    cost_tracker.children.append([0., 0])
+    cost_tracker.child_outputs.append([])
+
   idx = len(used_modules)
   used_modules.append(None)  # pytype: disable=container-type-mismatch
   out = next_f(*args, **kwargs)
+  output_spec = to_spec(out)
+
+  cost = None
+  if cost_tracker is not None:
+    children_flops, children_bytes = cost_tracker.children.pop()
+    child_outputs = cost_tracker.child_outputs.pop()
+    flops = estimate_own_flops(cost_tracker, context, args, kwargs,
+                               child_outputs)
+    out_bytes = spec_bytes(output_spec)
+    cost = InvocationCost(flops=flops,
+                          total_flops=flops + children_flops,
+                          output_bytes=out_bytes,
+                          total_output_bytes=out_bytes + children_bytes)
+    if cost_tracker.children:
+      parent = cost_tracker.children[-1]
+      parent[0] += cost.total_flops
+      parent[1] += cost.total_output_bytes
+      cost_tracker.child_outputs[-1].append(out)
+
   used_modules[idx] = MethodInvocation(
       module_details=ModuleDetails.of(context.module, context.method_name),
       args_spec=to_spec(args),
       kwargs_spec=to_spec(kwargs),
-      output_spec=to_spec(out),
+      output_spec=output_spec,
       context=context,
-      call_stack=get_call_stack())
+      call_stack=get_call_stack(),
+      cost=cost)
   return out
 
 
@@ -163,6 +339,8 @@ def make_hk_transform_ignore_jax_transforms(f):
 
 def eval_summary(
     f: Union[Callable[..., Any], hk.Transformed, hk.TransformedWithState],
+    *,
+    cost_analysis: bool = False,
 ) -> Callable[..., Sequence[MethodInvocation]]:
   """Records module method calls performed by ``f``.
 
@@ -176,8 +354,24 @@ def eval_summary(
   mod := mlp/~/linear_1 | in := f32[8,300] out := f32[8,100]
   mod := mlp/~/linear_2 | in := f32[8,100] out := f32[8,10]
 
+  With ``cost_analysis=True`` each invocation also includes an
+  :class:`InvocationCost`, estimated by staging out each method call (with
+  calls to other modules replaced by their outputs) and querying XLA's cost
+  analysis (so the summary takes longer to compute):
+
+  >>> for i in hk.experimental.eval_summary(f, cost_analysis=True)(x):
+  ...   print("mod := {:14} | flops := {:.0f} total := {:.0f}".format(
+  ...       i.module_details.module.module_name, i.cost.flops,
+  ...       i.cost.total_flops))
+  mod := mlp            | flops := 3200 total := 4265680
+  mod := mlp/~/linear_0 | flops := 3765600 total := 3765600
+  mod := mlp/~/linear_1 | flops := 480800 total := 480800
+  mod := mlp/~/linear_2 | flops := 16080 total := 16080
+
   Args:
     f: A function or transformed function to trace.
+    cost_analysis: If ``True`` estimate the FLOPs and output size of each
+      method invocation (see :class:`InvocationCost`).
 
   Returns:
     A callable taking the same arguments as the provided function, but returning
@@ -196,7 +390,9 @@ def eval_summary(
 
   def f_logged(*args, **kwargs):
     used_modules = sidechannel.peek()
-    logging_interceptor = functools.partial(log_used_modules, used_modules)
+    cost_tracker = CostTracker() if cost_analysis else None
+    logging_interceptor = functools.partial(log_used_modules, used_modules,
+                                            cost_tracker=cost_tracker)
 
     with hk.intercept_methods(logging_interceptor):
       f(*args, **kwargs)
@@ -301,8 +497,22 @@ all_columns = {
         "Param bytes",
         lambda r: utils.format_bytes(utils.tree_bytes(r.module_details.params)),
         "right"),
+    "flops": Column(
+        "FLOPs", lambda r: "{:,.0f}".format(r.cost.flops), "right"),
+    "total_flops": Column(
+        "Total FLOPs", lambda r: "{:,.0f}".format(r.cost.total_flops), "right"),
+    "output_bytes": Column(
+        "Output bytes", lambda r: utils.format_bytes(r.cost.output_bytes),
+        "right"),
+    "total_output_bytes": Column(
+        "Total output bytes",
+        lambda r: utils.format_bytes(r.cost.total_output_bytes),
+        "right"),
 }
 
+# Columns requiring `eval_summary(.., cost_analysis=True)`.
+COST_COLUMNS = ("flops", "total_flops", "output_bytes", "total_output_bytes")
+
 DEFAULT_COLUMNS = ("module", "config", "owned_params", "input", "output",
                    "params_size", "params_bytes")
 DEFAULT_FILTERS = ("has_output",)
@@ -347,6 +557,17 @@ def tabulate(
   * ``output``: Displays module output.
   * ``params_size``: Displays the number of parameters
   * ``params_bytes``: Displays parameter size in bytes.
+  * ``flops``: Displays FLOPs estimated by XLA for the method, excluding calls
+    to other modules.
+  * ``total_flops``: Displays FLOPs estimated by XLA for the method, including
+    calls to other modules.
+  * ``output_bytes``: Displays the size in bytes of the method output.
+  * ``total_output_bytes``: Displays the size in bytes of the method output
+    and the outputs of all calls to other modules.
+
+  Enabling any of ``flops``, ``total_flops``, ``output_bytes`` or
+  ``total_output_bytes`` stages out each method call to estimate its cost
+  (see :func:`eval_summary`), which makes generating the table slower.
 
   Possible values for ``filters``:
 
@@ -368,8 +589,6 @@ def tabulate(
     :func:`eval_summary`: Raw data used to generate this table.
   """
   # pylint: enable=line-too-long
-  f = eval_summary(f)
-
   if columns is None:
     columns = DEFAULT_COLUMNS
   else:
@@ -386,6 +605,7 @@ def tabulate(
       raise ValueError(
           f"Invalid filter(s) {invalid}, valid filters {list(all_filters)}")
 
+  f = eval_summary(f, cost_analysis=any(c in COST_COLUMNS for c in columns))
   columns = [all_columns[c] for c in columns]
   filters = [all_filters[f] for f in filters]
 
@@ -196,6 +196,65 @@ class TabulateTest(parameterized.TestCase):
     expected = [[size], [size]]
     self.assertEqual(rows, expected)
 
+  def test_flops_columns(self):
+    x = jnp.ones([2, 3])
+    f = lambda: CallsOtherModule(basic.Linear(4))(x)
+    rows = tabulate_to_list(f, columns=("flops", "total_flops"))
+    # Matmul (2 * 2 * 3 * 4) plus bias (2 * 4).
+    expected = [["0", "56"], ["56", "56"]]
+    self.assertEqual(rows, expected)
+
+  def test_output_bytes_columns(self):
+    x = jnp.ones([2, 3])
+    f = lambda: CallsOtherModule(basic.Linear(4))(x)
+    rows = tabulate_to_list(
+        f, columns=("output_bytes", "total_output_bytes"))
+    expected = [["32.00 B", "64.00 B"], ["32.00 B", "32.00 B"]]
+    self.assertEqual(rows, expected)
+
+  def test_cost_analysis_static_args_and_state(self):
+    class StatefulModule(module_lib.Module):
+
+      def __call__(self, x, *, scale):
+        counter = base.get_state("counter", [], init=jnp.zeros)
+        base.set_state("counter", counter + 1)
+        return IdentityModule()(x * scale), None
+
+    f = lambda x: StatefulModule()(x, scale=2.)
+    invocations = summarise.eval_summary(f, cost_analysis=True)(jnp.ones([3]))
+    self.assertLen(invocations, 2)
+    outer, inner = (i.cost for i in invocations)
+    self.assertEqual(inner.total_flops, 0)
+    self.assertEqual(outer.total_flops, outer.flops)
+    self.assertGreater(outer.flops, 0)
+    self.assertEqual(outer.output_bytes, 12)
+    self.assertEqual(outer.total_output_bytes, 24)
+
+  def test_cost_analysis_stages_each_method_once(self):
+    calls = []
+
+    class Leaf(module_lib.Module):
+
+      def __call__(self, x):
+        calls.append(None)
+        return x * 2
+
+    nested = lambda depth: Leaf() if not depth else CallsOtherModule(
+        nested(depth - 1))
+    f = lambda: nested(3)(jnp.ones([2, 3]))
+    invocations = summarise.eval_summary(f, cost_analysis=True)()
+    self.assertLen(invocations, 4)
+    # Once for each of init and apply and once when staging the leaf itself,
+    # enclosing modules use the output of the leaf rather than staging it.
+    self.assertLen(calls, 3)
+    for invocation in invocations:
+      self.assertEqual(invocation.cost.total_flops, 6)
+
+  def test_no_cost_by_default(self):
+    f = lambda: CallsOtherModule(MultipleParametersModule())()
+    for invocation in get_summary(f):
+      self.assertIsNone(invocation.cost)
+
   def test_invalid_column(self):
     with self.assertRaisesRegex(ValueError, "Invalid column.*nonsense"):
       tabulate_to_list(lambda: None, columns=("nonsense",))
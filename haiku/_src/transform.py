@@ -14,14 +14,21 @@
 # ==============================================================================
 """Base Haiku module."""
 
+import collections
+import functools
 import types
-from typing import Any, Callable, Mapping, NamedTuple, Optional, Tuple, TypeVar, Union
+import weakref
+from typing import (Any, Callable, Hashable, Mapping, NamedTuple, Optional,
+                    Sequence, Tuple, TypeVar, Union)
 
 from haiku._src import analytics
 from haiku._src import base
 from haiku._src import data_structures
 from haiku._src import typing
+from haiku._src import utils
 import jax
+import jax.numpy as jnp
+import numpy as np
 
 # If you are forking replace this with `import haiku as hk`.
 hk = types.ModuleType("haiku")
@@ -33,10 +40,34 @@ del typing
 
 T = TypeVar("T")
 
+# Maximum number of staged computations kept per function by `cache_traces`.
+DEFAULT_TRACE_CACHE_SIZE = 64
+
 # TODO(b/161684853): Use protocols for transform if/when PEP-612 is implemented.
 # https://www.python.org/dev/peps/pep-0612/
 
 
+class AbstractInit(NamedTuple):
+  """Shapes and dtypes of the parameters and state created by ``init``.
+
+  Attributes:
+    params: The parameters ``init`` would create with leaves replaced by
+      :class:`jax.ShapeDtypeStruct`.
+    state: The state ``init`` would create with leaves replaced by
+      :class:`jax.ShapeDtypeStruct`.
+    params_size: The total number of elements in ``params``.
+    params_bytes: The total size in bytes of ``params``.
+    state_size: The total number of elements in ``state``.
+    state_bytes: The total size in bytes of ``state``.
+  """
+  params: hk.Params
+  state: hk.State
+  params_size: int
+  params_bytes: int
+  state_size: int
+  state_bytes: int
+
+
 class Transformed(NamedTuple):
   """Holds a pair of pure functions.
 
@@ -51,6 +82,31 @@ class Transformed(NamedTuple):
   # Args: [Params, Optional[PRNGKey], ...]
   apply: Callable[..., Any]
 
+  def abstract_init(self, *args, **kwargs) -> AbstractInit:
+    """Returns the shape and dtype of parameters without allocating them.
+
+    Takes the same arguments as ``init``. Array inputs may be passed as
+    :class:`jax.ShapeDtypeStruct` and results are memoized on the shape/dtype
+    of the inputs:
+
+    >>> f = hk.transform(lambda x: hk.Linear(100)(x))
+    >>> x = jax.ShapeDtypeStruct([1, 10], jnp.float32)
+    >>> out = f.abstract_init(jax.random.PRNGKey(42), x)
+    >>> out.params
+    {'linear': {'b': ShapeDtypeStruct(shape=(100,), dtype=float32),
+                'w': ShapeDtypeStruct(shape=(10, 100), dtype=float32)}}
+    >>> out.params_size, out.params_bytes
+    (1100, 4400)
+
+    Args:
+      *args: Positional arguments to ``init``.
+      **kwargs: Keyword arguments to ``init``.
+
+    Returns:
+      An :class:`AbstractInit` with ``state`` always empty.
+    """
+    return abstract_init(self.init, args, kwargs, with_state=False)
+
 
 class TransformedWithState(NamedTuple):
   """Holds a pair of pure functions.
@@ -66,6 +122,20 @@ class TransformedWithState(NamedTuple):
   # Args: [hk.Params, hk.State, Optional[PRNGKey], ...]
   apply: Callable[..., Tuple[Any, hk.State]]
 
+  def abstract_init(self, *args, **kwargs) -> AbstractInit:
+    """Returns the shape and dtype of parameters and state without allocating.
+
+    See :meth:`Transformed.abstract_init`.
+
+    Args:
+      *args: Positional arguments to ``init``.
+      **kwargs: Keyword arguments to ``init``.
+
+    Returns:
+      An :class:`AbstractInit`.
+    """
+    return abstract_init(self.init, args, kwargs, with_state=True)
+
 
 def to_prng_sequence(rng, err_msg) -> Optional[hk.PRNGSequence]:
   if rng is not None:
@@ -225,7 +295,7 @@ def without_apply_rng(f: TransformedT) -> TransformedT:
 
 
 # TODO(tomhennigan) Remove apply_rng.
-def transform(f, *, apply_rng=True) -> Transformed:
+def transform(f, *, apply_rng=True, cache_traces=False) -> Transformed:
   """Transforms a function using Haiku modules into a pair of pure functions.
 
   For a function ``out = f(*a, **k)`` this function returns a pair of two pure
@@ -283,9 +353,23 @@ def transform(f, *, apply_rng=True) -> Transformed:
   If your transformed function needs to maintain internal state (e.g. moving
   averages in batch norm) then see :func:`transform_with_state`.
 
+  If you call ``init`` or ``apply`` many times outside of :func:`jax.jit` (or
+  with a small set of varying input shapes) you can pass ``cache_traces=True``
+  to avoid re-running the Python code in ``f`` on every call. In this mode the
+  first call for a given set of input shapes/dtypes traces ``f`` to a jaxpr and
+  subsequent calls evaluate the cached jaxpr:
+
+  >>> f = hk.transform(lambda x: hk.Linear(1)(x), cache_traces=True)
+  >>> params = f.init(jax.random.PRNGKey(42), jnp.ones([1, 1]))
+  >>> out = f.apply(params, None, jnp.ones([1, 1]))  # Traces `f`.
+  >>> out = f.apply(params, None, jnp.ones([1, 1]))  # Uses the cached trace.
+
   Args:
     f: A function closing over :class:`Module` instances.
     apply_rng: In the process of being removed. Can only value `True`.
+    cache_traces: If ``True`` then ``init`` and ``apply`` cache the staged
+      computation for each distinct set of input shapes/dtypes (see
+      :func:`transform_with_state` for details).
 
   Returns:
     A :class:`Transformed` tuple with ``init`` and ``apply`` pure functions.
@@ -300,7 +384,7 @@ def transform(f, *, apply_rng=True) -> Transformed:
         "hk.without_apply_rng(hk.transform(...)).\n"
         "Replace hk.transform(..., apply_rng=True) with hk.transform(...).")
 
-  return without_state(transform_with_state(f))
+  return without_state(transform_with_state(f, cache_traces=cache_traces))
 
 
 def check_not_jax_transformed(f):
@@ -318,7 +402,7 @@ def check_not_jax_transformed(f):
                      "functions Haiku gives you back from hk.transform).")
 
 
-def transform_with_state(f) -> TransformedWithState:
+def transform_with_state(f, *, cache_traces=False) -> TransformedWithState:
   """Transforms a function using Haiku modules into a pair of pure functions.
 
   See :func:`transform` for general details on Haiku transformations.
@@ -350,8 +434,22 @@ def transform_with_state(f) -> TransformedWithState:
   >>> counter
   DeviceArray(9, dtype=int32)
 
+  If ``cache_traces=True`` then calls to ``init`` and ``apply`` are keyed on the
+  abstract values (shape, dtype) of all array inputs, the value of all
+  non-array inputs (e.g. ``is_training=True``) and the structure of all inputs
+  (including the structure of ``params`` and ``state`` and whether ``rng`` is
+  ``None``). The first call for a given key traces ``f`` to a jaxpr, subsequent
+  calls with the same key evaluate the jaxpr directly without running any
+  Python code in ``f``. Up to ``DEFAULT_TRACE_CACHE_SIZE`` jaxprs are cached
+  per function, the least recently used entry is evicted first. All outputs
+  of ``f`` must be JAX types when using this option (as for :func:`jax.jit`)
+  and ``f`` must not have Python side effects that you expect to run on every
+  call.
+
   Args:
     f: A function closing over :class:`Module` instances.
+    cache_traces: Whether to cache staged computations for ``init`` and
+      ``apply``, see above.
 
   Returns:
     A :class:`TransformedWithState` tuple with ``init`` and ``apply`` pure
@@ -402,11 +500,154 @@ def transform_with_state(f) -> TransformedWithState:
         raise jax.errors.UnexpectedTracerError(unexpected_tracer_hint) from e
     return out, ctx.collect_state()
 
+  if cache_traces:
+    init_fn = trace_cached(init_fn)
+    apply_fn = trace_cached(apply_fn)
+
   tie_in_original_fn(f, init_fn, apply_fn)
 
   return TransformedWithState(init_fn, apply_fn)
 
 
+def is_dynamic(x) -> bool:
+  return isinstance(
+      x, (jnp.ndarray, np.ndarray, np.generic, jax.ShapeDtypeStruct))
+
+
+def cache_key_for(leaf, dynamic: bool) -> Hashable:
+  if type(leaf) is jax.ShapeDtypeStruct:  # pylint: disable=unidiomatic-typecheck
+    return jax.core.ShapedArray(leaf.shape, leaf.dtype)
+  elif dynamic:
+    aval = jax.core.get_aval(leaf)
+    return jax.core.ShapedArray(aval.shape, aval.dtype,
+                                weak_type=aval.weak_type)
+  else:
+    # NOTE: Including the type means we do not conflate `True` and `1`.
+    return type(leaf), leaf
+
+
+class FlatArgs(NamedTuple):
+  """Flattened arguments split into dynamic (array) and static leaves."""
+  leaves: Sequence[Any]
+  dynamic: Tuple[bool, ...]
+  treedef: Any
+  key: Hashable
+
+  @classmethod
+  def create(cls, args, kwargs) -> "FlatArgs":
+    leaves, treedef = jax.tree_flatten((args, kwargs))
+    dynamic = tuple(map(is_dynamic, leaves))
+    key = (treedef,) + tuple(map(cache_key_for, leaves, dynamic))
+    return cls(leaves, dynamic, treedef, key)
+
+  @property
+  def dynamic_leaves(self) -> Sequence[Any]:
+    return [x for x, d in zip(self.leaves, self.dynamic) if d]
+
+  def close_over_static(self, fun: Callable[..., T]) -> Callable[..., T]:
+    """Returns ``fun`` as a function of only the dynamic leaves."""
+    static_leaves = [None if d else x
+                     for x, d in zip(self.leaves, self.dynamic)]
+    dynamic, treedef = self.dynamic, self.treedef
+
+    def wrapper(*dynamic_leaves):
+      dynamic_leaves = iter(dynamic_leaves)
+      leaves = [next(dynamic_leaves) if d else x
+                for x, d in zip(static_leaves, dynamic)]
+      args, kwargs = jax.tree_unflatten(treedef, leaves)
+      return fun(*args, **kwargs)
+
+    return wrapper
+
+
+def trace_cached(
+    fun: Callable[..., T],
+    maxsize: int = DEFAULT_TRACE_CACHE_SIZE,
+) -> Callable[..., T]:
+  """Caches jaxprs for ``fun`` keyed on the abstract values of its inputs.
+
+  Array leaves of the inputs are treated as dynamic values, all other leaves
+  are treated as static (and must be hashable, if not we fall back to calling
+  ``fun`` directly).
+
+  Args:
+    fun: A function whose inputs and outputs are pytrees.
+    maxsize: The maximum number of jaxprs to cache, the least recently used
+      entry is evicted first.
+
+  Returns:
+    A function with the same signature as ``fun``.
+  """
+  cache = collections.OrderedDict()
+
+  def stage(flat_args: FlatArgs):
+    out_trees = []
+
+    def flat_fun(*args, **kwargs):
+      out_leaves, out_tree = jax.tree_flatten(fun(*args, **kwargs))
+      out_trees.append(out_tree)
+      return out_leaves
+
+    closed_jaxpr = jax.make_jaxpr(flat_args.close_over_static(flat_fun))(
+        *flat_args.dynamic_leaves)
+    # Run the jaxpr as a single computation, rather than eagerly dispatching
+    # each of its equations as a separate op.
+    return jax.jit(jax.core.jaxpr_as_fun(closed_jaxpr)), out_trees[0]
+
+  @functools.wraps(fun)
+  def wrapper(*args, **kwargs):
+    flat_args = FlatArgs.create(args, kwargs)
+    try:
+      hash(flat_args.key)
+    except TypeError:
+      # Some static input is not hashable, we cannot cache this call.
+      return fun(*args, **kwargs)
+
+    jaxpr_fun, out_tree = utils.lru_lookup(
+        cache, flat_args.key, lambda: stage(flat_args), maxsize)
+    out_leaves = jaxpr_fun(*flat_args.dynamic_leaves)
+    return jax.tree_unflatten(out_tree, out_leaves)
+
+  wrapper.cache_clear = cache.clear
+  wrapper.cache_size = lambda: len(cache)
+  return wrapper
+
+
+# Memoized results of `abstract_init` keyed on the init function.
+abstract_init_cache = weakref.WeakKeyDictionary()
+
+
+def abstract_init(init_fn, args, kwargs, *, with_state: bool) -> AbstractInit:
+  """Evaluates the shape of ``init_fn(*args, **kwargs)`` (memoized)."""
+  flat_args = FlatArgs.create(args, kwargs)
+
+  def compute():
+    out = jax.eval_shape(flat_args.close_over_static(init_fn),
+                         *flat_args.dynamic_leaves)
+    if with_state:
+      params, state = out
+    else:
+      params, state = out, data_structures.to_haiku_dict({})
+    return AbstractInit(params=params,
+                        state=state,
+                        params_size=utils.tree_size(params),
+                        params_bytes=utils.tree_bytes(params),
+                        state_size=utils.tree_size(state),
+                        state_bytes=utils.tree_bytes(state))
+
+  try:
+    hash(flat_args.key)
+  except TypeError:
+    return compute()
+
+  cache = abstract_init_cache.setdefault(init_fn, collections.OrderedDict())
+  out = utils.lru_lookup(cache, flat_args.key, compute,
+                         DEFAULT_TRACE_CACHE_SIZE)
+  # Copy so callers mutating the result do not modify the cached value.
+  return out._replace(params=data_structures.to_haiku_dict(out.params),
+                      state=data_structures.to_haiku_dict(out.state))
+
+
 def tie_in_original_fn(f, init_fn, apply_fn):
   # EXPERIMENTAL: Expose the original function as a private attribute.
   if isinstance(f, (Transformed, TransformedWithState)):
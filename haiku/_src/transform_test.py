@@ -524,6 +524,198 @@ class TransformTest(parameterized.TestCase):
         r"instead .*jax.jit\(hk.transform\(f\).apply\)"):
       hk_transform(f)
 
+  @parameterized.parameters(transform.transform,
+                            transform.transform_with_state)
+  def test_cache_traces_reuses_trace(self, transform_fn):
+    num_traces = []
+
+    def f(x):
+      num_traces.append(None)
+      w = base.get_parameter("w", [], init=jnp.ones)
+      return x * w
+
+    f = transform_fn(f, cache_traces=True)
+    x = jnp.ones([2])
+    init_out = f.init(None, x)
+    self.assertLen(num_traces, 1)
+    f.init(None, x)
+    self.assertLen(num_traces, 1)
+
+    params = init_out[0] if isinstance(init_out, tuple) else init_out
+    if transform_fn is transform.transform:
+      apply_fn = lambda x: f.apply(params, None, x)
+    else:
+      apply_fn = lambda x: f.apply(params, {}, None, x)[0]
+
+    for _ in range(3):
+      out = apply_fn(x)
+    self.assertLen(num_traces, 2)
+    self.assertEqual(params, {"~": {"w": jnp.ones([])}})
+    self.assertTrue((out == x).all())
+
+  def test_cache_traces_keyed_on_shape_and_static_args(self):
+    num_traces = []
+
+    def f(x, scale):
+      num_traces.append(None)
+      return x * scale
+
+    f = transform.transform(f, cache_traces=True)
+    f.apply({}, None, jnp.ones([1]), 2)
+    f.apply({}, None, jnp.ones([2]), 2)
+    f.apply({}, None, jnp.ones([2]), 3)
+    f.apply({}, None, jnp.ones([2]), 3.)
+    self.assertLen(num_traces, 4)
+    out = f.apply({}, None, jnp.ones([2]), 3)
+    self.assertLen(num_traces, 4)
+    self.assertEqual(out.tolist(), [3, 3])
+
+  def test_cache_traces_rng(self):
+    f = transform.transform(lambda: jax.random.uniform(base.next_rng_key(), []),
+                            cache_traces=True)
+    a = f.apply({}, jax.random.PRNGKey(1))
+    b = f.apply({}, jax.random.PRNGKey(2))
+    self.assertNotEqual(a, b)
+    with self.assertRaisesRegex(ValueError, "must pass a non-None PRNGKey"):
+      f.apply({}, None)
+
+  def test_cache_traces_lru_eviction(self):
+    num_traces = []
+
+    def f(x):
+      num_traces.append(None)
+      return x
+
+    f = transform.trace_cached(f, maxsize=2)
+    f(jnp.ones([1]))
+    f(jnp.ones([2]))
+    f(jnp.ones([1]))  # Hit, [2] is now least recently used.
+    f(jnp.ones([3]))  # Evicts [2].
+    self.assertLen(num_traces, 3)
+    self.assertEqual(f.cache_size(), 2)
+    f(jnp.ones([1]))
+    self.assertLen(num_traces, 3)
+    f(jnp.ones([2]))
+    self.assertLen(num_traces, 4)
+
+  def test_cache_traces_unhashable_static_arg(self):
+    num_traces = []
+
+    def f(x, unused_config):
+      num_traces.append(None)
+      return x
+
+    f = transform.trace_cached(f)
+    f(jnp.ones([]), {1})
+    f(jnp.ones([]), {1})
+    self.assertLen(num_traces, 2)
+    self.assertEqual(f.cache_size(), 0)
+
+  def test_cache_traces_runs_as_one_computation(self):
+    f = transform.trace_cached(lambda x: jnp.tanh(x) * 2 + 1)
+    x = jnp.ones([2])
+    f(x)
+    # The cached jaxpr is called as a single (jitted) computation rather than
+    # as one op per equation.
+    jaxpr = jax.make_jaxpr(f)(x)
+    self.assertLen(jaxpr.eqns, 1)
+    self.assertTrue(jnp.allclose(f(x), jnp.tanh(x) * 2 + 1))
+
+  def test_cache_traces_keyed_on_weak_type(self):
+    num_traces = []
+
+    def f(x):
+      num_traces.append(None)
+      return x
+
+    f = transform.trace_cached(f)
+    f(jnp.asarray(1.))
+    f(jnp.asarray(2.))
+    self.assertLen(num_traces, 1)
+    f(jnp.asarray(1., jnp.float32))
+    self.assertLen(num_traces, 2)
+
+  def test_cache_traces_under_jit(self):
+    def f(x):
+      return x + base.get_parameter("w", [], init=jnp.ones)
+
+    f = transform.transform(f, cache_traces=True)
+    x = jnp.ones([2])
+    params = f.init(None, x)
+    out = jax.jit(f.apply)(params, None, x)
+    self.assertEqual(out.tolist(), [2, 2])
+
+  def test_abstract_init(self):
+    def f(x):
+      return x @ base.get_parameter("w", [3, 2], jnp.bfloat16, init=jnp.ones)
+
+    f = transform.transform(f)
+    x = jax.ShapeDtypeStruct([1, 3], jnp.float32)
+    out = f.abstract_init(jax.random.PRNGKey(42), x)
+    self.assertEqual(out.params,
+                     {"~": {"w": jax.ShapeDtypeStruct((3, 2), jnp.bfloat16)}})
+    self.assertEqual(out.state, {})
+    self.assertEqual(out.params_size, 6)
+    self.assertEqual(out.params_bytes, 12)
+    self.assertEqual(out.state_size, 0)
+    self.assertEqual(out.state_bytes, 0)
+
+  def test_abstract_init_with_state(self):
+    def f():
+      base.get_parameter("w", [2], init=jnp.ones)
+      base.get_state("s", [4], jnp.int32, init=jnp.zeros)
+
+    f = transform.transform_with_state(f)
+    out = f.abstract_init(None)
+    params, state = f.init(None)
+    self.assertEqual(out.params,
+                     jax.tree_map(lambda x: jax.ShapeDtypeStruct(x.shape,
+                                                                 x.dtype),
+                                  params))
+    self.assertEqual(out.state,
+                     {"~": {"s": jax.ShapeDtypeStruct((4,), jnp.int32)}})
+    self.assertEqual(out.params_bytes, 8)
+    self.assertEqual(out.state_bytes, 16)
+
+  def test_abstract_init_memoized(self):
+    num_traces = []
+
+    def f(x):
+      num_traces.append(None)
+      return base.get_parameter("w", x.shape, init=jnp.ones)
+
+    f = transform.transform(f)
+    f.abstract_init(None, jnp.ones([1]))
+    f.abstract_init(None, jax.ShapeDtypeStruct([1], jnp.float32))
+    self.assertLen(num_traces, 1)
+    out = f.abstract_init(None, jnp.ones([2]))
+    self.assertLen(num_traces, 2)
+    self.assertEqual(out.params_size, 2)
+
+  def test_abstract_init_memoized_returns_copy(self):
+    def f():
+      base.get_state("s", [], init=jnp.zeros)
+      return base.get_parameter("w", [1], init=jnp.ones)
+
+    f = transform.transform_with_state(f)
+    out = f.abstract_init(None)
+    out.params["linear"] = {}
+    out.params["~"]["b"] = jax.ShapeDtypeStruct([], jnp.float32)
+    del out.state["~"]["s"]
+    out = f.abstract_init(None)
+    self.assertEqual(jax.tree_map(lambda x: x.shape, out.params),
+                     {"~": {"w": (1,)}})
+    self.assertEqual(jax.tree_map(lambda x: x.shape, out.state),
+                     {"~": {"s": ()}})
+
+  def test_abstract_init_does_not_allocate(self):
+    def f():
+      # This would need 4TB of memory if it were allocated.
+      return base.get_parameter("w", [1024] * 4, init=jnp.zeros)
+
+    out = transform.transform(f).abstract_init(None)
+    self.assertEqual(out.params_size, 1024 ** 4)
+
 
 class ObjectWithTransform:
 
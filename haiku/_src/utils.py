@@ -282,3 +282,28 @@ def format_bytes(num_bytes) -> str:
     num_bytes /= one_thousand
     suffix = suffixes.pop(0)
   return f"{num_bytes:.2f} {suffix}"
+
+
+def lru_lookup(cache: collections.OrderedDict, key, compute, maxsize: int):
+  """Returns ``cache[key]`` populating it with ``compute()`` if missing.
+
+  If adding the new entry grows the cache beyond ``maxsize`` entries, the
+  least recently used entry is evicted.
+
+  Args:
+    cache: The cache, ordered from least to most recently used.
+    key: A hashable key.
+    compute: Computes the value for ``key`` (must not return ``None``).
+    maxsize: The maximum number of entries in the cache.
+
+  Returns:
+    The (possibly cached) value for ``key``.
+  """
+  value = cache.get(key)
+  if value is None:
+    value = cache[key] = compute()
+    if len(cache) > maxsize:
+      cache.popitem(last=False)
+  else:
+    cache.move_to_end(key)
+  return value
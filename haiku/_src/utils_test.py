@@ -14,6 +14,8 @@
 # ==============================================================================
 """Tests for haiku._src.utils."""
 
+import collections
+
 from absl.testing import absltest
 from absl.testing import parameterized
 from haiku._src import test_utils
@@ -144,5 +146,24 @@ class ChannelIndexTest(parameterized.TestCase):
         "Unable to extract channel information from '{}'.".format(data_format)):
       utils.get_channel_index(data_format)
 
+
+class LruLookupTest(absltest.TestCase):
+
+  def test_computes_missing_values_once(self):
+    cache = collections.OrderedDict()
+    computed = []
+    compute = lambda: computed.append(None) or len(computed)
+    self.assertEqual(utils.lru_lookup(cache, "a", compute, maxsize=2), 1)
+    self.assertEqual(utils.lru_lookup(cache, "a", compute, maxsize=2), 1)
+    self.assertLen(computed, 1)
+
+  def test_evicts_least_recently_used(self):
+    cache = collections.OrderedDict()
+    utils.lru_lookup(cache, "a", lambda: 1, maxsize=2)
+    utils.lru_lookup(cache, "b", lambda: 2, maxsize=2)
+    utils.lru_lookup(cache, "a", lambda: 1, maxsize=2)  # "b" is now LRU.
+    utils.lru_lookup(cache, "c", lambda: 3, maxsize=2)
+    self.assertEqual(list(cache), ["a", "c"])
+
 if __name__ == "__main__":
   absltest.main()
@@ -0,0 +1,111 @@
+# Copyright 2021 DeepMind Technologies Limited. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Compares benchmark results in JSON format against a saved baseline.
+
+Usage::
+
+  python suite.py --benchmark_out=baseline.json
+  # Upgrade Haiku/JAX or apply some change.
+  python suite.py --benchmark_out=contender.json
+  python compare.py baseline.json contender.json --threshold=0.1
+
+Exits with a non-zero status if any benchmark is slower than the baseline by
+more than ``threshold`` (as a fraction of the baseline time).
+"""
+
+import json
+import sys
+from typing import Dict, List, NamedTuple, Optional
+
+from absl import app
+from absl import flags
+import tabulate
+
+flags.DEFINE_float("threshold", 0.1,
+                   "Fractional slowdown relative to the baseline at which a "
+                   "benchmark is considered a regression.")
+flags.DEFINE_enum("time", "real_time", ["real_time", "cpu_time"],
+                  "Which time to compare.")
+FLAGS = flags.FLAGS
+
+
+class Comparison(NamedTuple):
+  name: str
+  baseline: Optional[float]
+  contender: Optional[float]
+
+  @property
+  def change(self) -> Optional[float]:
+    if self.baseline is None or self.contender is None:
+      return None
+    return (self.contender - self.baseline) / self.baseline
+
+
+TIME_UNITS = {"ns": 1e-9, "us": 1e-6, "ms": 1e-3, "s": 1.}
+
+
+def load_times(path: str, time: str) -> Dict[str, float]:
+  """Returns time in seconds keyed by benchmark name."""
+  with open(path) as f:
+    results = json.load(f)
+  times = {}
+  for benchmark in results["benchmarks"]:
+    if benchmark.get("run_type", "iteration") != "iteration":
+      continue  # Skip aggregates (e.g. mean/stddev over repetitions).
+    unit = TIME_UNITS[benchmark.get("time_unit", "ns")]
+    times[benchmark["name"]] = benchmark[time] * unit
+  return times
+
+
+def compare(
+    baseline: Dict[str, float],
+    contender: Dict[str, float],
+) -> List[Comparison]:
+  names = list(baseline) + [n for n in contender if n not in baseline]
+  return [Comparison(n, baseline.get(n), contender.get(n)) for n in names]
+
+
+def format_time(seconds: Optional[float]) -> str:
+  return "-" if seconds is None else f"{seconds * 1e3:.3f}"
+
+
+def format_change(change: Optional[float]) -> str:
+  return "-" if change is None else f"{change:+.1%}"
+
+
+def main(argv):
+  if len(argv) != 3:
+    raise app.UsageError("Usage: compare.py BASELINE.json CONTENDER.json")
+  baseline = load_times(argv[1], FLAGS.time)
+  contender = load_times(argv[2], FLAGS.time)
+  comparisons = compare(baseline, contender)
+  regressions = [c for c in comparisons
+                 if c.change is not None and c.change > FLAGS.threshold]
+
+  rows = [[c.name, format_time(c.baseline), format_time(c.contender),
+           format_change(c.change), "REGRESSION" if c in regressions else ""]
+          for c in comparisons]
+  print(tabulate.tabulate(
+      rows,
+      headers=["Benchmark", "Baseline (ms)", "Contender (ms)", "Change", ""],
+      colalign=["left", "right", "right", "right", "left"]))
+
+  if regressions:
+    print(f"\n{len(regressions)} benchmark(s) regressed by more than "
+          f"{FLAGS.threshold:.0%}.")
+    sys.exit(1)
+
+if __name__ == "__main__":
+  app.run(main)
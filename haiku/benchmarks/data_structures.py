@@ -0,0 +1,101 @@
+# Copyright 2021 DeepMind Technologies Limited. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Benchmark pytree operations on params stored as `dict` and `FlatMap`.
+
+Each benchmark is parameterized by the number of modules (each with
+``PARAMS_PER_MODULE`` parameters), for example ``tree_map_flatmap/1000``
+measures ``jax.tree_map`` over a ``FlatMap`` with 1000 modules.
+"""
+
+from typing import Callable, Mapping
+
+import google_benchmark
+from haiku._src import data_structures
+import jax
+import numpy as np
+
+NUM_MODULES = (10, 100, 1000)
+PARAMS_PER_MODULE = 5
+
+CONTAINERS = {
+    "dict": data_structures.to_dict,
+    "flatmap": data_structures.to_immutable_dict,
+}
+
+
+def make_params(num_modules: int):
+  x = np.ones([2], np.float32)
+  return {f"module_{i}": {f"param_{j}": x for j in range(PARAMS_PER_MODULE)}
+          for i in range(num_modules)}
+
+
+def read_all(params: Mapping[str, Mapping[str, np.ndarray]]):
+  for module_name in params:
+    module = params[module_name]
+    for name in module:
+      module[name]  # pylint: disable=pointless-statement
+
+
+def register(name: str, make_fn: Callable[[Mapping], Callable[[], None]]):
+  """Registers a benchmark of the function returned by ``make_fn(params)``."""
+  for container_name, to_container in CONTAINERS.items():
+
+    def bench(state, to_container=to_container):
+      fn = make_fn(to_container(make_params(state.range(0))))
+      while state:
+        fn()
+
+    bench = google_benchmark.option.unit(google_benchmark.kMicrosecond)(bench)
+    for num_modules in reversed(NUM_MODULES):
+      bench = google_benchmark.option.arg(num_modules)(bench)
+    google_benchmark.register(bench, name=f"{name}_{container_name}")
+
+
+def flatten(params):
+  return lambda: jax.tree_flatten(params)
+
+
+def unflatten(params):
+  leaves, treedef = jax.tree_flatten(params)
+  return lambda: jax.tree_unflatten(treedef, leaves)
+
+
+def tree_map(params):
+  return lambda: jax.tree_map(lambda x: x, params)
+
+
+def tree_map_and_read(params):
+  """Reads every parameter from the output of ``tree_map`` (e.g. in apply)."""
+  return lambda: read_all(jax.tree_map(lambda x: x, params))
+
+
+def read(params):
+  return lambda: read_all(params)
+
+
+def copy(params):
+  return lambda: data_structures.to_haiku_dict(params)
+
+
+for _name, _make_fn in (("flatten", flatten),
+                        ("unflatten", unflatten),
+                        ("tree_map", tree_map),
+                        ("tree_map_and_read", tree_map_and_read),
+                        ("read", read),
+                        ("copy", copy)):
+  register(_name, _make_fn)
+
+if __name__ == "__main__":
+  google_benchmark.main()
@@ -0,0 +1,182 @@
+# Copyright 2021 DeepMind Technologies Limited. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Compares trace/lower/compile time of unrolled and `layer_stack` models.
+
+Sweeps the depth of a transformer built either as a Python loop of blocks
+(``unrolled``) or with ``hk.experimental.layer_stack`` at different ``unroll``
+values, then reports the time taken to trace, lower and compile a training step
+(``value_and_grad`` of ``apply``) along with the size of the compiled HLO. For
+each ``layer_stack`` configuration the crossover depth (the smallest depth at
+which it takes less total time than the unrolled model) is reported.
+
+  python benchmarks/layer_stack.py --depths=12,48,96 --unrolls=1,2,4 \
+      --output=layer_stack.json
+"""
+
+import json
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from absl import app
+from absl import flags
+import haiku as hk
+import jax
+import jax.numpy as jnp
+import tabulate
+
+flags.DEFINE_list("depths", ["12", "48", "96"], "Number of transformer blocks.")
+flags.DEFINE_list("unrolls", ["1", "2", "4"],
+                  "Values of `unroll` to benchmark for `layer_stack`.")
+flags.DEFINE_integer("repeats", 3,
+                     "Number of times to repeat each measurement, the minimum "
+                     "time is reported.")
+flags.DEFINE_integer("batch_size", 8, "Batch size.")
+flags.DEFINE_integer("sequence_length", 128, "Sequence length.")
+flags.DEFINE_integer("model_size", 256, "Model size.")
+flags.DEFINE_integer("num_heads", 8, "Number of attention heads.")
+flags.DEFINE_string("output", None, "Optional path to write results as JSON.")
+FLAGS = flags.FLAGS
+
+UNROLLED = "unrolled"
+
+
+def block(x):
+  """A pre-norm transformer block."""
+  model_size = x.shape[-1]
+  num_heads = FLAGS.num_heads
+  ln = lambda: hk.LayerNorm(axis=-1, create_scale=True, create_offset=True)
+  h = ln()(x)
+  h = hk.MultiHeadAttention(num_heads=num_heads,
+                            key_size=model_size // num_heads,
+                            w_init_scale=1.)(h, h, h)
+  x = x + h
+  h = ln()(x)
+  h = hk.nets.MLP([4 * model_size, model_size])(h)
+  return x + h
+
+
+def make_model(depth: int, style: str, unroll: Optional[int]):
+  """Returns a transformed ``depth`` block transformer."""
+  def f(x):
+    if style == UNROLLED:
+      for _ in range(depth):
+        x = block(x)
+      return x
+    else:
+      return hk.experimental.layer_stack(depth, unroll=unroll)(block)(x)
+  return hk.transform(f)
+
+
+def min_time(fn, repeats: int):
+  """Returns the result of the last call to ``fn`` and the minimum time."""
+  times = []
+  for _ in range(repeats):
+    t0 = time.perf_counter()
+    out = fn()
+    times.append(time.perf_counter() - t0)
+  return out, min(times)
+
+
+def measure(depth: int, style: str, unroll: Optional[int]) -> Dict[str, Any]:
+  """Measures trace, lower and compile time of a training step."""
+  f = make_model(depth, style, unroll)
+  x = jnp.ones([FLAGS.batch_size, FLAGS.sequence_length, FLAGS.model_size])
+  params = jax.eval_shape(f.init, jax.random.PRNGKey(42), x)
+
+  def loss(params, x):
+    return jnp.mean(f.apply(params, None, x) ** 2)
+
+  train_step = jax.value_and_grad(loss)
+  # NOTE: A new function is used each time to avoid JAX's tracing cache.
+  fresh = lambda: lambda *a: train_step(*a)  # pylint: disable=unnecessary-lambda
+  _, trace_time = min_time(lambda: jax.make_jaxpr(fresh())(params, x),
+                           FLAGS.repeats)
+  lowered, lower_time = min_time(lambda: jax.jit(fresh()).lower(params, x),
+                                 FLAGS.repeats)
+  compiled, compile_time = min_time(lowered.compile, FLAGS.repeats)
+
+  return {
+      "depth": depth,
+      "style": style,
+      "unroll": unroll,
+      # Lowering includes tracing.
+      "trace_s": trace_time,
+      "lower_s": lower_time,
+      "compile_s": compile_time,
+      "total_s": lower_time + compile_time,
+      "hlo_bytes": len(compiled.as_text()),
+  }
+
+
+def configurations(unrolls: Sequence[int]):
+  yield UNROLLED, None
+  for unroll in unrolls:
+    yield f"layer_stack(unroll={unroll})", unroll
+
+
+def crossovers(
+    results: List[Dict[str, Any]],
+) -> Dict[str, Optional[int]]:
+  """Returns the smallest depth at which each style beats the unrolled model."""
+  unrolled = {r["depth"]: r["total_s"] for r in results
+              if r["style"] == UNROLLED}
+  out = {}
+  for r in sorted(results, key=lambda r: r["depth"]):
+    if r["style"] == UNROLLED:
+      continue
+    out.setdefault(r["style"], None)
+    if out[r["style"]] is None and r["total_s"] < unrolled[r["depth"]]:
+      out[r["style"]] = r["depth"]
+  return out
+
+
+def main(argv):
+  del argv
+  depths = sorted(int(d) for d in FLAGS.depths)
+  unrolls = [int(u) for u in FLAGS.unrolls]
+
+  results = []
+  for depth in depths:
+    for style, unroll in configurations(unrolls):
+      result = measure(depth, style, unroll)
+      print("depth={depth} style={style} total={total_s:.3f}s".format(
+          **result), flush=True)
+      results.append(result)
+
+  print(tabulate.tabulate(
+      [[r["depth"], r["style"], f"{r['trace_s']:.3f}", f"{r['lower_s']:.3f}",
+        f"{r['compile_s']:.3f}", f"{r['total_s']:.3f}", r["hlo_bytes"]]
+       for r in results],
+      headers=["Depth", "Style", "Trace (s)", "Lower (s)", "Compile (s)",
+               "Lower + compile (s)", "HLO bytes"]))
+
+  crossover = crossovers(results)
+  print()
+  for style, depth in crossover.items():
+    if depth is None:
+      print(f"{style} is not faster than unrolled at any depth in {depths}.")
+    else:
+      print(f"{style} is faster than unrolled at depth >= {depth} "
+            f"(of {depths}).")
+
+  if FLAGS.output:
+    with open(FLAGS.output, "w") as f:
+      json.dump({"results": results,
+                 "crossover": crossover,
+                 "backend": jax.default_backend(),
+                 "jax_version": jax.__version__}, f, indent=2)
+
+if __name__ == "__main__":
+  app.run(main)
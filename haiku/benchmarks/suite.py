@@ -0,0 +1,260 @@
+# Copyright 2021 DeepMind Technologies Limited. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Benchmark trace/compile/run timings of apply and grad for models/transforms.
+
+Each benchmark is parameterized by batch size, for example
+``run_grad_resnet_18/8`` measures a compiled forward and backward pass of
+ResNet18 with a batch size of 8. Use ``--benchmark_format=json`` (or
+``--benchmark_out=results.json``) for machine readable output and
+``compare.py`` to compare results against a saved baseline.
+"""
+
+from typing import Any, Callable, NamedTuple, Sequence, Tuple
+
+import google_benchmark
+import haiku as hk
+import jax
+import jax.numpy as jnp
+
+DEFAULT_BATCH_SIZES = (1, 8, 32)
+
+
+class Case(NamedTuple):
+  """A function to benchmark.
+
+  Attributes:
+    name: Name of the case used in benchmark names.
+    make: Given a batch size returns a pair of ``init`` and ``apply`` functions
+      (as in :func:`hk.transform_with_state`) and an input for them.
+    batch_sizes: Batch sizes to benchmark.
+  """
+  name: str
+  make: Callable[[int], Tuple[hk.TransformedWithState, jnp.ndarray]]
+  batch_sizes: Sequence[int] = DEFAULT_BATCH_SIZES
+
+
+def block_until_ready(tree):
+  return jax.tree_map(lambda x: x.block_until_ready(), tree)
+
+
+def loss_fn(apply_fn):
+  """Returns a function computing a scalar loss from the output of apply."""
+  def loss(params, state, rng, x):
+    out, _ = apply_fn(params, state, rng, x)
+    return sum(jnp.sum(o.astype(jnp.float32)) for o in jax.tree_leaves(out))
+  return loss
+
+
+def phase_fns(f: hk.TransformedWithState):
+  """Returns the functions benchmarked for each phase."""
+  return {
+      "apply": f.apply,
+      "grad": jax.value_and_grad(loss_fn(f.apply)),
+  }
+
+
+def register_case(case: Case):
+  """Registers trace/compile/run benchmarks for apply and grad of ``case``."""
+
+  def setup(state):
+    f, x = case.make(state.range(0))
+    rng = jax.random.PRNGKey(42)
+    params, hk_state = block_until_ready(jax.jit(f.init)(rng, x))
+    return f, (params, hk_state, rng, x)
+
+  for phase in ("apply", "grad"):
+    # NOTE: `phase` is bound as a default argument for each benchmark.
+
+    def trace_bench(state, phase=phase):
+      """Benchmark JAX tracing (and lowering) of ``phase``."""
+      f, args = setup(state)
+      fn = phase_fns(f)[phase]
+      while state:
+        # A new function each time, so we do not hit JAX's tracing cache.
+        jax.jit(lambda *a: fn(*a)).lower(*args)  # pylint: disable=unnecessary-lambda
+
+    def compile_bench(state, phase=phase):
+      """Benchmark XLA compilation of ``phase``."""
+      f, args = setup(state)
+      lowered = jax.jit(phase_fns(f)[phase]).lower(*args)
+      while state:
+        lowered.compile()
+
+    def run_bench(state, phase=phase):
+      """Benchmark runtime of compiled ``phase``."""
+      f, args = setup(state)
+      fn = jax.jit(phase_fns(f)[phase])
+      # Run once to compile.
+      block_until_ready(fn(*args))
+      while state:
+        block_until_ready(fn(*args))
+
+    for kind, bench in (("trace", trace_bench),
+                        ("compile", compile_bench),
+                        ("run", run_bench)):
+      bench = google_benchmark.option.unit(google_benchmark.kMillisecond)(bench)
+      for batch_size in reversed(case.batch_sizes):
+        bench = google_benchmark.option.arg(batch_size)(bench)
+      google_benchmark.register(bench, name=f"{kind}_{phase}_{case.name}")
+
+
+def model_case(name: str, input_shape: Sequence[int], **kwargs):
+  """Decorator registering a case for a function ``f(x, is_training)``."""
+  def decorator(f: Callable[[jnp.ndarray, bool], Any]):
+    def make(batch_size):
+      x = jnp.ones([batch_size, *input_shape])
+      return hk.transform_with_state(lambda x: f(x, True)), x
+    register_case(Case(name, make, **kwargs))
+    return f
+  return decorator
+
+
+def transform_case(name: str, input_shape: Sequence[int], **kwargs):
+  """Decorator registering a case for ``make() -> TransformedWithState``."""
+  def decorator(make_transformed: Callable[[], hk.TransformedWithState]):
+    def make(batch_size):
+      return make_transformed(), jnp.ones([batch_size, *input_shape])
+    register_case(Case(name, make, **kwargs))
+    return make_transformed
+  return decorator
+
+
+# Models.
+
+
+@model_case("mlp", [784])
+def mlp(x, is_training):
+  del is_training
+  return hk.nets.MLP([300, 100, 10])(x)
+
+
+@model_case("mobilenet_v1", [224, 224, 3], batch_sizes=(1, 8))
+def mobilenet_v1(x, is_training):
+  return hk.nets.MobileNetV1(num_classes=1000)(x, is_training)
+
+
+@model_case("resnet_18", [224, 224, 3], batch_sizes=(1, 8))
+def resnet_18(x, is_training):
+  return hk.nets.ResNet18(num_classes=1000)(x, is_training)
+
+
+@model_case("resnet_50", [224, 224, 3], batch_sizes=(1, 8))
+def resnet_50(x, is_training):
+  return hk.nets.ResNet50(num_classes=1000)(x, is_training)
+
+
+@model_case("vqvae", [32, 32, 3])
+def vqvae(x, is_training):
+  """A small VQ-VAE using :class:`hk.nets.VectorQuantizerEMA`."""
+  z = hk.Sequential([
+      hk.Conv2D(64, 4, stride=2), jax.nn.relu,
+      hk.Conv2D(64, 4, stride=2), jax.nn.relu,
+      hk.Conv2D(32, 1),
+  ])(x)
+  vq = hk.nets.VectorQuantizerEMA(
+      embedding_dim=32, num_embeddings=512, commitment_cost=0.25, decay=0.99)
+  vq_out = vq(z, is_training=is_training)
+  x_recon = hk.Sequential([
+      hk.Conv2DTranspose(64, 4, stride=2), jax.nn.relu,
+      hk.Conv2DTranspose(3, 4, stride=2),
+  ])(vq_out["quantize"])
+  return x_recon, vq_out["loss"]
+
+
+# Haiku transforms.
+
+NUM_LAYERS = 16
+HIDDEN = 256
+
+
+def layer(x):
+  return jax.nn.relu(hk.Linear(HIDDEN)(x))
+
+
+@transform_case("scan", [HIDDEN])
+def scan():
+  def f(x):
+    core = hk.Linear(HIDDEN)
+    xs = jnp.broadcast_to(x, (NUM_LAYERS, *x.shape))
+    step = lambda carry, x: (jax.nn.relu(core(carry) + x), None)
+    out, _ = hk.scan(step, x, xs)
+    return out
+  return hk.transform_with_state(f)
+
+
+@transform_case("vmap", [HIDDEN])
+def vmap():
+  def f(x):
+    # Map over the batch with parameters shared between examples.
+    mlp = hk.nets.MLP([HIDDEN] * 4)
+    return hk.vmap(mlp, split_rng=False)(x)
+  return hk.transform_with_state(f)
+
+
+@transform_case("remat", [HIDDEN])
+def remat():
+  def f(x):
+    for _ in range(NUM_LAYERS):
+      x = hk.remat(layer)(x)
+    return x
+  return hk.transform_with_state(f)
+
+
+@transform_case("layer_stack", [HIDDEN])
+def layer_stack():
+  def f(x):
+    return hk.experimental.layer_stack(NUM_LAYERS)(layer)(x)
+  return hk.transform_with_state(f)
+
+
+@transform_case("unrolled", [HIDDEN])
+def unrolled():
+  def f(x):
+    for _ in range(NUM_LAYERS):
+      x = layer(x)
+    return x
+  return hk.transform_with_state(f)
+
+
+@transform_case("lift", [HIDDEN])
+def lift():
+  inner = hk.transform(lambda x: hk.nets.MLP([HIDDEN] * 4)(x))
+
+  def f(x):
+    params = hk.experimental.lift(inner.init)(hk.next_rng_key(), x)
+    return inner.apply(params, None, x)
+  return hk.transform_with_state(f)
+
+
+@transform_case("multi_transform", [HIDDEN])
+def multi_transform():
+  """Encoder/decoder sharing parameters, applied one after the other."""
+  def f():
+    encoder = hk.nets.MLP([HIDDEN] * 2, name="encoder")
+    decoder = hk.nets.MLP([HIDDEN] * 2, name="decoder")
+    def init(x):
+      return decoder(encoder(x))
+    return init, (encoder, decoder)
+
+  f = hk.multi_transform_with_state(f)
+  encode, decode = f.apply
+
+  def apply(params, state, rng, x):
+    z, state = encode(params, state, rng, x)
+    return decode(params, state, rng, z)
+  return hk.TransformedWithState(f.init, apply)
+
+if __name__ == "__main__":
+  google_benchmark.main()
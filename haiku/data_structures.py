@@ -14,6 +14,7 @@
 # ==============================================================================
 """Public Haiku data structures."""
 
+from haiku._src.data_structures import FlatParams
 from haiku._src.data_structures import to_haiku_dict
 from haiku._src.data_structures import to_immutable_dict
 from haiku._src.data_structures import to_mutable_dict
@@ -23,18 +24,23 @@ from haiku._src.filtering import map  # pylint: disable=redefined-builtin
 from haiku._src.filtering import merge
 from haiku._src.filtering import partition
 from haiku._src.filtering import partition_n
+from haiku._src.filtering import Partitioner
+from haiku._src.filtering import Selector
 from haiku._src.filtering import traverse
 from haiku._src.utils import tree_bytes
 from haiku._src.utils import tree_size
 
 
 __all__ = (
+    "FlatParams",
     "is_subset",
     "filter",
     "map",
     "merge",
     "partition",
     "partition_n",
+    "Partitioner",
+    "Selector",
     "to_haiku_dict",
     "to_mutable_dict",
     "to_immutable_dict",
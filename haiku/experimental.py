@@ -17,6 +17,8 @@
 Features may be removed or modified at any time.
 """
 
+from haiku._src.attention import fuse_qkv_params
+from haiku._src.attention import unfuse_qkv_params
 from haiku._src.base import custom_creator
 from haiku._src.base import custom_getter
 from haiku._src.base import GetterContext
@@ -31,10 +33,20 @@ from haiku._src.module import MethodContext
 from haiku._src.module import name_like
 from haiku._src.module import name_scope
 from haiku._src.module import profiler_name_scopes
+from haiku._src.profiling import trace_profile
+from haiku._src.profiling import TraceEvent
+from haiku._src.profiling import TraceProfile
 from haiku._src.random import optimize_rng_use
+from haiku._src.recurrent import associative_unroll
+from haiku._src.recurrent import InputProjectionCore
+from haiku._src.recurrent import LinearTransitionCore
+from haiku._src.recurrent import pipelined_unroll
+from haiku._src.recurrent import ProjectedInputs
+from haiku._src.sharding import sharded_init
 from haiku._src.stateful import named_call
 from haiku._src.summarise import ArraySpec
 from haiku._src.summarise import eval_summary
+from haiku._src.summarise import InvocationCost
 from haiku._src.summarise import MethodInvocation
 from haiku._src.summarise import ModuleDetails
 from haiku._src.summarise import tabulate
@@ -45,14 +57,19 @@ ParamContext = GetterContext
 __all__ = (
     "abstract_to_dot",
     "ArraySpec",
+    "associative_unroll",
     "eval_summary",
+    "fuse_qkv_params",
     "custom_creator",
     "custom_getter",
+    "InputProjectionCore",
     "intercept_methods",
     "layer_stack",
     "lift",
     "lift_with_state",
+    "InvocationCost",
     "LiftWithStateUpdater",
+    "LinearTransitionCore",
     "MethodContext",
     "MethodInvocation",
     "ModuleDetails",
@@ -60,9 +77,16 @@ __all__ = (
     "name_scope",
     "named_call",
     "optimize_rng_use",
+    "pipelined_unroll",
     "GetterContext",
     "ParamContext",
     "profiler_name_scopes",
+    "ProjectedInputs",
+    "sharded_init",
     "tabulate",
     "to_dot",
+    "trace_profile",
+    "unfuse_qkv_params",
+    "TraceEvent",
+    "TraceProfile",
 )